@@ -0,0 +1,225 @@
+"""Local HTTP API for the summarization pipeline.
+
+    python api_server.py --port 8000
+
+    GET  /health           model load status (the server answers while the model loads), job and cache stats
+    GET  /stats/batching   queue depth, batch sizes and queue wait of the dynamic batching server
+    POST /jobs             {"query": "..."} or {"scraped": <scrape_review output>}, optionally with
+                           "profile": "fast" | "balanced" | "quality", "max_reviews", "preselect": false
+                           (keep near-duplicate reviews), "select_max_chunks" (only summarize the most
+                           representative reviews that fill this many model inputs; default: all of
+                           them) and "incremental": true (only summarize reviews
+                           newer than the stored ones, see review_store.py); returns {"job_id": ...}.
+                           A run that fails is checkpointed (see run_checkpoint.py): posting it again
+                           resumes after the last scraped page and saved chunk summary; "run_id" names
+                           the checkpoint (default: one derived from the query and settings)
+    GET  /jobs/<job_id>    job snapshot: status, stage, progress, partial results and the final result
+    GET  /stats/decoding   latency and output length per decoding profile and stage
+    GET  /metrics          Prometheus metrics (collected with --trace or REVIEW_TRACING=1, see tracing.py)
+
+Runs use the same background JobManager as the Streamlit app, so a query that is already being
+summarized is not started twice. The generate calls of all running jobs are batched together (see
+batching_server.py); --batch-size is the largest batch, --batch-wait-ms how long a chunk may wait
+for others to join it.
+"""
+import argparse
+import json
+import threading
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import tracing
+from batching_server import DEFAULT_MAX_WAIT_MS
+from decoding_stats import DecodingStats
+from inference_backends import BACKENDS
+from jobs import JobManager
+from model_provider import get_provider
+from pipeline import provider_pipeline_job
+from review_store import ReviewStore
+from run_checkpoint import RunCheckpoints, checkpoint_run_id
+from scrape_cache import ScrapeCache, normalize_query
+from scrapping_http import MAX_REVIEWS, scrape_fingerprint
+from scrapping_new import SCRAPE_BACKENDS, scrape_review_stream
+from summarization import DECODING_PROFILES, DEFAULT_PROFILE, MODEL_DIR
+from summary_cache import SummaryCache
+
+MAX_BODY_BYTES = 20 * 1024 * 1024
+MAX_REVIEWS_LIMIT = 2000
+
+
+class SummarizationAPI:
+    """Model, caches and job manager shared by all request handler threads"""
+
+    def __init__(self, model_dir=MODEL_DIR, workers=2, backend="http", concurrency=4, batch_size=4, use_cache=True,
+                 inference_backend="torch", dynamic_batching=True, batch_wait_ms=DEFAULT_MAX_WAIT_MS):
+        # Loads in the background; jobs submitted before it is ready wait for it
+        batching = {"max_batch_size": batch_size, "max_wait_ms": batch_wait_ms} if dynamic_batching else False
+        self.provider = get_provider(inference_backend, model_dir, batching=batching)
+        self.jobs = JobManager(max_workers=workers)
+        # Without the batching server, jobs take turns on the model
+        self.model_lock = threading.Lock() if self.provider.batching is None else None
+        self.stream_fn = partial(scrape_review_stream, backend=backend, concurrency=concurrency)
+        self.backend = backend
+        self.batch_size = batch_size
+        self.scrape_cache = ScrapeCache() if use_cache else None
+        self.summary_cache = SummaryCache() if use_cache else None
+        self.decoding_stats = DecodingStats()
+        self.review_store = ReviewStore()
+        self.checkpoints = RunCheckpoints()
+
+    def submit(self, body):
+        scrapped_data = body.get("scraped")
+        query = body.get("query") or (scrapped_data or {}).get("search_query")
+        if not query:
+            raise ValueError('expected {"query": ...} or {"scraped": {...}}')
+        profile = body.get("profile") or DEFAULT_PROFILE
+        if profile not in DECODING_PROFILES:
+            raise ValueError(f"unknown profile {profile!r}, expected one of {sorted(DECODING_PROFILES)}")
+        max_reviews = body["max_reviews"] if "max_reviews" in body else MAX_REVIEWS
+        if type(max_reviews) is not int or not 0 < max_reviews <= MAX_REVIEWS_LIMIT:  # bool is an int subclass
+            raise ValueError(f"max_reviews must be an integer between 1 and {MAX_REVIEWS_LIMIT}")
+        select_max_chunks = body.get("select_max_chunks")
+        if select_max_chunks is not None and (type(select_max_chunks) is not int or select_max_chunks < 1):
+            raise ValueError("select_max_chunks must be a positive integer or null")
+        options = {
+            "preselect": body.get("preselect", True) is not False,
+            "select_max_chunks": select_max_chunks,
+            "summary_cache": self.summary_cache,
+            "batch_size": self.batch_size,
+            "model_lock": self.model_lock,
+            "profile": profile,
+            "decoding_stats": self.decoding_stats,
+            "review_store": self.review_store if body.get("incremental") else None,
+            "checkpoints": self.checkpoints,
+        }
+        if scrapped_data:
+            # Payloads for one query with different reviews are different jobs
+            key = (f"{normalize_query(query)}|scraped:{scrape_fingerprint(scrapped_data)}|{profile}|{options['preselect']}"
+                   f"|{select_max_chunks}|{bool(body.get('incremental'))}")
+            options["scrapped_data"] = scrapped_data
+        else:
+            # Live queries stream: chunk summaries show up in the job while pages are still loading
+            key = (f"{normalize_query(query)}|{self.backend}|{profile}|{max_reviews}|{options['preselect']}"
+                   f"|{select_max_chunks}|{bool(body.get('incremental'))}")
+            options.update(
+                streaming=True, stream_fn=self.stream_fn, scrape_cache=self.scrape_cache,
+                force_refresh=bool(body.get("force_refresh")), max_reviews=max_reviews,
+            )
+        # One checkpoint per distinct job, so jobs that run side by side never share one
+        options["run_id"] = body.get("run_id") or checkpoint_run_id(query, job=key)
+        return self.jobs.submit(key, provider_pipeline_job, query, self.provider, description=query, **options)
+
+    def health(self):
+        return {
+            "status": "ok" if self.provider.state != "failed" else "model_failed",
+            "model": self.provider.status(),
+            "jobs": self.jobs.stats(),
+            "scrape_cache": self.scrape_cache.stats() if self.scrape_cache else None,
+            "summary_cache": self.summary_cache.stats() if self.summary_cache else None,
+            "review_store": self.review_store.stats(),
+            "checkpoints": self.checkpoints.stats(),
+        }
+
+    def batching_stats(self):
+        server = self.provider.batching_server
+        return server.stats() if server is not None else {"running": False, "enabled": self.provider.batching is not None}
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    api = None  # set by make_server
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/health":
+            return self._send_json(200, self.api.health())
+        if path == "/stats/decoding":
+            return self._send_json(200, self.api.decoding_stats.stats())
+        if path == "/stats/batching":
+            return self._send_json(200, self.api.batching_stats())
+        if path == "/metrics":
+            body = tracing.metrics_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if path.startswith("/jobs/"):
+            job = self.api.jobs.get(path[len("/jobs/"):])
+            if job is None:
+                return self._send_json(404, {"error": "unknown job id"})
+            return self._send_json(200, job)
+        self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.split("?", 1)[0].rstrip("/") != "/jobs":
+            return self._send_json(404, {"error": "not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            return self._send_json(413, {"error": "request body too large"})
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+            job_id = self.api.submit(body)
+        except (ValueError, AttributeError) as e:
+            return self._send_json(400, {"error": str(e)})
+        self._send_json(202, {"job_id": job_id, "status_url": f"/jobs/{job_id}"})
+
+    def log_message(self, format, *args):
+        pass  # keep the console for pipeline output
+
+
+def make_server(api, host="127.0.0.1", port=8000):
+    handler = type("BoundAPIHandler", (APIHandler,), {"api": api})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP API for product review summaries")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--workers", type=int, default=2, help="pipeline runs in parallel")
+    parser.add_argument("--backend", choices=SCRAPE_BACKENDS, default="http")
+    parser.add_argument("--concurrency", type=int, default=4, help="review pages fetched in parallel per product")
+    parser.add_argument("--batch-size", type=int, default=4, help="chunks per generate call (largest dynamic batch)")
+    parser.add_argument("--batch-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="how long a queued chunk waits for chunks of other jobs to batch with")
+    parser.add_argument("--no-dynamic-batching", action="store_true",
+                        help="run every job's generate calls on its own, one job at a time")
+    parser.add_argument("--inference-backend", choices=BACKENDS, default="torch", help="see inference_backends.py")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--trace", action="store_true", help="log timed spans and collect /metrics (see tracing.py)")
+    parser.add_argument("--trace-log", help="file for the span log (default: stderr)")
+    args = parser.parse_args(argv)
+    if args.trace:
+        tracing.enable(log_file=args.trace_log)
+
+    api = SummarizationAPI(
+        model_dir=args.model_dir, workers=args.workers, backend=args.backend,
+        concurrency=args.concurrency, batch_size=args.batch_size, use_cache=not args.no_cache,
+        inference_backend=args.inference_backend, dynamic_batching=not args.no_dynamic_batching,
+        batch_wait_ms=args.batch_wait_ms
+    )
+    server = make_server(api, args.host, args.port)
+    print(f"✅ Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        api.jobs.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    main()
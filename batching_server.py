@@ -0,0 +1,216 @@
+"""Dynamic batching of model.generate across every job and session of the process.
+
+Without it, every pipeline run calls generate on the shared model on its own: runs queue behind a
+lock or compete for the same CPU threads, each with its own small batches. A BatchingServer owns the
+model instead. generate_from_ids queues every chunk it is given on the server; one worker thread
+collects the chunks of all callers for up to max_wait_ms, groups them by generate kwargs (only
+chunks decoded with the same parameters can share a generate call), runs up to max_batch_size of
+them at a time and hands every summary back to the caller that asked for it.
+
+    server = BatchingServer(model, tokenizer, device, max_batch_size=8, max_wait_ms=25).start()
+    generate_from_ids(ids_list, model, tokenizer, device, **kwargs)  # now goes through the server
+    server.stats()  # queue depth, batch size distribution, queue wait
+
+model_provider starts one on the model it loads (REVIEW_DYNAMIC_BATCHING=0 turns that off), so the
+app, API server and CLI share it between all their jobs.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+
+import tracing
+from summarization import generate_batches
+
+DEFAULT_MAX_BATCH_SIZE = int(os.environ.get("REVIEW_MAX_BATCH_SIZE", 8))
+DEFAULT_MAX_WAIT_MS = float(os.environ.get("REVIEW_BATCH_WAIT_MS", 25))
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+QUEUE_DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Queue waits kept for the percentiles in stats()
+WAIT_SAMPLES = 2048
+
+
+def batching_enabled():
+    return os.environ.get("REVIEW_DYNAMIC_BATCHING", "1").lower() not in ("0", "false", "no", "off")
+
+
+def batch_group(generate_kwargs):
+    """Chunks with the same group can be generated together"""
+    return json.dumps(generate_kwargs, sort_keys=True, default=str)
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class BatchingServer:
+    """Queue of chunks to summarize from every thread of the process, generated in dynamic batches
+    on one worker thread"""
+
+    def __init__(self, model, tokenizer, device, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.device = device
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_ms = max(0.0, float(max_wait_ms))
+        self._cond = threading.Condition()
+        self._pending = {}  # batch group -> deque of (input ids, generate kwargs, future, queued at)
+        self._depth = 0
+        self._thread = None
+        self._stopping = False
+        self._batch_sizes = {}
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.requests = 0
+        self.batches = 0
+        self.chunks = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+
+    def start(self):
+        """Start the worker (once) and route generate_from_ids calls on model through it; returns self"""
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="batching-server", daemon=True)
+                self._thread.start()
+        self.model.batching_server = self
+        return self
+
+    def stop(self):
+        """Generate what is still queued, then stop; later calls on model run on their own thread again"""
+        if getattr(self.model, "batching_server", None) is self:
+            del self.model.batching_server
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def submit(self, input_ids_list, generate_kwargs):
+        """Queue token-id lists; returns one Future per input, resolving to its summary"""
+        group = batch_group(generate_kwargs)
+        queued_at = time.monotonic()
+        futures = [Future() for _ in input_ids_list]
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("BatchingServer is stopped")
+            queue = self._pending.setdefault(group, deque())
+            for ids, future in zip(input_ids_list, futures):
+                queue.append((list(ids), generate_kwargs, future, queued_at))
+            self._depth += len(futures)
+            self.requests += 1
+            self._cond.notify()
+        return futures
+
+    def generate(self, input_ids_list, progress_callback=None, on_batch=None, **generate_kwargs):
+        """generate_from_ids through the queue: summaries in input order; progress_callback(done, total)
+        and on_batch(indices, summaries) as batches holding some of the inputs finish"""
+        futures = self.submit(input_ids_list, generate_kwargs)
+        if progress_callback is not None or on_batch is not None:
+            positions = {future: i for i, future in enumerate(futures)}
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                finished = sorted(positions[future] for future in done if future.exception() is None)
+                if on_batch is not None and finished:
+                    on_batch(finished, [futures[i].result() for i in finished])
+                if progress_callback is not None:
+                    progress_callback(len(futures) - len(pending), len(futures))
+        return [future.result() for future in futures]
+
+    def _next_group(self, now):
+        """(group to generate next, seconds until it is due). A full group goes right away, otherwise
+        the group whose oldest chunk has waited longest once that chunk has waited max_wait_ms"""
+        full = [group for group, queue in self._pending.items() if len(queue) >= self.max_batch_size]
+        group = min(full or self._pending, key=lambda g: self._pending[g][0][3])
+        if full or self._stopping:
+            return group, 0.0
+        return group, self._pending[group][0][3] + self.max_wait_ms / 1000 - now
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if not self._depth:
+                        if self._stopping:
+                            return
+                        self._cond.wait()
+                        continue
+                    group, due_in = self._next_group(time.monotonic())
+                    if due_in <= 0:
+                        break
+                    self._cond.wait(due_in)
+                queue = self._pending[group]
+                items = [queue.popleft() for _ in range(min(self.max_batch_size, len(queue)))]
+                if not queue:
+                    del self._pending[group]
+                self._depth -= len(items)
+                depth = self._depth
+            self._generate(items, depth)
+
+    def _generate(self, items, depth):
+        started = time.monotonic()
+        waits = [started - queued_at for _, _, _, queued_at in items]
+        generate_kwargs = items[0][1]
+        try:
+            summaries = generate_batches(
+                [ids for ids, _, _, _ in items], self.model, self.tokenizer, self.device,
+                batch_size=len(items), **generate_kwargs
+            )
+            results = [(item, summary, None) for item, summary in zip(items, summaries)]
+        except Exception as e:
+            if len(items) == 1:
+                results = [(items[0], None, e)]
+            else:
+                # One bad input should not fail every caller it was batched with
+                results = []
+                for item in items:
+                    try:
+                        summary = generate_batches([item[0]], self.model, self.tokenizer, self.device, batch_size=1, **generate_kwargs)[0]
+                        results.append((item, summary, None))
+                    except Exception as item_error:
+                        results.append((item, None, item_error))
+        seconds = time.monotonic() - started
+
+        with self._cond:
+            self.batches += 1
+            self.chunks += len(items)
+            self.errors += sum(1 for _, _, error in results if error is not None)
+            self.busy_seconds += seconds
+            self._batch_sizes[len(items)] = self._batch_sizes.get(len(items), 0) + 1
+            self._waits.extend(waits)
+        tracing.observe("batch_size", len(items), buckets=BATCH_SIZE_BUCKETS)
+        tracing.observe("batch_queue_depth", depth, buckets=QUEUE_DEPTH_BUCKETS)
+        for seconds_waited in waits:
+            tracing.observe("batch_queue_wait_seconds", seconds_waited)
+
+        for (_, _, future, _), summary, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(summary)
+
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._waits)
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": self._depth,
+                "requests": self.requests,
+                "batches": self.batches,
+                "chunks": self.chunks,
+                "errors": self.errors,
+                "mean_batch_size": round(self.chunks / self.batches, 2) if self.batches else None,
+                "batch_sizes": {str(size): count for size, count in sorted(self._batch_sizes.items())},
+                "queue_wait_ms": {
+                    "p50": round(_percentile(waits, 0.5) * 1000, 1),
+                    "p95": round(_percentile(waits, 0.95) * 1000, 1),
+                    "max": round(waits[-1] * 1000, 1),
+                } if waits else None,
+                "busy_seconds": round(self.busy_seconds, 3),
+            }
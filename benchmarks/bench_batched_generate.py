@@ -0,0 +1,88 @@
+"""Compare the old per-chunk generate loop with batched generation at several batch sizes.
+
+    python benchmarks/bench_batched_generate.py --chunks 8 --batch-sizes 1,2,4,8
+"""
+import argparse
+import json
+
+import torch
+
+from common import DEFAULT_MODEL_DIR, load_benchmark_model, summarize_timings, synthetic_reviews, time_call
+from summarization import MAP_GENERATE_KWARGS, MAX_INPUT_TOKENS, generate_summaries
+
+
+def make_chunks(n_chunks, seed=0):
+    """Chunks of uneven length, roughly like block_reviews output"""
+    reviews = synthetic_reviews(n_chunks * 12, seed=seed)
+    chunks = []
+    pos = 0
+    for i in range(n_chunks):
+        take = 6 + (i * 5) % 12
+        chunks.append(" ".join(reviews[pos:pos + take]))
+        pos += take
+    return chunks
+
+
+def per_chunk_loop(chunks, model, tokenizer, device):
+    """The pre-batching map step: one generate call per chunk"""
+    summaries = []
+    for chunk in chunks:
+        inputs = tokenizer(chunk, return_tensors="pt", max_length=MAX_INPUT_TOKENS, truncation=True, padding=True)
+        inputs = {key: val.to(device) for key, val in inputs.items()}
+        with torch.no_grad():
+            summary_ids = model.generate(
+                input_ids=inputs["input_ids"],
+                attention_mask=inputs["attention_mask"],
+                eos_token_id=tokenizer.eos_token_id,
+                **MAP_GENERATE_KWARGS
+            )
+        summaries.append(tokenizer.decode(summary_ids[0], skip_special_tokens=True))
+    return summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=str(DEFAULT_MODEL_DIR))
+    parser.add_argument("--tiny", action="store_true", help="use a tiny random BART built from the config")
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--batch-sizes", default="1,2,4,8")
+    parser.add_argument("--repeat", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=0, help="torch.set_num_threads (0 = leave default)")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    model, tokenizer, label = load_benchmark_model(args.model_dir, tiny=args.tiny)
+    device = torch.device("cpu")
+    chunks = make_chunks(args.chunks)
+    token_counts = [len(ids) for ids in tokenizer(chunks, max_length=MAX_INPUT_TOKENS, truncation=True)["input_ids"]]
+
+    results = {
+        "model": label,
+        "chunks": len(chunks),
+        "chunk_tokens": token_counts,
+        "torch_threads": torch.get_num_threads(),
+        "runs": [],
+    }
+
+    _, timings = time_call(lambda: per_chunk_loop(chunks, model, tokenizer, device), repeat=args.repeat)
+    baseline = min(timings)
+    results["runs"].append({"mode": "per_chunk_loop", **summarize_timings(timings), "speedup": 1.0})
+
+    for batch_size in [int(b) for b in args.batch_sizes.split(",") if b.strip()]:
+        _, timings = time_call(
+            lambda: generate_summaries(chunks, model, tokenizer, device, batch_size=batch_size, **MAP_GENERATE_KWARGS),
+            repeat=args.repeat,
+        )
+        results["runs"].append({
+            "mode": f"batched(batch_size={batch_size})",
+            **summarize_timings(timings),
+            "speedup": round(baseline / min(timings), 2),
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
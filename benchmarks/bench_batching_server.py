@@ -0,0 +1,98 @@
+"""Throughput of concurrent callers summarizing chunks on one shared model: taking turns behind a
+lock (every call generating its own chunks) against the dynamic batching server.
+
+--callers threads each summarize --chunks-per-call chunks, --calls times, all starting together,
+like several sessions or jobs summarizing at once.
+
+    python benchmarks/bench_batching_server.py --tiny --callers 8 --chunks-per-call 1
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+
+from common import DEFAULT_MODEL_DIR, load_benchmark_model  # first: puts the repo on sys.path
+from batching_server import BatchingServer
+from summarization import MAP_GENERATE_KWARGS, MAX_INPUT_TOKENS, generate_from_ids
+
+MODES = ("lock", "server")
+
+
+def _chunks(tokenizer, n, seed):
+    rng = random.Random(seed)
+    return [
+        [tokenizer.bos_token_id] + [rng.randrange(1000, 30000) for _ in range(rng.randrange(200, MAX_INPUT_TOKENS - 2))]
+        + [tokenizer.eos_token_id]
+        for _ in range(n)
+    ]
+
+
+def run_mode(mode, model, tokenizer, device, args, generate_kwargs):
+    server = BatchingServer(model, tokenizer, device, args.max_batch_size, args.max_wait_ms).start() if mode == "server" else None
+    lock = threading.Lock()
+    latencies = []
+    start_line = threading.Barrier(args.callers)
+
+    def caller(index):
+        start_line.wait()
+        for call in range(args.calls):
+            ids = _chunks(tokenizer, args.chunks_per_call, seed=index * 1000 + call)
+            started = time.perf_counter()
+            if server is None:
+                with lock:
+                    generate_from_ids(ids, model, tokenizer, device, batch_size=args.max_batch_size, **generate_kwargs)
+            else:
+                generate_from_ids(ids, model, tokenizer, device, **generate_kwargs)
+            latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(args.callers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    stats = server.stats() if server is not None else None
+    if server is not None:
+        server.stop()
+
+    chunks = args.callers * args.calls * args.chunks_per_call
+    latencies.sort()
+    return {
+        "mode": mode,
+        "chunks": chunks,
+        "seconds": round(elapsed, 3),
+        "chunks_per_sec": round(chunks / elapsed, 3),
+        "call_p50_s": round(latencies[len(latencies) // 2], 3),
+        "call_p95_s": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 3),
+        "batch_sizes": stats["batch_sizes"] if stats else None,
+        "queue_wait_ms": stats["queue_wait_ms"] if stats else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=str(DEFAULT_MODEL_DIR))
+    parser.add_argument("--tiny", action="store_true", help="tiny random BART built from the config")
+    parser.add_argument("--callers", type=int, default=6)
+    parser.add_argument("--calls", type=int, default=2, help="generate calls per caller")
+    parser.add_argument("--chunks-per-call", type=int, default=1)
+    parser.add_argument("--max-batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=25)
+    parser.add_argument("--modes", default=",".join(MODES))
+    args = parser.parse_args()
+
+    model, tokenizer, label = load_benchmark_model(args.model_dir, tiny=args.tiny)
+    generate_kwargs = dict(MAP_GENERATE_KWARGS, max_new_tokens=40, min_length=10) if args.tiny else MAP_GENERATE_KWARGS
+    results = []
+    for mode in [m for m in args.modes.split(",") if m.strip()]:
+        results.append(run_mode(mode, model, tokenizer, "cpu", args, generate_kwargs))
+        print(f"{mode:>7} {results[-1]['chunks_per_sec']} chunks/s", file=sys.stderr)
+    print(json.dumps({"model": label, "callers": args.callers, "results": results}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
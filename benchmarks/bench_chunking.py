@@ -0,0 +1,67 @@
+"""Chunk count, fill ratio and map-stage summarize latency: greedy (900 tokens, arrival order)
+versus first-fit-decreasing bin-packing against the full context budget, on the same review sets.
+
+    python benchmarks/bench_chunking.py --sizes 50,150,500
+"""
+import argparse
+import json
+import random
+import statistics
+
+import torch
+
+from common import DEFAULT_MODEL_DIR, load_benchmark_model, synthetic_reviews, time_call  # first: puts the repo on sys.path
+from chunking import block_reviews
+from summarization import MAP_GENERATE_KWARGS, generate_from_ids
+
+
+def review_set(n, seed):
+    # Mix of short and long reviews, like a real product page
+    rng = random.Random(seed)
+    short = synthetic_reviews(n, seed=seed, min_sentences=1, max_sentences=3)
+    long = synthetic_reviews(n, seed=seed + 1, min_sentences=10, max_sentences=40)
+    return [long[i] if rng.random() < 0.3 else short[i] for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=str(DEFAULT_MODEL_DIR))
+    parser.add_argument("--tiny", action="store_true", help="use a tiny random BART built from the config")
+    parser.add_argument("--sizes", default="50,150,500")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--no-generate", action="store_true", help="only report chunk statistics")
+    args = parser.parse_args()
+
+    model, tokenizer, label = load_benchmark_model(args.model_dir, tiny=args.tiny)
+    device = torch.device("cpu")
+    results = {"model": label, "sets": []}
+
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        reviews = review_set(size, seed=size)
+        entry = {"reviews": size}
+        for strategy in ("greedy", "ffd"):
+            (chunks, timings) = time_call(lambda: block_reviews(reviews, tokenizer, strategy=strategy), repeat=3)
+            fills = [chunk["fill_ratio"] for chunk in chunks]
+            stats = {
+                "chunks": len(chunks),
+                "mean_fill_ratio": round(statistics.mean(fills), 3),
+                "min_fill_ratio": min(fills),
+                "chunking_s": round(min(timings), 4),
+            }
+            if not args.no_generate:
+                _, gen_timings = time_call(
+                    lambda: generate_from_ids(
+                        [chunk["input_ids"] for chunk in chunks], model, tokenizer, device,
+                        batch_size=args.batch_size, **MAP_GENERATE_KWARGS
+                    ),
+                    repeat=1,
+                )
+                stats["summarize_s"] = round(gen_timings[0], 3)
+            entry[strategy] = stats
+        results["sets"].append(entry)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Compare the inference backends (fp32 torch, int8, ONNX Runtime) on a fixed set of chunks.
+
+Reports load time, latency per chunk, peak RSS and ROUGE drift of each backend's summaries against
+the fp32 ones; a backend is marked "safe" when its mean ROUGE-L F1 against fp32 is at least
+--min-rouge-l. Every backend runs in its own process so peak RSS is not shared.
+
+    python inference_backends.py convert --backend int8   # once, for the converted int8 model
+    python benchmarks/bench_inference_backends.py --backends torch,int8,onnx --chunks 8
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+from common import DEFAULT_MODEL_DIR, REPO_ROOT, load_benchmark_model
+from bench_batched_generate import make_chunks
+from summarization import MAP_GENERATE_KWARGS, generate_summaries, load_model
+
+
+def _ngrams(tokens, n):
+    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+
+def _f1(overlap, candidate_total, reference_total):
+    if not overlap or not candidate_total or not reference_total:
+        return 0.0
+    precision, recall = overlap / candidate_total, overlap / reference_total
+    return 2 * precision * recall / (precision + recall)
+
+
+def rouge_n(candidate, reference, n):
+    cand, ref = _ngrams(candidate.split(), n), _ngrams(reference.split(), n)
+    return _f1(sum((cand & ref).values()), sum(cand.values()), sum(ref.values()))
+
+
+def rouge_l(candidate, reference):
+    cand, ref = candidate.split(), reference.split()
+    previous = [0] * (len(ref) + 1)
+    for word in cand:
+        current = [0]
+        for j, ref_word in enumerate(ref):
+            current.append(previous[j] + 1 if word == ref_word else max(previous[j + 1], current[j]))
+        previous = current
+    return _f1(previous[-1], len(cand), len(ref))
+
+
+def run_backend(model_dir, backend, chunks, batch_size):
+    """Worker side: load one backend, summarize the chunks, report timings and peak RSS"""
+    started = time.perf_counter()
+    model, tokenizer, device = load_model(model_dir, backend=backend)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    summaries = generate_summaries(chunks, model, tokenizer, device, batch_size=batch_size, **MAP_GENERATE_KWARGS)
+    seconds = time.perf_counter() - started
+    return {
+        "backend": backend,
+        "backend_used": getattr(model, "inference_backend", "torch"),
+        "load_s": round(load_seconds, 3),
+        "latency_per_chunk_s": round(seconds / len(chunks), 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "summaries": summaries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=str(DEFAULT_MODEL_DIR))
+    parser.add_argument("--tiny", action="store_true", help="use a tiny random BART built from the config")
+    parser.add_argument("--backends", default="torch,int8,onnx")
+    parser.add_argument("--chunks", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--min-rouge-l", type=float, default=0.9)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    chunks = make_chunks(args.chunks)
+
+    if args.worker:
+        print(json.dumps(run_backend(args.model_dir, args.worker, chunks, args.batch_size)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = args.model_dir
+        model, tokenizer, label = load_benchmark_model(model_dir, tiny=args.tiny)
+        if label == "tiny-random":
+            # Backends load from disk, so save the tiny model where they can find it
+            model.save_pretrained(tmp)
+            tokenizer.save_pretrained(tmp)
+            model_dir = tmp
+        del model
+
+        runs = {}
+        for backend in ["torch"] + [b for b in args.backends.split(",") if b.strip() and b != "torch"]:
+            output = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), "--worker", backend, "--model-dir", model_dir,
+                 "--chunks", str(args.chunks), "--batch-size", str(args.batch_size)],
+                capture_output=True, text=True, check=True, cwd=REPO_ROOT,
+            ).stdout
+            runs[backend] = json.loads(output.strip().splitlines()[-1])
+
+    reference = runs["torch"]["summaries"]
+    results = {"model": label, "chunks": len(chunks), "batch_size": args.batch_size, "runs": []}
+    for backend, run in runs.items():
+        summaries = run.pop("summaries")
+        drift = {
+            "rouge1": sum(rouge_n(s, r, 1) for s, r in zip(summaries, reference)) / len(reference),
+            "rouge2": sum(rouge_n(s, r, 2) for s, r in zip(summaries, reference)) / len(reference),
+            "rougeL": sum(rouge_l(s, r) for s, r in zip(summaries, reference)) / len(reference),
+        }
+        results["runs"].append({
+            **run,
+            **{f"{name}_vs_fp32": round(value, 4) for name, value in drift.items()},
+            "speedup": round(runs["torch"]["latency_per_chunk_s"] / run["latency_per_chunk_s"], 2),
+            "safe": run["backend_used"] == backend and drift["rougeL"] >= args.min_rouge_l,
+        })
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Throughput of the tiered LanguageFilter against per-review langdetect on a mixed-language corpus.
+
+    python benchmarks/bench_language_filter.py --reviews 5000
+"""
+import argparse
+import json
+import time
+
+from common import mixed_language_reviews
+from language_filter import LangdetectFilter, LanguageFilter
+
+
+def run(language_filter, texts):
+    start = time.perf_counter()
+    decisions = [language_filter(text) for text in texts]
+    elapsed = time.perf_counter() - start
+    return decisions, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts = mixed_language_reviews(args.reviews, seed=args.seed)
+
+    baseline = LangdetectFilter()
+    baseline(texts[0])  # load langdetect profiles outside the timed run
+    baseline.counts.clear()
+    base_decisions, base_s = run(baseline, texts)
+
+    tiered = LanguageFilter()
+    tiered._detector_factory()
+    cold_decisions, cold_s = run(tiered, texts)
+    cold_counts = dict(tiered.counts)
+    tiered.counts.clear()
+    _, warm_s = run(tiered, texts)
+
+    agreement = sum(a == b for a, b in zip(base_decisions, cold_decisions)) / len(texts)
+    print(json.dumps({
+        "reviews": len(texts),
+        "langdetect": {"seconds": round(base_s, 3), "reviews_per_s": round(len(texts) / base_s)},
+        "tiered_cold": {
+            "seconds": round(cold_s, 3),
+            "reviews_per_s": round(len(texts) / cold_s),
+            "speedup": round(base_s / cold_s, 1),
+            "decided_by_tier": cold_counts,
+        },
+        "tiered_memoised": {"seconds": round(warm_s, 3), "reviews_per_s": round(len(texts) / warm_s)},
+        "agreement_with_langdetect": round(agreement, 4),
+        "accepted": {"langdetect": sum(base_decisions), "tiered": sum(cold_decisions)},
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""Cold start and memory of the model loaders: memory-mapped safetensors (summarization.load_model on
+CPU) against a plain from_pretrained copy.
+
+Starts --workers processes per loader at the same time, as a multi-worker server would. Each one
+imports the pipeline, loads the model, summarizes one chunk and then waits. RSS and PSS are read
+while all of them are alive, so the PSS shows how much of the weights the workers share.
+
+    python benchmarks/bench_model_startup.py --tiny --workers 4
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import DEFAULT_MODEL_DIR, REPO_ROOT, load_benchmark_model
+
+LOADERS = ("mmap", "from_pretrained")
+
+
+def _smaps_rollup(pid):
+    """{"rss_mb", "pss_mb"} of a live process (Linux only, None elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return {"rss_mb": None, "pss_mb": None}
+    return {key: round(int(fields[name].split()[0]) / 1024, 1) for key, name in (("rss_mb", "Rss"), ("pss_mb", "Pss"))}
+
+
+def run_worker(loader, model_dir, spawned_at):
+    """Worker side: time the import, the load and the first summary, then wait for the parent"""
+    started = time.perf_counter()
+    import pipeline  # noqa: F401  the app's import cost, torch is not part of it
+    import_seconds = time.perf_counter() - started
+    torch_on_import = "torch" in sys.modules
+
+    from summarization import MAP_GENERATE_KWARGS, generate_summaries, load_model
+
+    started = time.perf_counter()
+    if loader == "mmap":
+        model, tokenizer, device = load_model(model_dir)
+    else:
+        import torch
+        from transformers import BartForConditionalGeneration, BartTokenizerFast
+
+        model = BartForConditionalGeneration.from_pretrained(model_dir).eval()
+        tokenizer, device = BartTokenizerFast.from_pretrained(model_dir), torch.device("cpu")
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    generate_summaries(["The battery lasts two days and the camera is sharp in daylight."], model, tokenizer, device,
+                       **dict(MAP_GENERATE_KWARGS, max_new_tokens=20, min_length=5))
+    first_summary_seconds = time.perf_counter() - started
+    print(json.dumps({
+        "loader": loader,
+        "weights": getattr(model, "weights_source", "loaded"),
+        "import_s": round(import_seconds, 3),
+        "torch_on_import": torch_on_import,
+        "load_s": round(load_seconds, 3),
+        "first_summary_s": round(first_summary_seconds, 3),
+        "cold_start_s": round(time.time() - spawned_at, 3),
+    }), flush=True)
+    sys.stdin.read()  # stay alive until every worker has been measured
+
+
+def run_loader(loader, model_dir, workers):
+    spawned_at = time.time()
+    processes = [
+        subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), "--worker", loader, "--model-dir", str(model_dir),
+             "--spawned-at", repr(spawned_at)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, cwd=REPO_ROOT,
+        )
+        for _ in range(workers)
+    ]
+    runs = []
+    try:
+        for process in processes:
+            run = json.loads(process.stdout.readline())
+            runs.append(run)
+        for process, run in zip(processes, runs):
+            run.update(_smaps_rollup(process.pid))
+    finally:
+        for process in processes:
+            process.stdin.close()
+            process.wait()
+
+    def mean(key):
+        values = [run[key] for run in runs if run[key] is not None]
+        return round(sum(values) / len(values), 3) if values else None
+
+    return {
+        "loader": loader,
+        "workers": workers,
+        "weights": runs[0]["weights"],
+        "torch_on_import": any(run["torch_on_import"] for run in runs),
+        **{f"mean_{key}": mean(key) for key in ("import_s", "load_s", "first_summary_s", "cold_start_s", "rss_mb", "pss_mb")},
+        "total_pss_mb": round(sum(run["pss_mb"] for run in runs), 1) if all(run["pss_mb"] is not None for run in runs) else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=str(DEFAULT_MODEL_DIR))
+    parser.add_argument("--tiny", action="store_true", help="save a tiny random BART built from the config and load that")
+    parser.add_argument("--workers", type=int, default=2, help="processes loading the model at the same time")
+    parser.add_argument("--loaders", default=",".join(LOADERS))
+    parser.add_argument("--worker", choices=LOADERS, help=argparse.SUPPRESS)
+    parser.add_argument("--spawned-at", type=float, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.model_dir, args.spawned_at)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        model_dir = args.model_dir
+        if args.tiny:
+            model, tokenizer, _ = load_benchmark_model(args.model_dir, tiny=True)
+            model.save_pretrained(tmp)  # writes model.safetensors
+            tokenizer.save_pretrained(tmp)
+            model_dir = tmp
+        results = [run_loader(loader, model_dir, args.workers) for loader in args.loaders.split(",") if loader.strip()]
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Offline benchmark of every pipeline stage: clean_text, preprocess_reviews, block_reviews and
+chunk_and_summarize at several review counts, on synthetic and recorded fixtures.
+
+Reports throughput, p50 / p95 latency over the repeats and peak RSS per stage and size (every
+stage runs in its own process, so peak memory is not shared), and writes everything to a JSON
+file named after the current commit. Pass an earlier file to --compare to flag regressions.
+
+    python benchmarks/bench_pipeline_stages.py --tiny
+    python benchmarks/bench_pipeline_stages.py --tiny --compare benchmarks/results/pipeline_<commit>.json
+"""
+import argparse
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# summarization (and with it torch) is only imported by the stages that need it, so the peak RSS
+# of the cleaning stages is their own
+from common import DEFAULT_MODEL_DIR, REPO_ROOT, load_benchmark_model, scrape_fixture, time_call
+
+STAGE_NAMES = ("clean_text", "preprocess_reviews", "block_reviews", "chunk_and_summarize")
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+class _LatencyRecorder:
+    """Stands in for decoding_stats.DecodingStats to collect per-summary generate latencies"""
+
+    def __init__(self):
+        self.latencies = []
+
+    def recorder(self, profile, stage):
+        def record(summaries, seconds):
+            self.latencies.extend([seconds / len(summaries)] * len(summaries))
+        return record
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def _peak_rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _stage_call(stage, data, model_dir, tiny, profile, batch_size):
+    """(fn to time, number of items it processes, extra stats fn); inputs of earlier stages are
+    prepared here, outside the timing"""
+    from language_filter import LanguageFilter
+    from prediction_reviews_cleaning import clean_text, preprocess_reviews
+
+    if stage == "clean_text":
+        comments = [review["Comment"] for review in data["reviews"]]
+        return (lambda: [clean_text(text) for text in comments]), len(comments), None
+    if stage == "preprocess_reviews":
+        language_filter = LanguageFilter()
+
+        def preprocess():
+            # Every run detects from scratch: with the memo of the warm-up (or of an earlier
+            # repeat) kept, the timed runs would only read cached language decisions
+            language_filter._memo.clear()
+            language_filter.counts.clear()
+            return preprocess_reviews(data, language_filter=language_filter)
+
+        return preprocess, len(data["reviews"]), None
+
+    from chunking import block_reviews
+
+    model, tokenizer, _ = load_benchmark_model(model_dir, tiny=tiny)
+    cleaned = [review["cleaned_comment"] for review in preprocess_reviews(data)["cleaned_reviews"]]
+    if stage == "block_reviews":
+        return (lambda: block_reviews(cleaned, tokenizer)), len(cleaned), None
+
+    import torch
+    from summarization import DEFAULT_PROFILE, chunk_and_summarize
+
+    chunks = block_reviews(cleaned, tokenizer)
+    recorder = _LatencyRecorder()
+
+    def summarize():
+        return chunk_and_summarize(
+            list(chunks), model, tokenizer, torch.device("cpu"), batch_size=batch_size,
+            profile=profile or DEFAULT_PROFILE, stats=recorder
+        )
+
+    def extra():
+        return {
+            "chunks": len(chunks),
+            "summary_latency_p50_s": round(_percentile(recorder.latencies, 0.5), 4),
+            "summary_latency_p95_s": round(_percentile(recorder.latencies, 0.95), 4),
+        }
+
+    return summarize, len(cleaned), extra
+
+
+def run_stage(stage, kind, size, repeat, model_dir, tiny, profile, batch_size):
+    """Worker side: one stage at one size, in a fresh process"""
+    data = scrape_fixture(size, kind=kind, seed=size)
+    fn, items, extra = _stage_call(stage, data, model_dir, tiny, profile, batch_size)
+    rss_before = _peak_rss_mb()
+    fn()  # warm-up: lazy model / detector profile loading is not part of the stage
+    _, timings = time_call(fn, repeat=repeat)
+    p50 = statistics.median(timings)
+    result = {
+        "stage": stage,
+        "fixture": kind,
+        "reviews": size,
+        "items": items,
+        "repeat": repeat,
+        "latency_p50_s": round(p50, 4),
+        "latency_p95_s": round(_percentile(timings, 0.95), 4),
+        "items_per_s": round(items / p50, 1) if p50 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "setup_rss_mb": rss_before,
+    }
+    if extra is not None:
+        result.update(extra())
+        result["chunks_per_s"] = round(result["chunks"] / p50, 2) if p50 else None
+    return result
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=REPO_ROOT
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results, baseline, tolerance):
+    """Rows whose p50 latency grew by more than tolerance (a ratio) against the baseline run"""
+    before = {(r["stage"], r["fixture"], r["reviews"]): r for r in baseline["runs"]}
+    regressions = []
+    for run in results["runs"]:
+        old = before.get((run["stage"], run["fixture"], run["reviews"]))
+        if not old or not old["latency_p50_s"]:
+            continue
+        ratio = run["latency_p50_s"] / old["latency_p50_s"]
+        run["p50_vs_baseline"] = round(ratio, 3)
+        if ratio > tolerance:
+            regressions.append({
+                "stage": run["stage"], "fixture": run["fixture"], "reviews": run["reviews"],
+                "baseline_p50_s": old["latency_p50_s"], "p50_s": run["latency_p50_s"], "ratio": round(ratio, 3),
+            })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", default=str(DEFAULT_MODEL_DIR))
+    parser.add_argument("--tiny", action="store_true", help="use a tiny random BART built from the config")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--stages", default=",".join(STAGE_NAMES))
+    parser.add_argument("--fixtures", default="synthetic,recorded")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per stage (after one warm-up)")
+    parser.add_argument("--summarize-repeat", type=int, default=1, help="timed runs of chunk_and_summarize")
+    parser.add_argument("--profile", help="decoding profile for chunk_and_summarize (default: summarization.DEFAULT_PROFILE)")
+    parser.add_argument("--batch-size", type=int, default=4)
+    parser.add_argument("--output", help="default: benchmarks/results/pipeline_<commit>.json")
+    parser.add_argument("--compare", help="earlier results file to compare p50 latencies against")
+    parser.add_argument("--tolerance", type=float, default=1.2, help="p50 ratio counted as a regression")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        stage, kind, size = args.worker.split(":")
+        repeat = args.summarize_repeat if stage == "chunk_and_summarize" else args.repeat
+        print(json.dumps(run_stage(stage, kind, int(size), repeat, args.model_dir, args.tiny, args.profile, args.batch_size)))
+        return 0
+
+    commit = _commit()
+    results = {
+        "commit": commit,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "model": "tiny-random" if args.tiny else Path(args.model_dir).name,
+        "profile": args.profile or "default",
+        "batch_size": args.batch_size,
+        "runs": [],
+    }
+    for kind in [k for k in args.fixtures.split(",") if k.strip()]:
+        for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+            for stage in [s for s in args.stages.split(",") if s.strip()]:
+                if stage not in STAGE_NAMES:
+                    parser.error(f"unknown stage {stage!r}")
+                command = [
+                    sys.executable, str(Path(__file__).resolve()), "--worker", f"{stage}:{kind}:{size}",
+                    "--model-dir", args.model_dir, "--repeat", str(args.repeat),
+                    "--summarize-repeat", str(args.summarize_repeat), "--batch-size", str(args.batch_size),
+                ] + (["--tiny"] if args.tiny else []) + (["--profile", args.profile] if args.profile else [])
+                output = subprocess.run(command, capture_output=True, text=True, check=True, cwd=REPO_ROOT).stdout
+                run = json.loads(output.strip().splitlines()[-1])
+                print(f"{kind:>9} {size:>6} {stage:<20} p50 {run['latency_p50_s']:.4f}s  "
+                      f"{run['items_per_s']} items/s  peak {run['peak_rss_mb']} MB", file=sys.stderr)
+                results["runs"].append(run)
+
+    exit_code = 0
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        results["baseline_commit"] = baseline.get("commit")
+        results["regressions"] = compare(results, baseline, args.tolerance)
+        exit_code = 1 if results["regressions"] else 0
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"pipeline_{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {output}", file=sys.stderr)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""Peak memory and time of cleaning a large review archive: preprocess_reviews over scrape_review
+dicts (the archive loaded as JSON-shaped dicts, results kept) against review_corpus.clean_corpus
+over a Parquet / Arrow corpus file.
+
+Every variant runs in its own process, so peak RSS is its own. The corpus variants pay a fixed
+~100 MB for pyarrow and then stay roughly flat, where the dicts grow with the archive. For .arrow
+files, RSS also counts the pages of the memory-mapped file that were read (shared and reclaimable).
+
+    python benchmarks/bench_review_corpus.py --reviews 200000 --per-product 150
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import REPO_ROOT, scrape_fixture
+
+VARIANTS = ("dicts", "parquet", "arrow")
+
+
+def _scrapes(reviews, per_product):
+    for i in range(0, reviews, per_product):
+        yield dict(scrape_fixture(min(per_product, reviews - i), kind="synthetic", seed=i), search_query=f"product {i // per_product}")
+
+
+def run_variant(variant, reviews, per_product, workdir):
+    """Worker side: clean the archive one way, return timings and peak RSS"""
+    from prediction_reviews_cleaning import preprocess_reviews
+    from review_corpus import clean_corpus, write_scrapes
+
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    started = time.perf_counter()
+    if variant == "dicts":
+        archive = list(_scrapes(reviews, per_product))
+        cleaned = [preprocess_reviews(data) for data in archive]
+        kept = sum(data["total_final_review_count"] for data in cleaned)
+        size = None
+    else:
+        source, destination = Path(workdir) / f"scraped.{variant}", Path(workdir) / f"cleaned.{variant}"
+        write_scrapes(source, _scrapes(reviews, per_product))
+        kept = clean_corpus(source, destination)["reviews_out"]
+        size = source.stat().st_size + destination.stat().st_size
+    return {
+        "variant": variant,
+        "reviews": reviews,
+        "kept": kept,
+        "seconds": round(time.perf_counter() - started, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "setup_rss_mb": round(rss_before, 1),
+        "file_mb": round(size / 1024 / 1024, 1) if size is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reviews", type=int, default=100000)
+    parser.add_argument("--per-product", type=int, default=150)
+    parser.add_argument("--variants", default=",".join(VARIANTS))
+    parser.add_argument("--worker", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_variant(args.worker, args.reviews, args.per_product, args.workdir)))
+        return 0
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for variant in [v for v in args.variants.split(",") if v.strip()]:
+            command = [
+                sys.executable, str(Path(__file__).resolve()), "--worker", variant, "--workdir", workdir,
+                "--reviews", str(args.reviews), "--per-product", str(args.per_product),
+            ]
+            output = subprocess.run(command, capture_output=True, text=True, check=True, cwd=REPO_ROOT).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+            print(f"{variant:>8} {results[-1]['seconds']}s peak {results[-1]['peak_rss_mb']} MB", file=sys.stderr)
+    print(json.dumps(results, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
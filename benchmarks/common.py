@@ -0,0 +1,158 @@
+"""Shared helpers for the benchmark scripts (run them from the repo root)."""
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+DEFAULT_MODEL_DIR = REPO_ROOT / "Tuned_model_files"
+WEIGHT_FILES = ("model.safetensors", "pytorch_model.bin")
+
+_OPENERS = [
+    "Bought this last week", "Using it for a month now", "Got it in the sale",
+    "Gifted this to my father", "Second purchase from this brand", "Received the product today",
+]
+_ASPECTS = [
+    "battery backup", "camera quality", "display", "sound", "build quality", "delivery",
+    "packaging", "performance", "charging speed", "price", "heating", "customer support",
+]
+_OPINIONS = [
+    "is really good", "is decent for the price", "could have been better", "is excellent",
+    "is average", "is disappointing", "exceeded my expectations", "is just okay",
+]
+_CLOSERS = [
+    "Value for money.", "Would recommend to others.", "Not happy with the purchase.",
+    "Overall satisfied.", "Go for it without a second thought.", "Think twice before buying.",
+]
+
+
+def synthetic_reviews(n, seed=0, min_sentences=2, max_sentences=8):
+    """Return n English review strings built from a fixed phrase bank"""
+    rng = random.Random(seed)
+    reviews = []
+    for _ in range(n):
+        parts = [rng.choice(_OPENERS) + "."]
+        for _ in range(rng.randint(min_sentences, max_sentences)):
+            parts.append(f"The {rng.choice(_ASPECTS)} {rng.choice(_OPINIONS)}.")
+        parts.append(rng.choice(_CLOSERS))
+        reviews.append(" ".join(parts).lower())
+    return reviews
+
+
+_NON_ENGLISH = [
+    "बहुत अच्छा फोन है, कैमरा भी बढ़िया है और बैटरी पूरे दिन चलती है",
+    "product bahut accha hai, paisa vasool, delivery bhi time pe hui",
+    "mast phone hai bhai, camera ekdum jhakas, battery thodi kam chalti hai",
+    "très bon produit, la batterie tient toute la journée et l'écran est superbe",
+    "muy buen producto, la cámara es excelente y la batería dura mucho",
+    "நல்ல தயாரிப்பு, பேட்டரி நன்றாக உள்ளது",
+]
+_SHORT = ["ok", "nice", "👍👍👍", "", "good", "superb!!", "5 star"]
+
+
+def mixed_language_reviews(n, seed=0, english_share=0.8, short_share=0.05):
+    """Fixture corpus for the language filter: mostly English reviews plus Hindi, Hinglish, French,
+    Spanish, Tamil and very short / emoji-only texts"""
+    rng = random.Random(seed)
+    english = synthetic_reviews(n, seed=seed)
+    reviews = []
+    for i in range(n):
+        roll = rng.random()
+        if roll < short_share:
+            reviews.append(rng.choice(_SHORT))
+        elif roll < short_share + (1 - english_share):
+            reviews.append(rng.choice(_NON_ENGLISH) + f" {i}")
+        else:
+            reviews.append(english[i])
+    return reviews
+
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+def recorded_reviews():
+    """Reviews parsed from the saved Flipkart review pages in fixtures/flipkart"""
+    from scrapping_http import parse_review_page
+
+    reviews = []
+    for path in sorted((FIXTURES_DIR / "flipkart").glob("reviews_page_*.html")):
+        reviews.extend(parse_review_page(path.read_text(encoding="utf-8"))["reviews"])
+    return reviews
+
+
+def scrape_fixture(n, kind="synthetic", seed=0):
+    """scrape_review output with n reviews.
+
+    "synthetic" reviews come from mixed_language_reviews (mostly English, some Hindi / Hinglish /
+    other languages and very short texts); "recorded" cycles the reviews of the saved review pages,
+    each copy numbered up front so repeats are not identical texts.
+    """
+    rng = random.Random(seed)
+    if kind == "synthetic":
+        reviews = [
+            {"User_Rating": str(rng.randint(1, 5)), "Title": "Review", "Comment": text}
+            for text in mixed_language_reviews(n, seed=seed)
+        ]
+    elif kind == "recorded":
+        recorded = recorded_reviews()
+        reviews = [
+            {**recorded[i % len(recorded)], "Comment": f"#{i // len(recorded)} {recorded[i % len(recorded)]['Comment']}"}
+            for i in range(n)
+        ]
+    else:
+        raise ValueError(f"Unknown fixture kind: {kind!r}")
+    return {
+        "search_query": f"{kind} fixture",
+        "total_reviews": len(reviews),
+        "Overall_rating": "4.2",
+        "Total_ratings": f"{n * 12:,} Ratings &",
+        "reviews": reviews,
+    }
+
+
+def load_benchmark_model(model_dir=DEFAULT_MODEL_DIR, tiny=False):
+    """Load the tuned model, or a tiny randomly initialised BART from its config when asked
+    (or when the weights are not checked out)"""
+    from transformers import BartConfig, BartForConditionalGeneration, BartTokenizerFast
+
+    model_dir = Path(model_dir)
+    tokenizer = BartTokenizerFast.from_pretrained(model_dir)
+    has_weights = any((model_dir / name).exists() for name in WEIGHT_FILES)
+
+    if tiny or not has_weights:
+        config = BartConfig.from_pretrained(model_dir)
+        config.d_model = 64
+        config.encoder_layers = config.decoder_layers = 2
+        config.encoder_attention_heads = config.decoder_attention_heads = 2
+        config.encoder_ffn_dim = config.decoder_ffn_dim = 128
+        model = BartForConditionalGeneration(config)
+        label = "tiny-random"
+    else:
+        model = BartForConditionalGeneration.from_pretrained(model_dir)
+        label = model_dir.name
+
+    model.eval()
+    return model, tokenizer, label
+
+
+def time_call(fn, repeat=3):
+    """Call fn repeat times and return (last result, list of wall-clock seconds)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def summarize_timings(timings):
+    return {
+        "min_s": round(min(timings), 4),
+        "median_s": round(statistics.median(timings), 4),
+        "max_s": round(max(timings), 4),
+    }
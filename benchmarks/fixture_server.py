@@ -0,0 +1,76 @@
+"""Local stand-in for flipkart.com that serves the saved HTML pages in fixtures/flipkart/.
+
+    python benchmarks/fixture_server.py --port 8765
+    # then: scrape_review("acme phone", backend="http", base_url="http://127.0.0.1:8765")
+
+Routes: /search?q=...          -> search.html
+        /<slug>/p/<id>          -> product.html
+        /<slug>/product-reviews/<id>?page=N -> reviews_page_N.html (404 past the last page)
+"""
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "flipkart"
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    latency = 0.0  # seconds added to every response, to mimic network round trips
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/search":
+            name = "search.html"
+        elif "/product-reviews/" in url.path:
+            page = parse_qs(url.query).get("page", ["1"])[0]
+            name = f"reviews_page_{page}.html"
+        elif "/p/" in url.path:
+            name = "product.html"
+        elif url.path == "/":
+            name = "search.html"
+        else:
+            name = None
+
+        path = FIXTURE_DIR / name if name else None
+        if path is None or not path.exists():
+            self.send_error(404)
+            return
+
+        if self.latency:
+            threading.Event().wait(self.latency)
+        body = path.read_bytes()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(port=0, latency=0.0):
+    """Start the fixture server in a daemon thread; returns (server, base_url)"""
+    handler = type("Handler", (FixtureHandler,), {"latency": latency})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds of artificial delay per response")
+    args = parser.parse_args()
+    server, base_url = serve_fixtures(args.port, args.latency)
+    print(f"Serving {FIXTURE_DIR} at {base_url} (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
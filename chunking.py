@@ -0,0 +1,116 @@
+import tracing
+from summarization import MAX_INPUT_TOKENS, chunk_input_ids, split_oversized, tokenize_reviews
+
+# Greedy packing budget used before the bin-packing chunker (kept for comparisons)
+GREEDY_MAX_TOKENS = 900
+
+
+def chunk_token_budget(tokenizer, max_input_tokens=MAX_INPUT_TOKENS):
+    """Tokens available for review text in one model input: the context limit minus <s> and </s>"""
+    special = len(chunk_input_ids([], tokenizer))
+    return max_input_tokens - special
+
+
+def _make_chunk(items, tokenizer, budget):
+    # items: (arrival index, text, ids); keep the reviews of a chunk in arrival order
+    items = sorted(items, key=lambda item: item[0])
+    token_count = sum(len(ids) for _, _, ids in items)
+    tracing.observe("chunk_tokens", token_count, buckets=tracing.TOKEN_BUCKETS)
+    return {
+        "text": " ".join(text for _, text, _ in items),
+        "input_ids": chunk_input_ids([ids for _, _, ids in items], tokenizer),
+        "review_count": len(items),
+        "token_count": token_count,
+        "fill_ratio": round(token_count / budget, 4),
+    }
+
+
+def _greedy_bins(items, max_tokens):
+    bins, current, used = [], [], 0
+    for item in items:
+        size = len(item[2])
+        if current and used + size > max_tokens:
+            bins.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += size
+    if current:
+        bins.append(current)
+    return bins
+
+
+def _first_fit_decreasing_bins(items, budget):
+    bins, free = [], []
+    for item in sorted(items, key=lambda item: len(item[2]), reverse=True):
+        size = len(item[2])
+        for b, space in enumerate(free):
+            if size <= space:
+                bins[b].append(item)
+                free[b] -= size
+                break
+        else:
+            bins.append([item])
+            free.append(budget - size)
+    return bins
+
+
+def block_reviews(reviews, tokenizer, max_tokens=None, strategy="ffd"):
+    """Chunk reviews into model inputs.
+
+    Reviews are tokenized once in a single batched call. With the default "ffd" strategy they are
+    bin-packed first-fit-decreasing against the model's context limit (minus special tokens), which
+    minimises the number of chunks (= generate calls); reviews longer than the budget are split at
+    sentence boundaries, so nothing is truncated. "greedy" keeps the old arrival-order packing.
+
+    Each chunk is a dict with "text", "input_ids" (ready for generation), "review_count",
+    "token_count" and "fill_ratio" (token_count / context budget).
+    """
+    budget = chunk_token_budget(tokenizer)
+    if max_tokens is None:
+        max_tokens = budget if strategy == "ffd" else GREEDY_MAX_TOKENS
+    max_tokens = min(max_tokens, budget)
+
+    items = []
+    for review, review_ids in zip(reviews, tokenize_reviews(reviews, tokenizer)):
+        if len(review_ids) > max_tokens:
+            for text, ids in split_oversized(review, review_ids, tokenizer, max_tokens):
+                items.append((len(items), text, ids))
+        else:
+            items.append((len(items), review, review_ids))
+
+    if strategy == "ffd":
+        bins = _first_fit_decreasing_bins(items, max_tokens)
+    elif strategy == "greedy":
+        bins = _greedy_bins(items, max_tokens)
+    else:
+        raise ValueError(f"Unknown chunking strategy: {strategy!r}")
+
+    return [_make_chunk(chunk_items, tokenizer, budget) for chunk_items in bins]
+
+
+def iter_blocks(review_batches, tokenizer, max_tokens=None):
+    """Streaming block_reviews: review_batches is an iterable of lists of review texts (e.g. one
+    list per scraped page) and every chunk is yielded as soon as it is full.
+
+    Chunks are packed greedily in arrival order, since first-fit-decreasing needs every review up
+    front; this can cost a chunk or two more than block_reviews on the same reviews.
+    """
+    budget = chunk_token_budget(tokenizer)
+    max_tokens = min(max_tokens or budget, budget)
+
+    current, used, arrived = [], 0, 0
+    for reviews in review_batches:
+        for review, review_ids in zip(reviews, tokenize_reviews(reviews, tokenizer)):
+            if len(review_ids) > max_tokens:
+                pieces = split_oversized(review, review_ids, tokenizer, max_tokens)
+            else:
+                pieces = [(review, review_ids)]
+            for text, ids in pieces:
+                if current and used + len(ids) > max_tokens:
+                    yield _make_chunk(current, tokenizer, budget)
+                    current, used = [], 0
+                current.append((arrived, text, ids))
+                used += len(ids)
+                arrived += 1
+    if current:
+        yield _make_chunk(current, tokenizer, budget)
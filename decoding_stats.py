@@ -0,0 +1,98 @@
+import sqlite3
+import statistics
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+
+DEFAULT_STATS_PATH = Path(__file__).resolve().parent / ".cache" / "decoding_stats.sqlite3"
+DEFAULT_MAX_ROWS = 200_000
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class DecodingStats:
+    """Latency and output length of every generated summary, per decoding profile and stage (SQLite).
+
+    Only summaries that were actually generated are recorded, cache hits are not. The latency of a
+    summary is its generate batch's wall time divided by the batch size. The oldest rows are dropped
+    beyond max_rows.
+    """
+
+    def __init__(self, path=DEFAULT_STATS_PATH, max_rows=DEFAULT_MAX_ROWS):
+        self.path = Path(path)
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS generations ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " created_at REAL NOT NULL,"
+                " profile TEXT NOT NULL,"
+                " stage TEXT NOT NULL,"
+                " batch_size INTEGER NOT NULL,"
+                " seconds REAL NOT NULL,"
+                " output_words INTEGER NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, profile, stage, summaries, seconds):
+        """Record one generate call that produced summaries in seconds"""
+        now = time.time()
+        per_summary = seconds / len(summaries)
+        rows = [(now, profile, stage, len(summaries), per_summary, len(summary.split())) for summary in summaries]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO generations (created_at, profile, stage, batch_size, seconds, output_words)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute(
+                "DELETE FROM generations WHERE id <= (SELECT MAX(id) FROM generations) - ?", (self.max_rows,)
+            )
+
+    def recorder(self, profile, stage):
+        """on_generated callback for summarization.cached_generate_summaries"""
+        return partial(self.record, profile, stage)
+
+    def stats(self, since=None):
+        """{profile: {stage: {...}}} with counts, latency per summary and output length in words"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT profile, stage, seconds, output_words FROM generations WHERE created_at >= ?",
+                (since or 0,),
+            ).fetchall()
+
+        groups = {}
+        for profile, stage, seconds, words in rows:
+            group = groups.setdefault(profile, {}).setdefault(stage, ([], []))
+            group[0].append(seconds)
+            group[1].append(words)
+
+        return {
+            profile: {
+                stage: {
+                    "summaries": len(latencies),
+                    "latency_avg_s": round(statistics.fmean(latencies), 3),
+                    "latency_p50_s": round(_percentile(latencies, 0.5), 3),
+                    "latency_p95_s": round(_percentile(latencies, 0.95), 3),
+                    "words_avg": round(statistics.fmean(words), 1),
+                    "words_p95": _percentile(words, 0.95),
+                }
+                for stage, (latencies, words) in stages.items()
+            }
+            for profile, stages in groups.items()
+        }
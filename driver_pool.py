@@ -0,0 +1,218 @@
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import tracing
+
+
+class DriverPoolClosed(RuntimeError):
+    pass
+
+
+class DriverPool:
+    """A fixed-size pool of warm WebDriver sessions.
+
+    create() builds a new driver, warm(driver) brings it to the ready state (called after creation and
+    again after every lease), healthy(driver) is checked before a driver is handed out. Drivers are
+    recycled (quit and replaced) after max_uses leases, when the lease body raises, or when the health
+    check fails. Creation and re-warming run on background threads so leases do not pay for them.
+    """
+
+    def __init__(self, create, warm=None, healthy=None, size=2, max_uses=20, lease_timeout=120):
+        self.create = create
+        self.warm = warm or (lambda driver: None)
+        self.healthy = healthy or (lambda driver: True)
+        self.size = size
+        self.max_uses = max_uses
+        self.lease_timeout = lease_timeout
+
+        self._idle = queue.Queue()
+        self._uses = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._workers = ThreadPoolExecutor(max_workers=size, thread_name_prefix="driver-pool")
+
+        self.leased = 0
+        self.starting = 0
+        self.total_leases = 0
+        self.lease_wait_total = 0.0
+        self.lease_wait_max = 0.0
+        self.recycles = Counter()
+        self.start_failures = 0
+
+        for _ in range(size):
+            self._spawn()
+
+    # -------- background work -------- #
+    def _submit(self, fn, *args):
+        try:
+            self._workers.submit(fn, *args)
+            return True
+        except RuntimeError:  # executor already shut down
+            return False
+
+    def _spawn(self):
+        with self._lock:
+            if self._closed:
+                return
+            self.starting += 1
+        if not self._submit(self._start_driver):
+            with self._lock:
+                self.starting -= 1
+
+    def _start_driver(self):
+        driver = None
+        try:
+            with tracing.span("driver.start"):
+                driver = self.create()
+            with tracing.span("driver.warm"):
+                self.warm(driver)
+        except Exception as e:
+            print(f"❌ Could not start a pooled driver: {e}")
+            self._quit(driver)
+            driver = None
+        with self._lock:
+            self.starting -= 1
+            if driver is None:
+                self.start_failures += 1
+                return
+            if self._closed:
+                closed = True
+            else:
+                closed = False
+                self._uses[id(driver)] = 0
+        if closed:
+            self._quit(driver)
+        else:
+            self._idle.put(driver)
+
+    def _rewarm(self, driver):
+        try:
+            with tracing.span("driver.warm"):
+                self.warm(driver)
+        except Exception as e:
+            print(f"❌ Re-warming a pooled driver failed: {e}")
+            self._recycle(driver, "warm_error")
+            return
+        if self._closed:
+            self._retire(driver)
+        else:
+            self._idle.put(driver)
+
+    # -------- driver lifecycle -------- #
+    @staticmethod
+    def _quit(driver):
+        if driver is None:
+            return
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def _retire(self, driver):
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        self._quit(driver)
+
+    def _recycle(self, driver, reason):
+        with self._lock:
+            self.recycles[reason] += 1
+        tracing.count("driver_recycles_total", reason=reason)
+        self._retire(driver)
+        self._spawn()
+
+    def _release(self, driver, uses):
+        """A lease ended normally: re-warm the driver for the next one"""
+        with self._lock:
+            self.leased -= 1
+        if self._closed:
+            self._retire(driver)
+        elif uses >= self.max_uses:
+            self._recycle(driver, "max_uses")
+        elif not self._submit(self._rewarm, driver):
+            self._retire(driver)
+
+    # -------- public API -------- #
+    @contextmanager
+    def lease(self, timeout=None):
+        """Borrow a warm driver for the duration of the with-block"""
+        if self._closed:
+            raise DriverPoolClosed("driver pool is shut down")
+        timeout = self.lease_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"No pooled driver became available within {timeout}s")
+            with self._lock:
+                if self._closed:
+                    raise DriverPoolClosed("driver pool is shut down")
+                # Replace drivers that failed to start so leases cannot wait forever
+                missing = self.size - len(self._uses) - self.starting
+            for _ in range(max(0, missing)):
+                self._spawn()
+            try:
+                driver = self._idle.get(timeout=min(remaining, 1.0))
+            except queue.Empty:
+                continue
+            if self.healthy(driver):
+                break
+            self._recycle(driver, "unhealthy")
+
+        waited = time.monotonic() - started
+        with self._lock:
+            self.leased += 1
+            self.total_leases += 1
+            self.lease_wait_total += waited
+            self.lease_wait_max = max(self.lease_wait_max, waited)
+            self._uses[id(driver)] = self._uses.get(id(driver), 0) + 1
+            uses = self._uses[id(driver)]
+        tracing.observe("driver_lease_wait_seconds", waited)
+
+        try:
+            yield driver
+        except GeneratorExit:
+            # A generator holding the lease was closed early (e.g. paging stopped at a known
+            # review): the driver is fine, hand it back as usual
+            self._release(driver, uses)
+            raise
+        except BaseException:
+            with self._lock:
+                self.leased -= 1
+            self._recycle(driver, "error")
+            raise
+        self._release(driver, uses)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "idle": self._idle.qsize(),
+                "leased": self.leased,
+                "starting": self.starting,
+                "total_leases": self.total_leases,
+                "lease_wait_avg_s": round(self.lease_wait_total / self.total_leases, 3) if self.total_leases else 0.0,
+                "lease_wait_max_s": round(self.lease_wait_max, 3),
+                "recycles": dict(self.recycles),
+                "start_failures": self.start_failures,
+            }
+
+    def shutdown(self):
+        """Stop handing out drivers, wait for background starts/re-warms and quit every idle driver.
+        Drivers still leased are quit when their lease ends."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._workers.shutdown(wait=True)
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._retire(driver)
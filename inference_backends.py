@@ -0,0 +1,178 @@
+"""CPU inference backends for the summarizer.
+
+    torch  the fine-tuned fp32 BartForConditionalGeneration (default)
+    int8   the same model with every nn.Linear dynamically quantized to int8
+    onnx   ONNX Runtime export of the encoder / decoder with KV-cache (needs optimum[onnxruntime])
+
+Convert once, then pick the backend when loading (summarization.load_model(model_dir, backend=...)):
+
+    python inference_backends.py convert --backend int8 --model-dir Tuned_model_files
+    python inference_backends.py convert --backend onnx --model-dir Tuned_model_files
+
+Converted models are written to <model_dir>/int8 and <model_dir>/onnx. If a backend cannot be
+loaded (missing conversion or package) the fp32 model is used instead.
+"""
+import argparse
+import shutil
+from pathlib import Path
+
+# torch is imported where it is used, so importing BACKENDS stays cheap
+from summarization import MODEL_DIR
+
+BACKENDS = ("torch", "int8", "onnx")
+INT8_WEIGHTS = "model_int8.safetensors"
+
+# Tokenizer and config files copied next to converted weights
+_SIDECAR_FILES = (
+    "config.json", "generation_config.json", "merges.txt", "special_tokens_map.json",
+    "tokenizer.json", "tokenizer_config.json", "vocab.json",
+)
+
+
+def converted_dir(model_dir, backend):
+    return Path(model_dir) / backend
+
+
+def _copy_sidecar_files(model_dir, output_dir):
+    for name in _SIDECAR_FILES:
+        if (Path(model_dir) / name).exists():
+            shutil.copy2(Path(model_dir) / name, output_dir / name)
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of the Linear layers (weights int8, activations quantized per batch)"""
+    import torch
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def _quantized_linears(model):
+    import torch
+    return [
+        (name, module) for name, module in model.named_modules()
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear)
+    ]
+
+
+def save_int8(model, path):
+    """Write a quantize_int8 model as plain tensors (int8 weights with their scale and zero point,
+    everything else unchanged) so it loads without pickle"""
+    import torch
+    from safetensors.torch import save_file
+
+    tensors = {}
+    for name, module in _quantized_linears(model):
+        weight, bias = module.weight(), module.bias()
+        tensors[f"{name}.weight_int8"] = weight.int_repr().contiguous()
+        tensors[f"{name}.weight_scale"] = torch.tensor(weight.q_scale(), dtype=torch.float64)
+        tensors[f"{name}.weight_zero_point"] = torch.tensor(weight.q_zero_point())
+        if bias is not None:
+            tensors[f"{name}.bias"] = bias.detach().contiguous()
+    for name, tensor in list(model.named_parameters()) + list(model.named_buffers()):
+        tensors[name] = tensor.detach().contiguous()
+    save_file(tensors, str(path))
+
+
+def load_int8(model, path):
+    """Fill a freshly quantized model with weights written by save_int8"""
+    import torch
+    from safetensors.torch import load_file
+
+    tensors = load_file(str(path))
+    for name, module in _quantized_linears(model):
+        weight = torch._make_per_tensor_quantized_tensor(
+            tensors.pop(f"{name}.weight_int8"),
+            tensors.pop(f"{name}.weight_scale").item(),
+            tensors.pop(f"{name}.weight_zero_point").item(),
+        )
+        module.set_weight_bias(weight, tensors.pop(f"{name}.bias", None))
+    # The rest are parameters and buffers; quantized modules reject a partial load_state_dict
+    targets = dict(model.named_parameters())
+    targets.update(model.named_buffers())
+    with torch.no_grad():
+        for name, tensor in tensors.items():
+            targets[name].copy_(tensor)
+    return model
+
+
+def convert(model_dir, backend, output_dir=None):
+    """One-time conversion of the fp32 model in model_dir; returns the output directory"""
+    output_dir = Path(output_dir or converted_dir(model_dir, backend))
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    if backend == "int8":
+        from transformers import BartForConditionalGeneration
+
+        model = BartForConditionalGeneration.from_pretrained(model_dir)
+        model.eval()
+        save_int8(quantize_int8(model), output_dir / INT8_WEIGHTS)
+    elif backend == "onnx":
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+        ORTModelForSeq2SeqLM.from_pretrained(model_dir, export=True, use_cache=True).save_pretrained(output_dir)
+    else:
+        raise ValueError(f"Nothing to convert for backend {backend!r} (expected int8 or onnx)")
+
+    _copy_sidecar_files(model_dir, output_dir)
+    print(f"✅ {backend} model written to {output_dir}")
+    return output_dir
+
+
+def _load_int8(model_dir):
+    from transformers import BartConfig, BartForConditionalGeneration
+
+    int8_dir = converted_dir(model_dir, "int8")
+    if (int8_dir / INT8_WEIGHTS).exists():
+        # Build the quantized module tree from the config and fill it in; the fp32 weights are never read
+        model = BartForConditionalGeneration(BartConfig.from_pretrained(model_dir))
+        model.eval()
+        model = load_int8(quantize_int8(model), int8_dir / INT8_WEIGHTS)
+    else:
+        print("⚠️ No converted int8 model, quantizing the fp32 weights at load time")
+        model = BartForConditionalGeneration.from_pretrained(model_dir)
+        model.eval()
+        model = quantize_int8(model)
+    return model
+
+
+def _load_onnx(model_dir):
+    from optimum.onnxruntime import ORTModelForSeq2SeqLM
+
+    onnx_dir = converted_dir(model_dir, "onnx")
+    if not onnx_dir.exists():
+        raise FileNotFoundError(f"No ONNX export in {onnx_dir}; run: python inference_backends.py convert --backend onnx")
+    return ORTModelForSeq2SeqLM.from_pretrained(onnx_dir, use_cache=True, provider="CPUExecutionProvider")
+
+
+def load_backend_model(model_dir, backend):
+    """(model, tokenizer, device) for a non-default backend; both run on CPU.
+
+    The model is tagged with inference_backend and source_model_dir so summary cache keys stay
+    apart from the fp32 model's. Raises if the backend cannot be loaded.
+    """
+    import torch
+    from transformers import BartTokenizerFast
+
+    loaders = {"int8": _load_int8, "onnx": _load_onnx}
+    if backend not in loaders:
+        raise ValueError(f"Unknown inference backend: {backend!r} (expected one of {BACKENDS})")
+    model = loaders[backend](model_dir)
+    model.inference_backend = backend
+    model.source_model_dir = str(model_dir)
+    return model, BartTokenizerFast.from_pretrained(model_dir), torch.device("cpu")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert_parser = commands.add_parser("convert", help="convert the fp32 model for a backend")
+    convert_parser.add_argument("--backend", choices=("int8", "onnx"), required=True)
+    convert_parser.add_argument("--model-dir", default=MODEL_DIR)
+    convert_parser.add_argument("--output-dir", help="default: <model-dir>/<backend>")
+    args = parser.parse_args(argv)
+
+    if args.command == "convert":
+        convert(args.model_dir, args.backend, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class Job:
+    """State of one background run; workers update it, readers take snapshot()s"""
+
+    def __init__(self, job_id, key, description=""):
+        self.id = job_id
+        self.key = key
+        self.description = description
+        self.status = QUEUED
+        self.stage = None
+        self.stage_progress = 0.0
+        self.progress = 0.0
+        self.message = "Waiting for a free worker..."
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.error_type = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.stage_seconds = {}
+        self._stage_started = None
+        self._lock = threading.Lock()
+
+    def update(self, stage=None, fraction=None, message=None, partial=None, progress=None):
+        with self._lock:
+            now = time.monotonic()
+            if stage is not None and stage != self.stage:
+                self._close_stage(now)
+                self.stage = stage
+                self._stage_started = now
+            if fraction is not None:
+                self.stage_progress = fraction
+            if progress is not None:
+                self.progress = progress
+            if message is not None:
+                self.message = message
+            if partial:
+                self.partial.update(partial)
+
+    def _close_stage(self, now):
+        if self.stage is not None and self._stage_started is not None:
+            self.stage_seconds[self.stage] = round(
+                self.stage_seconds.get(self.stage, 0.0) + now - self._stage_started, 3
+            )
+
+    def _finish(self, status, result=None, error=None, error_type=None):
+        with self._lock:
+            self._close_stage(time.monotonic())
+            self._stage_started = None
+            self.status = status
+            self.result = result
+            self.error = error
+            self.error_type = error_type
+            self.finished_at = time.time()
+            if status == DONE:
+                self.progress = 1.0
+
+    @property
+    def finished(self):
+        return self.status in (DONE, FAILED)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "id": self.id,
+                "key": self.key,
+                "description": self.description,
+                "status": self.status,
+                "stage": self.stage,
+                "stage_progress": self.stage_progress,
+                "progress": self.progress,
+                "message": self.message,
+                "partial": dict(self.partial),
+                "result": self.result,
+                "error": self.error,
+                "error_type": self.error_type,
+                "created_at": self.created_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+                "stage_seconds": dict(self.stage_seconds),
+            }
+
+
+class JobManager:
+    """Runs jobs on a bounded worker pool.
+
+    submit(key, fn, ...) returns a job id; while a job with the same key is queued or running, the
+    existing job id is returned instead of starting a second run. fn is called as fn(job, *args,
+    **kwargs) and reports progress through job.update(). Finished jobs stay readable for
+    keep_finished_seconds so reconnecting sessions can pick up their results.
+    """
+
+    def __init__(self, max_workers=2, keep_finished_seconds=3600):
+        self.max_workers = max_workers
+        self.keep_finished_seconds = keep_finished_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+        self.deduplicated = 0
+
+    def submit(self, key, fn, *args, description="", **kwargs):
+        with self._lock:
+            self._prune()
+            job_id = self._active.get(key)
+            if job_id is not None:
+                self.deduplicated += 1
+                return job_id
+            job = Job(uuid.uuid4().hex[:12], key, description)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        with job._lock:
+            job.status = RUNNING
+            job.started_at = time.time()
+        try:
+            result = fn(job, *args, **kwargs)
+        except Exception as e:
+            traceback.print_exc()
+            job._finish(FAILED, error=str(e) or e.__class__.__name__, error_type=e.__class__.__name__)
+        else:
+            job._finish(DONE, result=result)
+        finally:
+            with self._lock:
+                if self._active.get(job.key) == job.id:
+                    del self._active[job.key]
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_finished_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """Snapshot of a job, or None if the id is unknown (or expired)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        return job.snapshot() if job is not None else None
+
+    def find_active(self, key):
+        with self._lock:
+            return self._active.get(key)
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        for job in jobs:
+            counts[job.status] += 1
+        return {"workers": self.max_workers, "deduplicated": self.deduplicated, **counts}
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
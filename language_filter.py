@@ -0,0 +1,143 @@
+import hashlib
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+from langdetect.lang_detect_exception import LangDetectException
+
+import tracing
+
+# Common English function words; a high share of these settles a text as English without langdetect
+ENGLISH_STOPWORDS = frozenset("""
+a about after all also am an and any are as at be been but by can could did do does don't
+for from get got had has have he her him his how i i'm if in into is it it's its just like
+me more most my no not of on one only or our out so some than that the their them then there
+these they this to too up us very was we were what when which while who will with would you your
+""".split())
+
+WORD_RE = re.compile(r"[a-z']+")
+
+# Tier names reported by LanguageFilter.counts
+TIER_EMPTY = "prefilter_empty"
+TIER_SCRIPT = "prefilter_script"
+TIER_STOPWORDS = "prefilter_stopwords"
+TIER_DETECTOR = "detector"
+TIER_MEMO = "memo"
+
+
+class LanguageFilter:
+    """Decide whether review text is English, cheapest test first.
+
+    1. no letters at all -> rejected (langdetect would raise on these)
+    2. mostly non-Latin letters -> rejected (Devanagari, Tamil, ...)
+    3. enough words and a high English stopword rate -> accepted
+    4. everything else goes to a seeded langdetect detector, so results are reproducible
+
+    Decisions are memoised by text hash and counted per tier in self.counts.
+    """
+
+    def __init__(self, language="en", seed=0, min_latin_ratio=0.5, min_stopword_words=5,
+                 min_stopword_ratio=0.3, memo_size=100_000):
+        self.language = language
+        self.seed = seed
+        self.min_latin_ratio = min_latin_ratio
+        self.min_stopword_words = min_stopword_words
+        self.min_stopword_ratio = min_stopword_ratio
+        self.memo_size = memo_size
+        self.counts = Counter()
+        self._memo = OrderedDict()
+        self._factory = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes get the settings only; the detector profiles are reloaded lazily there
+        state = self.__dict__.copy()
+        state.update(counts=Counter(), _memo=OrderedDict(), _factory=None, _lock=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _detector_factory(self):
+        if self._factory is None:
+            with self._lock:
+                if self._factory is None:
+                    factory = DetectorFactory()
+                    factory.load_profile(PROFILES_DIRECTORY)
+                    factory.set_seed(self.seed)
+                    self._factory = factory
+        return self._factory
+
+    def classify(self, text):
+        """Return (is_target_language, tier) without touching the memo or counters"""
+        letters = [ch for ch in text if ch.isalpha()]
+        if not letters:
+            return False, TIER_EMPTY
+
+        latin = sum(1 for ch in letters if ch.isascii())
+        if latin / len(letters) < self.min_latin_ratio:
+            return False, TIER_SCRIPT
+
+        if self.language == "en":
+            words = WORD_RE.findall(text.lower())
+            if len(words) >= self.min_stopword_words:
+                hits = sum(1 for word in words if word in ENGLISH_STOPWORDS)
+                if hits / len(words) >= self.min_stopword_ratio:
+                    return True, TIER_STOPWORDS
+
+        started = time.perf_counter()
+        detector = self._detector_factory().create()
+        detector.append(text)
+        try:
+            return detector.detect() == self.language, TIER_DETECTOR
+        except LangDetectException:
+            return False, TIER_DETECTOR
+        finally:
+            tracing.observe("langdetect_seconds", time.perf_counter() - started)
+
+    def __call__(self, text):
+        if not text:
+            self.counts[TIER_EMPTY] += 1
+            tracing.count("language_decisions_total", tier=TIER_EMPTY)
+            return False
+
+        key = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        # One filter serves every job thread; the memo is only touched under the lock, the
+        # classification itself runs outside it
+        with self._lock:
+            decision = self._memo.get(key)
+            if decision is not None:
+                self._memo.move_to_end(key)
+                self.counts[TIER_MEMO] += 1
+        if decision is not None:
+            tracing.count("language_decisions_total", tier=TIER_MEMO)
+            return decision
+
+        decision, tier = self.classify(text)
+        tracing.count("language_decisions_total", tier=tier)
+        with self._lock:
+            self.counts[tier] += 1
+            self._memo[key] = decision
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return decision
+
+
+class LangdetectFilter:
+    """The original filter: unseeded langdetect.detect on every text (kept for comparisons)"""
+
+    def __init__(self, language="en"):
+        self.language = language
+        self.counts = Counter()
+
+    def __call__(self, text):
+        from langdetect import detect
+
+        self.counts[TIER_DETECTOR] += 1
+        try:
+            return detect(text) == self.language
+        except LangDetectException:
+            return False
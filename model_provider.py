@@ -0,0 +1,207 @@
+"""One summarization model per process, loaded in the background as soon as it is asked for.
+
+    provider = get_provider(backend="torch")   # starts loading on a background thread
+    ...                                        # UI / server start up meanwhile
+    model, tokenizer, device = provider.get()  # waits only if the load is not done yet
+    provider.status()                          # state, load / cold start seconds, RSS, batching
+
+Every caller in the process shares the same provider (and model) per model directory and backend.
+Once loaded, the model gets a batching_server.BatchingServer, so the generate calls of every job
+are batched together (unless batching is off, see get_provider).
+On CPU, fp32 safetensors weights are memory-mapped instead of copied into the process, so worker
+processes loading the same file share its pages (see load_model_mmap).
+"""
+import json
+import mmap
+import os
+import threading
+import time
+from pathlib import Path
+
+import tracing
+
+DEFAULT_MODEL_DIR = Path(__file__).resolve().parent / "Tuned_model_files"
+WEIGHTS_FILE = "model.safetensors"
+
+# Stand-in for the process start: this module is imported at startup by the app, CLI and API server
+_PROCESS_STARTED = time.monotonic()
+
+_SAFETENSORS_DTYPES = {
+    "F64": "float64", "F32": "float32", "F16": "float16", "BF16": "bfloat16",
+    "I64": "int64", "I32": "int32", "I16": "int16", "I8": "int8", "U8": "uint8", "BOOL": "bool",
+}
+
+
+def resolve_model_dir(model_dir=None):
+    """The model directory to load: model_dir, else $REVIEW_MODEL_DIR, else Tuned_model_files next
+    to this file. Relative paths are tried against the working directory and then this repo, and a
+    directory whose name only differs in case (./tuned_model_files vs Tuned_model_files) is accepted.
+    Raises FileNotFoundError listing what was tried."""
+    requested = Path(model_dir or os.environ.get("REVIEW_MODEL_DIR") or DEFAULT_MODEL_DIR)
+    candidates = [requested] if requested.is_absolute() else [Path.cwd() / requested, DEFAULT_MODEL_DIR.parent / requested]
+    for candidate in candidates:
+        if (candidate / "config.json").exists():
+            return candidate.resolve()
+        if candidate.parent.is_dir():
+            for sibling in candidate.parent.iterdir():
+                if sibling.name.lower() == candidate.name.lower() and (sibling / "config.json").exists():
+                    return sibling.resolve()
+    raise FileNotFoundError(f"No model directory (with a config.json) at {', '.join(str(c) for c in candidates)}")
+
+
+def mmap_safetensors(path):
+    """{name: tensor} backed by a private memory map of a .safetensors file: nothing is read until
+    used, and the pages are shared with every other process mapping the same file"""
+    import torch
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    header_size = int.from_bytes(mapped[:8], "little")
+    header = json.loads(mapped[8:8 + header_size])
+    base = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = getattr(torch, _SAFETENSORS_DTYPES[info["dtype"]])
+        start, end = info["data_offsets"]
+        count = (end - start) // torch.empty((), dtype=dtype).element_size()
+        if count == 0:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        tensors[name] = torch.frombuffer(mapped, dtype=dtype, count=count, offset=base + start).view(info["shape"])
+    return tensors
+
+
+def load_model_mmap(model_dir):
+    """BartForConditionalGeneration whose weights are views into the memory-mapped safetensors file.
+
+    The model is built on the meta device (no weight allocation), the mapped tensors are assigned
+    in place and tied weights are re-tied. Raises if anything is left unassigned."""
+    import torch
+    from transformers import BartConfig, BartForConditionalGeneration
+
+    config = BartConfig.from_pretrained(model_dir)
+    with torch.device("meta"):
+        model = BartForConditionalGeneration(config)
+    model.load_state_dict(mmap_safetensors(Path(model_dir) / WEIGHTS_FILE), strict=False, assign=True)
+    model.tie_weights()
+    model.name_or_path = str(model_dir)  # from_pretrained sets this; summary cache keys depend on it
+    left = [name for name, tensor in list(model.named_parameters()) + list(model.named_buffers()) if tensor.is_meta]
+    if left:
+        raise ValueError(f"{len(left)} tensors missing from {WEIGHTS_FILE}, e.g. {left[:3]}")
+    model.eval()
+    return model
+
+
+def memory_usage():
+    """Resident and shared (file-backed, e.g. mapped weights) memory of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            _, resident, shared = (int(value) for value in f.read().split()[:3])
+        page_mb = os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+        return {"rss_mb": round(resident * page_mb, 1), "shared_mb": round(shared * page_mb, 1)}
+    except (OSError, ValueError):
+        import resource
+        return {"rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1), "shared_mb": None}
+
+
+class ModelProvider:
+    """Loads (model, tokenizer, device) once, on a background thread, for everyone in the process"""
+
+    def __init__(self, model_dir=None, backend="torch", batching=None):
+        self.model_dir = model_dir
+        self.backend = backend
+        self.batching = batching
+        self.batching_server = None
+        self.state = "idle"
+        self.error = None
+        self.load_seconds = None
+        self.cold_start_seconds = None
+        self._result = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self):
+        """Start loading in the background (once); returns self"""
+        with self._lock:
+            if self.state != "idle":
+                return self
+            self.state = "loading"
+        threading.Thread(target=self._load, name=f"model-load-{self.backend}", daemon=True).start()
+        return self
+
+    def _load(self):
+        from summarization import load_model
+
+        started = time.monotonic()
+        try:
+            with tracing.span("model.provider_load", backend=self.backend):
+                self._result = load_model(resolve_model_dir(self.model_dir), backend=self.backend)
+            if self.batching is not None:
+                from batching_server import BatchingServer
+
+                self.batching_server = BatchingServer(*self._result, **self.batching).start()
+            self.state = "ready"
+        except Exception as e:
+            self.error = e
+            self.state = "failed"
+            print(f"❌ Could not load the model: {e}")
+        finally:
+            now = time.monotonic()
+            self.load_seconds = round(now - started, 3)
+            self.cold_start_seconds = round(now - _PROCESS_STARTED, 3)
+            self._done.set()
+
+    def ready(self):
+        return self.state == "ready"
+
+    def get(self, timeout=None):
+        """(model, tokenizer, device), waiting for the load if needed. Raises the load error, or
+        TimeoutError"""
+        self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Model still loading after {timeout}s")
+        if self.error is not None:
+            raise RuntimeError(f"Model failed to load: {self.error}") from self.error
+        return self._result
+
+    def status(self):
+        model = self._result[0] if self._result else None
+        return {
+            "state": self.state,
+            "backend": getattr(model, "inference_backend", "torch") if model is not None else self.backend,
+            "weights": getattr(model, "weights_source", None),
+            "device": str(self._result[2]) if self._result else None,
+            "load_seconds": self.load_seconds,
+            "cold_start_seconds": self.cold_start_seconds,
+            "error": str(self.error) if self.error else None,
+            "batching": self.batching_server.stats() if self.batching_server is not None else None,
+            **memory_usage(),
+        }
+
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(backend="torch", model_dir=None, start=True, batching=True):
+    """The process-wide ModelProvider for model_dir and backend, loading in the background.
+
+    batching is True (a BatchingServer with the default / environment settings, off when
+    REVIEW_DYNAMIC_BATCHING=0), a dict of BatchingServer options, or False. The first call for a
+    model directory and backend decides.
+    """
+    key = (str(resolve_model_dir(model_dir)), backend)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            if batching is True:
+                from batching_server import batching_enabled
+
+                batching = {} if batching_enabled() else None
+            elif not batching:
+                batching = None
+            provider = _providers[key] = ModelProvider(model_dir, backend, batching=batching)
+    return provider.start() if start else provider
@@ -0,0 +1,600 @@
+import contextvars
+import functools
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+import tracing
+from chunking import block_reviews, chunk_token_budget, iter_blocks
+from prediction_reviews_cleaning import IncrementalPreprocessor, preprocess_reviews
+from review_insights import ReviewInsights
+from review_selection import NearDuplicateFilter, select_reviews
+from review_store import store_key
+from run_checkpoint import checkpoint_run_id, checkpointed_pages
+from scrapping_http import MAX_REVIEWS, collect_review_pages, review_hash
+from scrapping_new import scrape_review, scrape_review_stream
+from summarization import (
+    DEFAULT_PROFILE, cache_revision, cached_generate_summaries, chunk_and_summarize, decoding_profile, map_chunks,
+    reduce_summaries, shuffle_like_chunks, tokenize_reviews
+)
+
+# Pipeline stages, in order, with the share of the overall progress bar each one gets
+STAGES = (
+    ("scrape", 0.3),
+    ("clean", 0.1),
+    ("select", 0.03),
+    ("chunk", 0.02),
+    ("summarize", 0.55),
+)
+
+# Stages of a streaming run: scraping, cleaning, chunking and the map step overlap in "stream"
+STREAMING_STAGES = (
+    ("stream", 0.85),
+    ("reduce", 0.15),
+)
+
+
+class PipelineError(Exception):
+    """A pipeline run that ended without a summary, with a message fit for the user"""
+
+
+def overall_progress(stage, fraction, stages=STAGES):
+    """Map progress within a stage to progress of the whole run"""
+    done = 0.0
+    for name, weight in stages:
+        if name == stage:
+            return done + weight * min(max(fraction, 0.0), 1.0)
+        done += weight
+    return done
+
+
+def product_info(cleaned_data):
+    """Product-level fields of preprocess_reviews output (everything except the reviews)"""
+    return {key: value for key, value in cleaned_data.items() if key != "cleaned_reviews"}
+
+
+def _scrape_variant(max_reviews):
+    # scrape cache entries made with a non-default review cap are kept apart
+    return "" if max_reviews == MAX_REVIEWS else f"max_reviews={max_reviews}"
+
+
+def _open_delta(review_store, query, model, generate_kwargs, force_refresh):
+    """Where an incremental run starts from (None without a review_store.ReviewStore): the reviews,
+    chunk summaries and final summary stored under this run's summary key. With force_refresh, or
+    nothing stored yet, every review is summarized and replaces what was stored."""
+    if review_store is None:
+        return None
+    key = store_key(cache_revision(model), generate_kwargs)
+    summaries = [] if force_refresh else review_store.chunk_summaries(query, key)
+    if not summaries:
+        return {"key": key, "known": set(), "summaries": [], "previous": None, "replace": True}
+    previous = review_store.final_summary(query, key)
+    return {
+        "key": key,
+        "known": review_store.known_reviews(query, key),
+        "summaries": summaries,
+        "previous": previous[0] if previous else None,
+        "replace": False,
+    }
+
+
+def _select_budget(tokenizer, select_max_chunks):
+    """Token budget of the pre-selection: select_max_chunks model inputs, None (no budget) without it"""
+    return select_max_chunks * chunk_token_budget(tokenizer) if select_max_chunks else None
+
+
+def _open_checkpoint(checkpoints, run_id, query, max_reviews, profile, preselect, delta, force_refresh, select_max_chunks):
+    """This run's claimed checkpoint state (run_checkpoint.RunCheckpoints.open), None without
+    checkpoints or while another run holds the same run ID. The run ID defaults to one of the query
+    and the pipeline settings; callers whose runs also differ in other ways (scrape backend, model)
+    pass their own. force_refresh drops an earlier attempt's work."""
+    if checkpoints is None:
+        return None
+    run_id = run_id or checkpoint_run_id(
+        query, max_reviews=max_reviews, profile=profile, preselect=preselect, incremental=delta is not None,
+        select_max_chunks=select_max_chunks,
+    )
+    checkpoint = checkpoints.open(run_id, query, restart=force_refresh)
+    if checkpoint is None:
+        print(f"⚠️ Run {run_id} of {query!r} is in progress elsewhere, running this one without a checkpoint")
+    return checkpoint
+
+
+def _checkpoint_info(checkpoint, summary_cache, **resumed):
+    """The "checkpoint" result field: what this attempt took over from earlier ones"""
+    return {
+        "run_id": checkpoint["run_id"],
+        "attempt": checkpoint["attempts"],
+        **resumed,
+        "resumed_summaries": summary_cache.resumed,
+    }
+
+
+def _without_known(scrapped_data, known):
+    # pre-scraped input cannot stop paging early, its stored reviews are just skipped
+    reviews = [review for review in scrapped_data.get("reviews", []) if review_hash(review) not in known]
+    return {**scrapped_data, "reviews": reviews, "total_reviews": len(reviews)}
+
+
+def _reduce_with_stored(delta, summaries, reduce):
+    """reduce(chunk summaries) over the stored and the new ones; when nothing is new, the stored
+    final summary is returned as is"""
+    if delta is None:
+        return reduce(summaries)
+    if not summaries and delta["previous"] is not None:
+        return delta["previous"]
+    return reduce(delta["summaries"] + summaries)
+
+
+def _save_delta(review_store, query, delta, reviews, summaries, final_summary, info):
+    """Store a finished incremental run; returns the run's "delta" result field"""
+    info["total_initial_review_count"] += len(delta["known"])
+    review_store.save_run(query, delta["key"], reviews, summaries, final_summary, info, replace=delta["replace"])
+    return {
+        "new_reviews": len(reviews),
+        "stored_reviews": len(delta["known"]),
+        "new_chunk_summaries": len(summaries),
+        "stored_chunk_summaries": len(delta["summaries"]),
+        "summary_reused": not summaries and delta["previous"] is not None,
+    }
+
+
+@tracing.traced("pipeline.run")
+def run_pipeline(query, model, tokenizer, device, scrape_fn=scrape_review, scrape_cache=None,
+                 summary_cache=None, force_refresh=False, batch_size=4, progress=None,
+                 scrapped_data=None, model_lock=None, profile=DEFAULT_PROFILE, decoding_stats=None,
+                 max_reviews=MAX_REVIEWS, preselect=True, review_store=None, checkpoints=None, run_id=None,
+                 select_max_chunks=None):
+    """scrape -> preprocess_reviews -> select_reviews -> block_reviews -> chunk_and_summarize for one product query.
+
+    progress(stage, fraction, message, partial=None) is called as the run advances; partial results
+    are {"product": ..., "insights": ...} after cleaning (review_insights, no model involved) and
+    {"chunk_summaries": [...]} after the map step.
+    Pass scrapped_data (scrape_review output) to skip scraping, and model_lock to serialize the
+    summarize step when several runs share one model. profile picks the decoding profile
+    (summarization.DECODING_PROFILES); decoding_stats records its latency and output lengths.
+    scrape_fn(query, max_reviews=max_reviews) is called to scrape. preselect=False skips the
+    near-duplicate removal of review_selection.select_reviews. With preselect and select_max_chunks,
+    only the most representative reviews that fill select_max_chunks model inputs are summarized
+    (ranked within the insights' rating strata); the default summarizes every review, and the
+    reviews dropped by the budget are counted in "selection" ("ranked_out").
+    With a review_store (review_store.ReviewStore) the run is incremental: the scrape cache is not
+    used, scrape_fn also gets known_reviews and returns only reviews newer than the stored ones,
+    and only those are summarized and merged with the stored chunk summaries ("delta" in the result).
+    With checkpoints (run_checkpoint.RunCheckpoints) the scraped and cleaned reviews and every chunk
+    summary are saved under run_id as the run goes, and a retry after a failure picks them up
+    instead of scraping and generating again ("checkpoint" in the result).
+    Raises PipelineError when there is nothing to summarize.
+    """
+    report = progress or (lambda stage, fraction, message, partial=None: None)
+    generate_kwargs = decoding_profile(profile)  # unknown profiles fail before anything is scraped
+    delta = _open_delta(review_store, query, model, generate_kwargs, force_refresh)
+    checkpoint = _open_checkpoint(
+        checkpoints, run_id, query, max_reviews, profile, preselect, delta, force_refresh, select_max_chunks
+    )
+    try:
+        resumed_scrape = None
+        if checkpoint is not None:
+            summary_cache = checkpoints.summary_cache(checkpoint["run_id"], summary_cache)
+            if scrapped_data is None:
+                resumed_scrape = checkpoints.artifact(checkpoint["run_id"], "scraped")
+
+        # Step 1: Scrape reviews
+        report("scrape", 0.0, "🔍 Scraping reviews...")
+        scrape_info = None
+        with tracing.span("pipeline.scrape", query=query, max_reviews=max_reviews) as span:
+            if resumed_scrape is not None:
+                print(f"♻️ Resuming {query!r} with the {resumed_scrape.get('total_reviews', 0)} reviews scraped before")
+                scrapped_data = resumed_scrape
+            elif delta is not None and scrapped_data is not None:
+                scrapped_data = _without_known(scrapped_data, delta["known"])
+            elif delta is not None:
+                scrapped_data = scrape_fn(query, max_reviews=max_reviews, known_reviews=delta["known"])
+            elif scrapped_data is None and scrape_cache is not None:
+                scrapped_data, scrape_info = scrape_cache.get_or_scrape(
+                    query, lambda q: scrape_fn(q, max_reviews=max_reviews),
+                    force_refresh=force_refresh, variant=_scrape_variant(max_reviews)
+                )
+            elif scrapped_data is None:
+                scrapped_data = scrape_fn(query, max_reviews=max_reviews)
+            span.set(reviews=(scrapped_data or {}).get("total_reviews", 0), cached=bool(scrape_info and scrape_info["cached"]))
+        if not scrapped_data:
+            raise PipelineError("Scraping failed. Check logs or try again.")
+        if checkpoint is not None and resumed_scrape is None:
+            checkpoints.save_artifact(checkpoint["run_id"], "scraped", scrapped_data)
+        report("scrape", 1.0, f"Scraped {scrapped_data.get('total_reviews', 0)} reviews", {"scrape_info": scrape_info})
+
+        # Step 2: Clean and preprocess
+        report("clean", 0.0, "🧹 Cleaning and preprocessing reviews...")
+        with tracing.span("pipeline.clean", reviews=scrapped_data.get("total_reviews", 0)) as span:
+            cleaned_data = checkpoints.artifact(checkpoint["run_id"], "cleaned") if resumed_scrape is not None else None
+            if cleaned_data is None:
+                cleaned_data = preprocess_reviews(scrapped_data)
+                if checkpoint is not None:
+                    checkpoints.save_artifact(checkpoint["run_id"], "cleaned", cleaned_data)
+            kept_reviews = [
+                review for review in cleaned_data["cleaned_reviews"]
+                if review.get("cleaned_comment", "").strip()  # Only non-empty reviews
+            ]
+            cleaned_reviews = [review["cleaned_comment"] for review in kept_reviews]
+            span.set(kept=len(cleaned_reviews))
+        tracing.count("reviews_kept_total", len(cleaned_reviews))
+        if not cleaned_reviews and not (delta and delta["summaries"]):
+            raise PipelineError("No valid reviews found after cleaning. Please try a different product.")
+        info = product_info(cleaned_data)
+        with tracing.span("pipeline.insights", reviews=len(kept_reviews)):
+            insights = ReviewInsights()
+            insights.add_scraped(scrapped_data.get("reviews", []))
+            insights.add_cleaned(kept_reviews)
+            insights_result = insights.result()
+        report("clean", 1.0, f"Kept {len(cleaned_reviews)} reviews", {"product": info, "insights": insights_result})
+
+        # Step 3: Drop near-duplicates, keep the most representative reviews within the token budget (if any)
+        selection = None
+        if preselect:
+            report("select", 0.0, "🧬 Removing duplicate reviews...")
+            with tracing.span("pipeline.select") as span:
+                cleaned_reviews, selection = select_reviews(
+                    cleaned_reviews, tokenizer, max_tokens=_select_budget(tokenizer, select_max_chunks),
+                    strata=insights.strata(),
+                )
+                span.set(**selection)
+            report(
+                "select", 1.0,
+                f"Removed {selection['reviews_in'] - selection['reviews_out']} reviews "
+                f"({selection['tokens_in'] - selection['tokens_out']} tokens)",
+                {"selection": selection}
+            )
+
+        # Step 4: Chunk
+        report("chunk", 0.0, "📦 Chunking reviews...")
+        with tracing.span("pipeline.chunk", reviews=len(cleaned_reviews)) as span:
+            chunks = block_reviews(cleaned_reviews, tokenizer)
+            span.set(chunks=len(chunks), tokens=sum(chunk["token_count"] for chunk in chunks))
+        report("chunk", 1.0, f"{len(chunks)} chunks")
+
+        # Step 5: Summarize
+        def on_summarize(message, fraction, partial=None):
+            report("summarize", fraction, message, partial)
+
+        report("summarize", 0.0, "🤖 Waiting for the model..." if model_lock is not None else "🤖 Generating AI summary...")
+        reduce_info = {"depth": 0, "levels": []}
+        with model_lock if model_lock is not None else nullcontext():
+            with tracing.span("pipeline.summarize", chunks=len(chunks), profile=profile) as span:
+                if delta is None:
+                    final_summary = chunk_and_summarize(
+                        chunks, model, tokenizer, device,
+                        batch_size=batch_size, cache=summary_cache, progress_callback=on_summarize,
+                        profile=profile, stats=decoding_stats, reduce_info=reduce_info
+                    )
+                else:
+                    summaries = map_chunks(
+                        chunks, model, tokenizer, device, batch_size=batch_size, cache=summary_cache,
+                        progress_callback=on_summarize, profile=profile, stats=decoding_stats
+                    )
+                    final_summary = _reduce_with_stored(delta, summaries, lambda all_summaries: reduce_summaries(
+                        all_summaries, model, tokenizer, device, cache=summary_cache,
+                        revision=cache_revision(model) if summary_cache is not None else "", progress_callback=on_summarize,
+                        profile=profile, stats=decoding_stats, batch_size=batch_size, reduce_info=reduce_info
+                    ))
+                span.set(reduce_depth=reduce_info["depth"])
+        delta_info = None
+        if delta is not None:
+            delta_info = _save_delta(review_store, query, delta, scrapped_data.get("reviews", []), summaries, final_summary, info)
+        checkpoint_info = None
+        if checkpoint is not None:
+            checkpoints.finish(checkpoint["run_id"])
+            checkpoint_info = _checkpoint_info(checkpoint, summary_cache, resumed_scrape=resumed_scrape is not None)
+
+        return {
+            **info,
+            "summary": final_summary,
+            "summary_length": len(final_summary.split()),
+            "chunks_processed": len(chunks),
+            "chunk_fill_ratios": [chunk["fill_ratio"] for chunk in chunks],
+            "scrape_info": scrape_info,
+            "selection": selection,
+            "insights": insights_result,
+            "decoding_profile": profile,
+            "reduce_depth": reduce_info["depth"],
+            "reduce_levels": reduce_info["levels"],
+            "delta": delta_info,
+            "checkpoint": checkpoint_info,
+        }
+    except BaseException:
+        if checkpoint is not None:
+            checkpoints.release(checkpoint["run_id"])  # a retry resumes it
+        raise
+
+
+_END = object()
+
+
+def _in_background(iterable, stop):
+    """Iterate iterable on a background thread. Returns a queue of (item, None) pairs that ends with
+    (_END, error); the thread stops early once stop is set."""
+    items = queue.Queue()
+
+    def produce():
+        error = None
+        try:
+            for item in iterable:
+                items.put((item, None))
+                if stop.is_set():
+                    break
+        except Exception as e:
+            error = e
+        finally:
+            close = getattr(iterable, "close", None)
+            if close is not None:
+                close()
+            items.put((_END, error))
+
+    # In a copy of the caller's context, so spans of the producer belong to the caller's trace
+    threading.Thread(target=contextvars.copy_context().run, args=(produce,), name="pipeline-stream", daemon=True).start()
+    return items
+
+
+def _ready_batches(items, batch_size):
+    """Batches from an _in_background queue: wait for one item, then add whatever else is already
+    waiting, up to batch_size"""
+    while True:
+        item, error = items.get()
+        if item is _END:
+            if error is not None:
+                raise error
+            return
+        batch = [item]
+        while len(batch) < batch_size:
+            try:
+                item, error = items.get_nowait()
+            except queue.Empty:
+                break
+            if item is _END:
+                yield batch
+                if error is not None:
+                    raise error
+                return
+            batch.append(item)
+        yield batch
+
+
+@tracing.traced("pipeline.streaming_run")
+def run_streaming_pipeline(query, model, tokenizer, device, stream_fn=scrape_review_stream, scrape_cache=None,
+                           summary_cache=None, force_refresh=False, batch_size=4, progress=None,
+                           model_lock=None, language_filter=None, profile=DEFAULT_PROFILE, decoding_stats=None,
+                           max_reviews=MAX_REVIEWS, preselect=True, review_store=None, checkpoints=None, run_id=None,
+                           select_max_chunks=None):
+    """run_pipeline with the stages overlapped: review pages are cleaned and chunked as they are
+    scraped, and each chunk is summarized as soon as it is full, while later pages are still loading.
+
+    stream_fn(query, max_reviews=max_reviews) yields review pages (see scrapping_new.scrape_review_stream). progress is called
+    with the STREAMING_STAGES; partial results are {"product": ...} after every page and
+    {"chunk_summaries": [...]} after every map batch, with review_insights figures for the reviews so
+    far in "insights" next to "product". Chunks are packed greedily in arrival order
+    (see chunking.iter_blocks), so a run may produce a chunk more than run_pipeline on the same reviews.
+    With preselect, near-duplicates of earlier reviews are dropped as pages arrive. Ranking needs
+    every review up front, so with select_max_chunks the budget is filled in arrival order here,
+    without the rating strata, and the reviews after it are dropped (counted in "selection" as in
+    run_pipeline, but without "strata_out").
+    With a review_store the run is incremental as in run_pipeline; stream_fn then also gets known_reviews.
+    With checkpoints every review page is saved as it arrives and every chunk summary as its batch
+    finishes; a retry replays the saved pages, has stream_fn resume=... after the last of them
+    (run_checkpoint.checkpointed_pages) and generates only the chunk summaries not saved yet.
+    The result has run_pipeline's fields plus "first_summary_seconds".
+    """
+    report = progress or (lambda stage, fraction, message, partial=None: None)
+    generate_kwargs = decoding_profile(profile)
+    started = time.perf_counter()
+    lock = model_lock if model_lock is not None else nullcontext()
+    delta = _open_delta(review_store, query, model, generate_kwargs, force_refresh)
+    checkpoint = _open_checkpoint(
+        checkpoints, run_id, query, max_reviews, profile, preselect, delta, force_refresh, select_max_chunks
+    )
+    try:
+        if checkpoint is not None:
+            summary_cache = checkpoints.summary_cache(checkpoint["run_id"], summary_cache)
+            stream_fn = functools.partial(checkpointed_pages, checkpoints, checkpoint, stream_fn)
+
+        scrape_info = None
+        variant = _scrape_variant(max_reviews)
+        use_scrape_cache = scrape_cache is not None and delta is None
+        cached = scrape_cache.get(query, variant) if use_scrape_cache and not force_refresh else None
+        if checkpoint is not None and checkpoint["pages"]:
+            pages = stream_fn(query, max_reviews=max_reviews, **({"known_reviews": delta["known"]} if delta is not None else {}))
+            report(
+                "stream", 0.0,
+                f"♻️ Resuming after {len(checkpoint['pages'])} saved pages and {checkpoint['summaries']} saved summaries..."
+            )
+        elif delta is not None:
+            pages = stream_fn(query, max_reviews=max_reviews, known_reviews=delta["known"])
+            report("stream", 0.0, f"🔍 Scraping reviews newer than the {len(delta['known'])} stored...")
+        elif cached is not None:
+            data, scrape_info = cached
+            pages = [{
+                "overall_rating": data.get("Overall_rating", ""),
+                "total_ratings": data.get("Total_ratings", ""),
+                "reviews": data.get("reviews", []),
+            }]
+            report("stream", 0.0, "🗂️ Using cached reviews...", {"scrape_info": scrape_info})
+        else:
+            pages = stream_fn(query, max_reviews=max_reviews)
+            report("stream", 0.0, "🔍 Scraping reviews...")
+
+        preprocessor = IncrementalPreprocessor(language_filter)
+        insights = ReviewInsights()
+        duplicate_filter = NearDuplicateFilter() if preselect else None
+        max_select_tokens = _select_budget(tokenizer, select_max_chunks) if preselect else None
+        selection = {
+            "reviews_in": 0, "duplicates_removed": 0, "duplicate_tokens_removed": 0,
+            "ranked_out": 0, "ranked_out_tokens": 0, "tokens_selected": 0,
+        }
+        scraped_pages = []
+        summaries = []
+        state = {"scraped": 0.0, "fraction": 0.0, "chunks": 0}
+        state_lock = threading.Lock()
+
+        def report_stream(partial=None):
+            # Half the stage for scraping, half for the map step over the chunks known so far
+            with state_lock:
+                mapped = len(summaries) / max(state["chunks"], 1)
+                state["fraction"] = max(state["fraction"], (state["scraped"] + mapped) / 2)
+                fraction = state["fraction"]
+                message = f"Scraped {preprocessor.seen} reviews, summarized {len(summaries)} of {state['chunks']} chunks..."
+            report("stream", fraction, message, partial)
+
+        def deduplicated(reviews):
+            texts = [review["cleaned_comment"] for review in reviews]
+            selection["reviews_in"] += len(texts)
+            if duplicate_filter is None or not texts:
+                return texts
+            keep = duplicate_filter.filter(texts)
+            kept_indices = set(keep)
+            dropped = [text for i, text in enumerate(texts) if i not in kept_indices]
+            if dropped:
+                selection["duplicates_removed"] += len(dropped)
+                selection["duplicate_tokens_removed"] += sum(len(ids) for ids in tokenize_reviews(dropped, tokenizer))
+            return within_budget([texts[i] for i in keep])
+
+        def within_budget(texts):
+            if max_select_tokens is None or not texts:
+                return texts
+            kept = []
+            for text, ids in zip(texts, tokenize_reviews(texts, tokenizer)):
+                if selection["tokens_selected"] + len(ids) <= max_select_tokens:
+                    selection["tokens_selected"] += len(ids)
+                    kept.append(text)
+                else:
+                    selection["ranked_out"] += 1
+                    selection["ranked_out_tokens"] += len(ids)
+            return kept
+
+        def cleaned_pages():
+            for page in pages:
+                scraped_pages.append(page)
+                with tracing.span("pipeline.clean_page", reviews=len(page["reviews"])) as span:
+                    kept = preprocessor.feed(page["reviews"])
+                    span.set(kept=len(kept))
+                insights.add_scraped(page["reviews"])
+                insights.add_cleaned(kept)
+                with state_lock:
+                    state["scraped"] = min(preprocessor.seen / max_reviews, 1.0)
+                info = product_info(preprocessor.result(collect_review_pages(query, scraped_pages)))
+                report_stream({"product": info, "insights": insights.result()})
+                yield deduplicated(kept)
+            rest = preprocessor.finish()
+            insights.add_cleaned(rest)
+            yield deduplicated(rest)
+
+        def counted_chunks():
+            for chunk in iter_blocks(cleaned_pages(), tokenizer):
+                with state_lock:
+                    state["chunks"] += 1
+                yield chunk
+
+        revision = cache_revision(model) if summary_cache is not None else ""
+        chunks = []
+        first_summary_seconds = None
+        stop = threading.Event()
+        try:
+            for batch in _ready_batches(_in_background(counted_chunks(), stop), batch_size):
+                with lock, tracing.span("pipeline.map_batch", chunks=len(batch), profile=profile):
+                    batch_summaries = cached_generate_summaries(
+                        [chunk["text"] for chunk in batch], model, tokenizer, device,
+                        cache=summary_cache, revision=revision, batch_size=batch_size,
+                        input_ids_list=[chunk["input_ids"] for chunk in batch],
+                        on_generated=decoding_stats.recorder(profile, "map") if decoding_stats is not None else None,
+                        **generate_kwargs["map"]
+                    )
+                chunks.extend(batch)
+                with state_lock:
+                    summaries.extend(batch_summaries)
+                if first_summary_seconds is None:
+                    first_summary_seconds = round(time.perf_counter() - started, 3)
+                report_stream({"chunk_summaries": list(summaries)})
+        finally:
+            stop.set()
+
+        if not scraped_pages:
+            raise PipelineError("Scraping failed. Check logs or try again.")
+        data = collect_review_pages(query, scraped_pages)
+        if cached is None and use_scrape_cache:
+            scrape_info = scrape_cache.put(query, data, variant)
+        if not chunks and not (delta and delta["summaries"]):
+            raise PipelineError("No valid reviews found after cleaning. Please try a different product.")
+        info = product_info(preprocessor.result(data))
+        tracing.count("reviews_kept_total", len(preprocessor.cleaned_reviews))
+        if preselect:
+            tokens_out = sum(chunk["token_count"] for chunk in chunks)
+            del selection["tokens_selected"]
+            selection.update(
+                reviews_out=selection["reviews_in"] - selection["duplicates_removed"] - selection["ranked_out"],
+                tokens_in=tokens_out + selection["duplicate_tokens_removed"] + selection["ranked_out_tokens"],
+                tokens_out=tokens_out, max_tokens=max_select_tokens,
+            )
+
+        def on_reduce(message, fraction, partial=None):
+            report("reduce", 0.0, message, partial)
+
+        insights_result = insights.result()
+        report("reduce", 0.0, "🤖 Generating final summary...", {"product": info, "insights": insights_result})
+        reduce_info = {"depth": 0, "levels": []}
+        summaries = shuffle_like_chunks(summaries)
+        with lock, tracing.span("pipeline.reduce", summaries=len(summaries), profile=profile):
+            final_summary = _reduce_with_stored(delta, summaries, lambda all_summaries: reduce_summaries(
+                all_summaries, model, tokenizer, device,
+                cache=summary_cache, revision=revision, progress_callback=on_reduce,
+                profile=profile, stats=decoding_stats, batch_size=batch_size, reduce_info=reduce_info
+            ))
+        delta_info = None
+        if delta is not None:
+            delta_info = _save_delta(review_store, query, delta, data["reviews"], summaries, final_summary, info)
+        checkpoint_info = None
+        if checkpoint is not None:
+            checkpoints.finish(checkpoint["run_id"])
+            checkpoint_info = _checkpoint_info(checkpoint, summary_cache, resumed_pages=len(checkpoint["pages"]))
+
+        return {
+            **info,
+            "summary": final_summary,
+            "summary_length": len(final_summary.split()),
+            "chunks_processed": len(chunks),
+            "chunk_fill_ratios": [chunk["fill_ratio"] for chunk in chunks],
+            "scrape_info": scrape_info,
+            "first_summary_seconds": first_summary_seconds,
+            "selection": selection if preselect else None,
+            "insights": insights_result,
+            "decoding_profile": profile,
+            "reduce_depth": reduce_info["depth"],
+            "reduce_levels": reduce_info["levels"],
+            "delta": delta_info,
+            "checkpoint": checkpoint_info,
+        }
+    except BaseException:
+        if checkpoint is not None:
+            checkpoints.release(checkpoint["run_id"])  # a retry resumes it
+        raise
+
+
+def pipeline_job(job, query, *args, streaming=False, **kwargs):
+    """run_pipeline (or run_streaming_pipeline) as a jobs.JobManager job: progress is reported into the job"""
+    stages = STREAMING_STAGES if streaming else STAGES
+
+    def progress(stage, fraction, message, partial=None):
+        job.update(
+            stage=stage, fraction=fraction, message=message, partial=partial,
+            progress=overall_progress(stage, fraction, stages)
+        )
+
+    run = run_streaming_pipeline if streaming else run_pipeline
+    return run(query, *args, progress=progress, **kwargs)
+
+
+def provider_pipeline_job(job, query, provider, *args, **kwargs):
+    """pipeline_job that takes its model from a model_provider.ModelProvider, so a job can be
+    queued while the model is still loading"""
+    if not provider.ready():
+        job.update(stage="model", fraction=0.0, message="⏳ Waiting for the model to load...", progress=0.0)
+    model, tokenizer, device = provider.get()
+    return pipeline_job(job, query, model, tokenizer, device, *args, **kwargs)
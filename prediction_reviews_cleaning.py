@@ -1,8 +1,9 @@
-
-
 import re
-from langdetect import detect
-from langdetect.lang_detect_exception import LangDetectException
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import tracing
+from language_filter import LanguageFilter
 # import glob
 # import os
 # import nltk
@@ -14,23 +15,45 @@ from langdetect.lang_detect_exception import LangDetectException
 #     english_words = [word for word in words_list if word.lower() in english_vocab]
 #     return ' '.join(english_words)
 
+# Patterns used by clean_text, compiled once at import
+EMOJI_RE = re.compile(r'[^\w\s.,!?\'\":;%()&-]')
+URL_RE = re.compile(r'http\S+|www\S+|https\S+')
+READ_MORE_TAIL_RE = re.compile(r"\s\b\w*\s?\.{3,}\s*\n?READ MORE") # \s space,\b word boundry,\w* any number of word characters, ? for optional presence.\n newline char,{3,} 3 or more of prev char
+MULTI_DOT_RE = re.compile(r'\.{2,}')
+WHITESPACE_RE = re.compile(r'\s+')
+DOT_READ_MORE_RE = re.compile(r'\.READ MORE')
+
+# Reviews need more than MIN_WORDS_LARGE words when the product has at least LARGE_PRODUCT_REVIEWS
+# scraped reviews, more than MIN_WORDS_SMALL otherwise
+MIN_WORDS_SMALL = 10
+MIN_WORDS_LARGE = 15
+LARGE_PRODUCT_REVIEWS = 100
+
+# Inputs at least this long are spread over a process pool by the batch functions
+PARALLEL_THRESHOLD = 5000
+BATCH_CHUNK_SIZE = 1000
+
 def clean_text(text):
     # Remove emojis
-    text = re.sub(r'[^\w\s.,!?\'\":;%()&-]', '', text)
+    text = EMOJI_RE.sub('', text)
     # Remove URLs
-    text = re.sub(r'http\S+|www\S+|https\S+', '', text)
-    # Remove unwanted char sequences
-    text = re.sub(r"\s\b\w*\s?\.{3,}\s*\n?READ MORE", '.', text) # \s space,\b word boundry,\w* any number of word characters, ? for optional presence.\n newline char,{3,} 3 or more of prev char
+    text = URL_RE.sub('', text)
+    # Remove unwanted char sequences (substring checks skip passes that cannot match)
+    if "READ MORE" in text:
+        text = READ_MORE_TAIL_RE.sub('.', text)
     # Remove unwanted char sequences
-    text = re.sub(r'\.{2,}', '. ', text)
+    if ".." in text:
+        text = MULTI_DOT_RE.sub('. ', text)
     # Remove extra spaces and newlines
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = WHITESPACE_RE.sub(' ', text).strip()
 
 
     # Remove unwanted char sequences
-    text = re.sub(r'\.READ MORE', '. ', text).strip()
+    if ".READ MORE" in text:
+        text = DOT_READ_MORE_RE.sub('. ', text).strip()
     # Remove unwanted char sequences
-    text = re.sub(r'\.{2,}', '. ', text)
+    if ".." in text:
+        text = MULTI_DOT_RE.sub('. ', text)
 
 
     # Remove non-English words
@@ -42,8 +65,72 @@ def clean_text(text):
     return text.lower()
 
 
+def _clean_text_chunk(texts):
+    return [clean_text(text) for text in texts]
+
+
+def _map_chunks(fn, items, workers=None, min_parallel=PARALLEL_THRESHOLD, chunk_size=BATCH_CHUNK_SIZE):
+    """Apply fn to consecutive chunks of items, over a process pool for large inputs.
+
+    Returns (per-chunk results in order, whether a pool was used).
+    """
+    if len(items) < min_parallel or workers == 1:
+        return [fn(items)], False
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(fn, chunks)), True
+
+
+def clean_texts(texts, workers=None, min_parallel=PARALLEL_THRESHOLD):
+    """clean_text over a list of strings; large lists are cleaned in parallel processes"""
+    parts, _ = _map_chunks(_clean_text_chunk, list(texts), workers=workers, min_parallel=min_parallel)
+    return [text for part in parts for text in part]
+
+
+# Shared by preprocess_reviews calls that do not pass their own filter
+default_language_filter = LanguageFilter()
+
+
 ###############################################################
-def preprocess_reviews(data):
+def clean_review_text(title, comment, min_words, language_filter):
+    """Language check + cleaning of one review's title and comment: (cleaned_title, cleaned_comment),
+    or None if the review is dropped"""
+    if not language_filter(comment):  # check if review not in english (empty, emoji-only and too short texts are rejected as well)
+        tracing.count("reviews_dropped_total", reason="language")
+        return None
+
+    cleaned_comment = clean_text(comment)
+
+    # Check word count and keep if within bounds
+    word_count = len(cleaned_comment.split())
+    if min_words < word_count:   # Skip if too short
+        return clean_text(title), cleaned_comment
+    tracing.count("reviews_dropped_total", reason="too_short")
+    return None
+
+
+def _process_review(review, min_words, language_filter):
+    """Language check + cleaning for one scraped review; None if the review is dropped"""
+    cleaned = clean_review_text(review.get("Title", ""), review.get("Comment", ""), min_words, language_filter)
+    if cleaned is None:
+        return None
+    return {
+        "title": cleaned[0],
+        "raw_comment":review.get("Comment",""),
+        "cleaned_comment": cleaned[1],
+        "user_rating": review.get("User_Rating", ""),  # for review_insights
+
+    }
+
+
+def _process_review_chunk(tasks, language_filter):
+    before = language_filter.counts.copy()
+    results = [_process_review(review, min_words, language_filter) for review, min_words in tasks]
+    return results, language_filter.counts - before
+
+
+def _init_cleaned_data(data):
+    """Product-level fields of the preprocess_reviews output, with an empty review list"""
     # overall_rating = None
     # total_ratings_cleaned = "0"
     # Clean fields
@@ -69,32 +156,24 @@ def preprocess_reviews(data):
     "total_ratings_count": total_ratings_cleaned,
     "cleaned_reviews": []
     }
+    return new_data
 
 
+def _min_words(data):
     # Determine min word count based on total_reviews
-    min_words = 15 if data["total_reviews"] >= 100 else 10
-
-    # Process each review
-    for review in data.get("reviews", []):
-        cleaned_title = clean_text(review.get("Title", ""))
+    return MIN_WORDS_LARGE if data["total_reviews"] >= LARGE_PRODUCT_REVIEWS else MIN_WORDS_SMALL
 
-        try:
-            if detect(review.get("Comment", "")) != 'en':  # check if review not in english
-                continue
-        except LangDetectException:
-             continue  # Skip  (The langdetect.detect() function fails if the input is empty,too short, or contains no detectable language — e.g., just emojis, short string like "ok".)
-        
-        cleaned_comment = clean_text(review.get("Comment", ""))
 
-        # Check word count and append if within bounds
-        word_count = len(cleaned_comment.split())
-        if min_words < word_count:   # Skip if too short
-            new_data["cleaned_reviews"].append({
-                "title": cleaned_title,
-                "raw_comment":review.get("Comment",""),
-                "cleaned_comment": cleaned_comment
+def preprocess_reviews(data, language_filter=None):
+    language_filter = language_filter or default_language_filter
+    new_data = _init_cleaned_data(data)
+    min_words = _min_words(data)
 
-            })
+    # Process each review
+    for review in data.get("reviews", []):
+        cleaned_review = _process_review(review, min_words, language_filter)
+        if cleaned_review is not None:
+            new_data["cleaned_reviews"].append(cleaned_review)
 
 #####
 # The difference between review["comment"] and review.get("comment", "") when accessing data from a JSON-like dictionary in Python is primarily in error handling and default value behavior.
@@ -107,6 +186,100 @@ def preprocess_reviews(data):
     return new_data
 
 
+class IncrementalPreprocessor:
+    """preprocess_reviews for reviews that arrive a page at a time.
+
+    feed(reviews) returns the cleaned reviews that can already be kept; finish() returns the rest once
+    the scrape is over. The minimum word count depends on the final review total, so reviews whose
+    length only passes the lower threshold are held back until the total is known (it is as soon as
+    LARGE_PRODUCT_REVIEWS reviews have been seen). Together the two return exactly the reviews
+    preprocess_reviews keeps for the same input, held-back ones later than their neighbours;
+    cleaned_reviews and result(data) have them in input order, as preprocess_reviews does.
+    """
+
+    def __init__(self, language_filter=None):
+        self.language_filter = language_filter or default_language_filter
+        self.seen = 0
+        self._kept = []  # (input position, cleaned review)
+        self._held = []
+
+    @property
+    def min_words(self):
+        """The threshold, once it is decided (None while it still depends on reviews to come)"""
+        return MIN_WORDS_LARGE if self.seen >= LARGE_PRODUCT_REVIEWS else None
+
+    @property
+    def cleaned_reviews(self):
+        """Every review kept so far, in input order"""
+        return [review for _, review in sorted(self._kept, key=lambda kept: kept[0])]
+
+    def feed(self, reviews):
+        ready = []
+        for review in reviews:
+            position = self.seen
+            self.seen += 1
+            cleaned_review = _process_review(review, MIN_WORDS_SMALL, self.language_filter)
+            if cleaned_review is None:
+                continue
+            if len(cleaned_review["cleaned_comment"].split()) > MIN_WORDS_LARGE:
+                ready.append((position, cleaned_review))
+            elif self.min_words is None:
+                self._held.append((position, cleaned_review))
+            else:
+                tracing.count("reviews_dropped_total", reason="too_short")
+        if self.min_words is not None:
+            tracing.count("reviews_dropped_total", len(self._held), reason="too_short")
+            self._held = []  # too short for a product this size
+        self._kept.extend(ready)
+        return [review for _, review in ready]
+
+    def finish(self):
+        ready, self._held = (self._held if self.min_words is None else []), []
+        self._kept.extend(ready)
+        return [review for _, review in ready]
+
+    def result(self, data):
+        """preprocess_reviews-shaped output for the scrape_review data the reviews came from"""
+        new_data = _init_cleaned_data(data)
+        new_data["cleaned_reviews"] = self.cleaned_reviews
+        new_data["total_final_review_count"] = len(new_data["cleaned_reviews"])
+        return new_data
+
+
+def preprocess_reviews_batch(datas, workers=None, min_parallel=PARALLEL_THRESHOLD, language_filter=None):
+    """preprocess_reviews over many scrape outputs at once.
+
+    Reviews of all products are pooled and, once there are at least min_parallel of them, language
+    detection and cleaning run in a process pool. Returns one dict per input, same as preprocess_reviews.
+    """
+    language_filter = language_filter or default_language_filter
+    results = [_init_cleaned_data(data) for data in datas]
+    tasks = []
+    owners = []
+    for index, data in enumerate(datas):
+        min_words = _min_words(data)
+        for review in data.get("reviews", []):
+            tasks.append((review, min_words))
+            owners.append(index)
+
+    parts, parallel = _map_chunks(
+        partial(_process_review_chunk, language_filter=language_filter),
+        tasks, workers=workers, min_parallel=min_parallel
+    )
+    processed = []
+    for part, counts in parts:
+        processed.extend(part)
+        if parallel:  # workers filtered with their own copies; fold their tier counts back in
+            language_filter.counts.update(counts)
+
+    for index, cleaned_review in zip(owners, processed):
+        if cleaned_review is not None:
+            results[index]["cleaned_reviews"].append(cleaned_review)
+    for new_data in results:
+        new_data["total_final_review_count"] = len(new_data["cleaned_reviews"])
+    return results
+
+
 ####################################################
 # here the input is the output of selenium code
 
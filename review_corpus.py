@@ -0,0 +1,270 @@
+"""Columnar review corpus: scraped and cleaned reviews as Arrow / Parquet files, for offline
+reprocessing and evaluation over archives too large for preprocess_reviews' per-review dicts.
+
+One row per review. Product-level fields (search query, ratings, review count) are dictionary-encoded,
+so they cost an index per row. A cleaned corpus keeps the cleaned title and comment and the row of
+the scraped review each came from; the raw comment is not copied. .parquet files are compressed,
+for the archive; .arrow files (Arrow IPC, uncompressed) are memory-mapped, so their batches are read
+without copying. Readers go batch by batch and never build per-review dicts.
+
+    python review_corpus.py import scraped/ corpus.parquet       # scrape_review JSON -> corpus
+    python review_corpus.py clean corpus.parquet cleaned.arrow   # preprocess_reviews, batch by batch
+    python review_corpus.py stats cleaned.arrow
+
+    for product, chunk in iter_corpus_chunks("cleaned.arrow", tokenizer): ...
+
+Needs pyarrow (pip install pyarrow).
+"""
+import argparse
+import json
+from itertools import groupby
+from pathlib import Path
+
+from prediction_reviews_cleaning import LARGE_PRODUCT_REVIEWS, MIN_WORDS_LARGE, MIN_WORDS_SMALL, clean_review_text, default_language_filter
+
+# Rows per record batch / Parquet row group
+BATCH_ROWS = 16384
+
+# (name, dictionary-encoded) per kind of corpus
+SCRAPED_COLUMNS = (
+    ("product", True),
+    ("overall_rating", True),
+    ("total_ratings", True),
+    ("product_reviews", False),  # total_reviews of the scrape, which picks the cleaning threshold
+    ("user_rating", True),
+    ("title", False),
+    ("comment", False),
+)
+CLEANED_COLUMNS = (
+    ("product", True),
+    ("source_row", False),
+    ("title", False),
+    ("cleaned_comment", False),
+)
+_INT_COLUMNS = {"product_reviews": "int32", "source_row": "int64"}
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("review_corpus needs pyarrow: pip install pyarrow") from e
+    return pyarrow
+
+
+def corpus_schema(columns):
+    pa = _pyarrow()
+    fields = []
+    for name, dictionary in columns:
+        if dictionary:
+            fields.append(pa.field(name, pa.dictionary(pa.int32(), pa.string())))
+        else:
+            fields.append(pa.field(name, getattr(pa, _INT_COLUMNS.get(name, "string"))()))
+    return pa.schema(fields)
+
+
+class CorpusWriter:
+    """Appends rows to a .parquet or .arrow corpus file, a record batch at a time.
+
+    Dictionary columns share one growing dictionary across the whole file, so every batch's
+    dictionary extends the previous one (written as deltas in Arrow IPC files).
+    """
+
+    def __init__(self, path, columns, batch_rows=BATCH_ROWS):
+        pa = _pyarrow()
+        self.path = Path(path)
+        self.columns = columns
+        self.schema = corpus_schema(columns)
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self._buffer = {name: [] for name, _ in columns}
+        self._dictionaries = {name: {} for name, dictionary in columns if dictionary}
+        if self.path.suffix == ".parquet":
+            self._writer = pa.parquet.ParquetWriter(self.path, self.schema, compression="zstd")
+        elif self.path.suffix == ".arrow":
+            self._sink = pa.OSFile(str(self.path), "wb")
+            self._writer = pa.ipc.new_file(
+                self._sink, self.schema, options=pa.ipc.IpcWriteOptions(emit_dictionary_deltas=True)
+            )
+        else:
+            raise ValueError(f"Corpus files are .parquet or .arrow, got {self.path.name!r}")
+
+    def write_row(self, **values):
+        for name, _ in self.columns:
+            value = values[name]
+            dictionary = self._dictionaries.get(name)
+            if dictionary is not None:
+                value = dictionary.setdefault("" if value is None else str(value), len(dictionary))
+            self._buffer[name].append(value)
+        self.rows += 1
+        if len(self._buffer[self.columns[0][0]]) >= self.batch_rows:
+            self.flush()
+
+    def flush(self):
+        pa = _pyarrow()
+        if not self._buffer[self.columns[0][0]]:
+            return
+        arrays = []
+        for field in self.schema:
+            values = self._buffer[field.name]
+            dictionary = self._dictionaries.get(field.name)
+            if dictionary is not None:
+                arrays.append(pa.DictionaryArray.from_arrays(pa.array(values, pa.int32()), pa.array(list(dictionary), pa.string())))
+            else:
+                arrays.append(pa.array(values, field.type))
+        self._writer.write_batch(pa.record_batch(arrays, schema=self.schema))
+        self._buffer = {name: [] for name, _ in self.columns}
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+        if self.path.suffix == ".arrow":
+            self._sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def write_scrapes(path, scrapes, batch_rows=BATCH_ROWS):
+    """Write scrape_review outputs (an iterable, consumed one product at a time) as a scraped
+    corpus; returns the number of reviews written"""
+    with CorpusWriter(path, SCRAPED_COLUMNS, batch_rows) as writer:
+        for data in scrapes:
+            for review in data.get("reviews", []):
+                writer.write_row(
+                    product=data["search_query"], overall_rating=data.get("Overall_rating", ""),
+                    total_ratings=data.get("Total_ratings", ""), product_reviews=data.get("total_reviews", 0),
+                    user_rating=review.get("User_Rating", ""), title=review.get("Title") or "",
+                    comment=review.get("Comment") or "",
+                )
+        return writer.rows
+
+
+class ReviewCorpus:
+    """Read side of a corpus file: record batches of some or all columns, without copying .arrow files"""
+
+    def __init__(self, path):
+        pa = _pyarrow()
+        self.path = Path(path)
+        if self.path.suffix == ".arrow":
+            self._reader = pa.ipc.open_file(pa.memory_map(str(self.path)))
+            self.schema = self._reader.schema
+            self.num_rows = sum(self._reader.get_batch(i).num_rows for i in range(self._reader.num_record_batches))
+        elif self.path.suffix == ".parquet":
+            self._reader = pa.parquet.ParquetFile(self.path, memory_map=True)
+            self.schema = self._reader.schema_arrow
+            self.num_rows = self._reader.metadata.num_rows
+        else:
+            raise ValueError(f"Corpus files are .parquet or .arrow, got {self.path.name!r}")
+
+    def iter_batches(self, columns=None, batch_rows=BATCH_ROWS):
+        """pyarrow RecordBatches in file order (batch_rows only applies to Parquet)"""
+        if self.path.suffix == ".parquet":
+            yield from self._reader.iter_batches(batch_size=batch_rows, columns=columns)
+            return
+        for i in range(self._reader.num_record_batches):
+            batch = self._reader.get_batch(i)
+            yield batch.select(columns) if columns else batch
+
+
+def _dictionary_values(column):
+    """Python values of a (possibly dictionary-encoded) column, decoding each dictionary entry once"""
+    if hasattr(column, "dictionary"):
+        dictionary = column.dictionary.to_pylist()
+        return [dictionary[index] for index in column.indices.to_pylist()]
+    return column.to_pylist()
+
+
+def iter_product_texts(corpus, column="cleaned_comment", batch_rows=BATCH_ROWS):
+    """(product, [texts]) for each run of consecutive rows of one product within a batch; a product
+    spanning batches comes in several runs"""
+    for batch in corpus.iter_batches(columns=["product", column], batch_rows=batch_rows):
+        products = _dictionary_values(batch.column(0))
+        texts = batch.column(1).to_pylist()
+        start = 0
+        for product, rows in groupby(products):
+            count = sum(1 for _ in rows)
+            yield product, texts[start:start + count]
+            start += count
+
+
+def clean_corpus(source, destination, language_filter=None, batch_rows=BATCH_ROWS):
+    """preprocess_reviews over a scraped corpus, batch by batch, into a cleaned corpus.
+
+    Each product's threshold comes from its product_reviews column, as preprocess_reviews takes it
+    from total_reviews. Returns {"reviews_in", "reviews_out"}.
+    """
+    language_filter = language_filter or default_language_filter
+    corpus = ReviewCorpus(source)
+    columns = ["product", "product_reviews", "title", "comment"]
+    row = 0
+    with CorpusWriter(destination, CLEANED_COLUMNS, batch_rows) as writer:
+        for batch in corpus.iter_batches(columns=columns, batch_rows=batch_rows):
+            products, totals, titles, comments = (_dictionary_values(batch.column(i)) for i in range(len(columns)))
+            for product, total, title, comment in zip(products, totals, titles, comments):
+                min_words = MIN_WORDS_LARGE if total >= LARGE_PRODUCT_REVIEWS else MIN_WORDS_SMALL
+                cleaned = clean_review_text(title, comment, min_words, language_filter)
+                if cleaned is not None:
+                    writer.write_row(product=product, source_row=row, title=cleaned[0], cleaned_comment=cleaned[1])
+                row += 1
+        return {"reviews_in": row, "reviews_out": writer.rows}
+
+
+def iter_corpus_chunks(path, tokenizer, max_tokens=None, batch_rows=BATCH_ROWS):
+    """(product, chunk) for every product of a cleaned corpus, in file order; chunks are those of
+    chunking.iter_blocks (arrival-order packing), so a product's reviews are never all in memory"""
+    from chunking import iter_blocks
+
+    runs = iter_product_texts(ReviewCorpus(path), batch_rows=batch_rows)
+    for product, product_runs in groupby(runs, key=lambda run: run[0]):
+        for chunk in iter_blocks((texts for _, texts in product_runs), tokenizer, max_tokens=max_tokens):
+            yield product, chunk
+
+
+def corpus_stats(path):
+    corpus = ReviewCorpus(path)
+    products = set()
+    for batch in corpus.iter_batches(columns=["product"]):
+        products.update(_dictionary_values(batch.column(0)))
+    return {
+        "path": str(corpus.path),
+        "rows": corpus.num_rows,
+        "products": len(products),
+        "columns": corpus.schema.names,
+        "bytes": corpus.path.stat().st_size,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="scrape_review JSON (.json, .jsonl or a directory) -> scraped corpus")
+    import_parser.add_argument("source")
+    import_parser.add_argument("destination", help=".parquet or .arrow")
+    clean_parser = commands.add_parser("clean", help="scraped corpus -> cleaned corpus")
+    clean_parser.add_argument("source")
+    clean_parser.add_argument("destination", help=".parquet or .arrow")
+    stats_parser = commands.add_parser("stats", help="rows, products and columns of a corpus")
+    stats_parser.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "import":
+        from summarize_cli import read_scraped
+
+        rows = write_scrapes(args.destination, (item["scrapped_data"] for item in read_scraped(args.source)))
+        print(f"✅ {rows} reviews written to {args.destination}")
+    elif args.command == "clean":
+        counts = clean_corpus(args.source, args.destination)
+        print(f"✅ Kept {counts['reviews_out']} of {counts['reviews_in']} reviews in {args.destination}")
+    else:
+        print(json.dumps(corpus_stats(args.path), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Model-free product insights from scraped and cleaned reviews, ready long before the summary.
+
+Star rating histogram (every scraped review), opinion lexicon scores, aspect mentions (battery,
+camera, delivery, ...) with the mean rating and sentiment of the reviews mentioning them, and the
+terms most associated with high and low ratings. Reviews are tokenized once; every statistic is a
+numpy aggregate over (review, term) index arrays, so a few hundred reviews take milliseconds.
+
+    insights = ReviewInsights()
+    insights.add_scraped(scrapped_data["reviews"])        # User_Rating of every scraped review
+    insights.add_cleaned(cleaned_data["cleaned_reviews"])  # text stats of the reviews that are kept
+    insights.result()                                      # JSON-ready dict
+    insights.strata()                                      # rating stratum of every cleaned review
+
+Both add_* can be called a page at a time. strata() feeds review_selection.select_reviews, so the
+token budget is shared between rating strata as the reviews are. That needs every review up front:
+only pipeline.run_pipeline stratifies, the streaming pipeline fills its budget in arrival order.
+"""
+import math
+import re
+
+import numpy as np
+
+from language_filter import ENGLISH_STOPWORDS
+from review_selection import WORD_RE
+
+RATING_RE = re.compile(r"[1-5]")
+
+# Aspect -> words that mention it (single words, matched on the cleaned, lowercased text)
+ASPECTS = {
+    "battery": ("battery", "backup", "drain", "drains", "draining", "mah"),
+    "charging": ("charging", "charger", "charge", "charges", "charged"),
+    "camera": ("camera", "cameras", "photo", "photos", "picture", "pictures", "selfie", "video", "videos", "lens"),
+    "display": ("display", "screen", "brightness", "amoled", "resolution", "touch"),
+    "performance": ("performance", "speed", "fast", "slow", "lag", "lags", "laggy", "smooth", "hang", "hangs", "processor", "gaming"),
+    "heating": ("heating", "heat", "heats", "hot", "overheating", "temperature"),
+    "sound": ("sound", "audio", "speaker", "speakers", "volume", "bass", "mic"),
+    "build": ("build", "body", "design", "material", "plastic", "durable", "sturdy", "weight"),
+    "software": ("software", "update", "updates", "ui", "os", "bug", "bugs", "apps", "ads"),
+    "price": ("price", "value", "money", "worth", "cost", "costly", "expensive", "cheap", "budget", "affordable"),
+    "delivery": ("delivery", "delivered", "shipping", "courier", "late", "arrived"),
+    "packaging": ("packaging", "package", "packed", "box"),
+    "service": ("service", "support", "warranty", "replacement", "return", "refund", "seller", "customer"),
+    "size": ("size", "fit", "fitting", "small", "big", "large", "tight", "loose"),
+}
+
+# Opinion lexicon; a word within NEGATION_WINDOW words after a negation counts with the other sign
+POSITIVE_WORDS = frozenset("""
+amazing awesome beautiful best better brilliant clear comfortable convenient decent excellent fabulous
+fantastic fast fine flawless genuine good gorgeous great happy impressive love loved lovely nice
+outstanding perfect pleasant premium recommend recommended reliable satisfied smooth solid stunning
+sturdy super superb worth wonderful
+""".split())
+NEGATIVE_WORDS = frozenset("""
+annoying average bad broke broken cheap complaint damaged defective disappointed disappointing
+drain drains fake faulty hang hangs heating horrible issue issues lag lags laggy poor problem
+problems refund regret return slow terrible useless waste weak worse worst wrong
+""".split())
+NEGATIONS = frozenset(("not", "no", "never", "don't", "doesn't", "didn't", "isn't", "wasn't", "won't", "can't", "cannot", "nothing", "hardly"))
+NEGATION_WINDOW = 3
+
+# Terms need at least this many rated reviews (and 2% of them) to be listed
+MIN_TERM_REVIEWS = 2
+TOP_TERMS = 8
+
+_ASPECT_NAMES = tuple(ASPECTS)
+_ASPECT_OF = {word: index for index, name in enumerate(_ASPECT_NAMES) for word in ASPECTS[name]}
+
+
+def parse_rating(value):
+    """Star rating (1-5) of a scraped User_Rating string ("5", "4★", ...), or None"""
+    match = RATING_RE.search(str(value or ""))
+    return int(match.group()) if match else None
+
+
+def _grow(array, size):
+    return array if len(array) >= size else np.concatenate([array, np.zeros(size - len(array), dtype=array.dtype)])
+
+
+class ReviewInsights:
+    """Rating, lexicon and aspect statistics of one product's reviews, fed a page at a time"""
+
+    def __init__(self):
+        self.rating_counts = np.zeros(5, dtype=np.int64)
+        self.scraped = 0
+        self._vocab = {}
+        self._term_aspect = []  # per term: aspect index or -1
+        self._term_polarity = []  # per term: +1, -1 or 0
+        self._term_listed = []  # per term: may show up in the term lists (not a stopword / number)
+        self._rated_reviews = np.zeros(0, dtype=np.int64)  # per term, over rated cleaned reviews
+        self._rating_sums = np.zeros(0)
+        self._ratings = []  # per page of cleaned reviews: (n,) float, nan if unrated
+        self._scores = []  # (n,) lexicon score in [-1, 1]
+        self._aspect_hits = []  # (n, len(ASPECTS)) bool
+
+    def _term(self, word):
+        index = self._vocab.get(word)
+        if index is None:
+            index = self._vocab[word] = len(self._vocab)
+            self._term_aspect.append(_ASPECT_OF.get(word, -1))
+            self._term_polarity.append(1 if word in POSITIVE_WORDS else -1 if word in NEGATIVE_WORDS else 0)
+            self._term_listed.append(len(word) > 2 and word not in ENGLISH_STOPWORDS and not word.isdigit())
+        return index
+
+    def add_scraped(self, reviews):
+        """Count the star ratings of scrape_review reviews (cleaning does not matter for these)"""
+        ratings = [parse_rating(review.get("User_Rating")) for review in reviews]
+        self.rating_counts += np.bincount([r - 1 for r in ratings if r is not None], minlength=5)
+        self.scraped += len(reviews)
+
+    def add_cleaned(self, reviews):
+        """Add preprocess_reviews cleaned reviews ({"cleaned_comment", "user_rating"} dicts)"""
+        if not reviews:
+            return
+        rows, cols, signs = [], [], []
+        for row, review in enumerate(reviews):
+            negated = 0
+            for word in WORD_RE.findall(review.get("cleaned_comment", "").lower()):
+                if word in NEGATIONS:
+                    negated = NEGATION_WINDOW
+                    continue
+                rows.append(row)
+                cols.append(self._term(word))
+                signs.append(-1 if negated else 1)
+                negated = max(negated - 1, 0)
+
+        n, terms = len(reviews), max(len(self._vocab), 1)
+        rows, cols = np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64)
+        polarity = np.array(self._term_polarity, dtype=np.int64)[cols] * np.array(signs, dtype=np.int64)
+        positive = np.bincount(rows, weights=polarity > 0, minlength=n)
+        negative = np.bincount(rows, weights=polarity < 0, minlength=n)
+        scores = (positive - negative) / np.maximum(positive + negative, 1)
+
+        # Each (review, term) pair once: aspect mentions and per-term rating sums
+        pairs = np.unique(rows * terms + cols)
+        pair_rows, pair_cols = pairs // terms, pairs % terms
+        aspects = np.array(self._term_aspect, dtype=np.int64)[pair_cols]
+        hits = np.zeros((n, len(_ASPECT_NAMES)), dtype=bool)
+        hits[pair_rows[aspects >= 0], aspects[aspects >= 0]] = True
+
+        ratings = np.array([parse_rating(review.get("user_rating")) or np.nan for review in reviews], dtype=float)
+        rated = ~np.isnan(ratings[pair_rows])
+        terms = len(self._vocab)
+        self._rated_reviews = _grow(self._rated_reviews, terms) + np.bincount(pair_cols[rated], minlength=terms)
+        self._rating_sums = _grow(self._rating_sums, terms) + np.bincount(
+            pair_cols[rated], weights=ratings[pair_rows][rated], minlength=terms
+        )
+        self._ratings.append(ratings)
+        self._scores.append(scores)
+        self._aspect_hits.append(hits)
+
+    def _cleaned_arrays(self):
+        if not self._ratings:
+            return np.zeros(0), np.zeros(0), np.zeros((0, len(_ASPECT_NAMES)), dtype=bool)
+        return np.concatenate(self._ratings), np.concatenate(self._scores), np.concatenate(self._aspect_hits)
+
+    def strata(self):
+        """Stratum of every cleaned review, in the order they were added: its star rating, or
+        "positive" / "negative" / "neutral" from the lexicon score when it has none (used by
+        run_pipeline's ranking only, see the module docstring)"""
+        ratings, scores, _ = self._cleaned_arrays()
+        return [
+            int(rating) if not math.isnan(rating) else "positive" if score > 0 else "negative" if score < 0 else "neutral"
+            for rating, score in zip(ratings.tolist(), scores.tolist())
+        ]
+
+    def _terms(self, mean_rating, rated):
+        if not rated or not len(self._rated_reviews):
+            return [], []
+        counts = self._rated_reviews
+        listed = np.array(self._term_listed, dtype=bool) & (counts >= max(MIN_TERM_REVIEWS, math.ceil(0.02 * rated)))
+        means = self._rating_sums / np.maximum(counts, 1)
+        # Rating-weighted frequency: how far the term's reviews pull the mean rating up or down
+        weights = np.where(listed, counts * (means - mean_rating), 0.0)
+        words = list(self._vocab)
+
+        def top(order, sign):
+            return [
+                {"term": words[i], "reviews": int(counts[i]), "mean_rating": round(float(means[i]), 2)}
+                for i in order[:TOP_TERMS] if weights[i] * sign > 0
+            ]
+
+        order = np.argsort(weights, kind="stable")
+        return top(order[::-1], 1), top(order, -1)
+
+    def result(self):
+        ratings, scores, hits = self._cleaned_arrays()
+        rated_scraped = int(self.rating_counts.sum())
+        rated = ~np.isnan(ratings)
+        mean_rating = float(ratings[rated].mean()) if rated.any() else None
+        praised, criticized = self._terms(mean_rating, int(rated.sum())) if mean_rating is not None else ([], [])
+
+        aspects = []
+        for index in np.argsort(-hits.sum(axis=0), kind="stable"):
+            mentioned = hits[:, index]
+            if not mentioned.any():
+                continue
+            mentioned_rated = mentioned & rated
+            aspects.append({
+                "aspect": _ASPECT_NAMES[index],
+                "mentions": int(mentioned.sum()),
+                "share": round(float(mentioned.mean()), 3),
+                "mean_rating": round(float(ratings[mentioned_rated].mean()), 2) if mentioned_rated.any() else None,
+                "sentiment": round(float(scores[mentioned].mean()), 3),
+                "negative_share": round(float((scores[mentioned] < 0).mean()), 3),
+            })
+
+        return {
+            "scraped_reviews": self.scraped,
+            "cleaned_reviews": len(scores),
+            "rating_histogram": {str(stars): int(count) for stars, count in enumerate(self.rating_counts, 1)},
+            "mean_rating": round(float((np.arange(1, 6) * self.rating_counts).sum() / rated_scraped), 2) if rated_scraped else None,
+            "sentiment": {
+                "positive": round(float((scores > 0).mean()), 3),
+                "negative": round(float((scores < 0).mean()), 3),
+                "neutral": round(float((scores == 0).mean()), 3),
+                "mean_score": round(float(scores.mean()), 3),
+            } if len(scores) else None,
+            "aspects": aspects,
+            "praised_terms": praised,
+            "criticized_terms": criticized,
+        }
+
+
+def review_insights(scraped_reviews, cleaned_reviews):
+    """ReviewInsights over one scrape_review review list and its preprocess_reviews cleaned reviews"""
+    insights = ReviewInsights()
+    insights.add_scraped(scraped_reviews)
+    insights.add_cleaned(cleaned_reviews)
+    return insights
@@ -0,0 +1,186 @@
+import math
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from language_filter import ENGLISH_STOPWORDS
+from summarization import tokenize_reviews
+
+WORD_RE = re.compile(r"[a-z0-9']+")
+
+# MinHash / LSH settings: 128 hash functions in 16 bands of 8 rows make reviews with a shingle
+# Jaccard similarity of ~0.7 or more collide in at least one band; collisions are then confirmed
+# against the signature estimate
+NUM_PERM = 128
+LSH_BANDS = 16
+SHINGLE_WORDS = 3
+DUPLICATE_THRESHOLD = 0.7
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_PERM_BLOCK = 16  # hash functions evaluated at once, bounds the temporary (rows x shingles) array
+
+
+def _words(text):
+    return WORD_RE.findall(text.lower())
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Word n-grams of a review, hashed to 31 bit ints (reviews shorter than size give one shingle)"""
+    words = _words(text)
+    if not words:
+        return []
+    grams = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+    return sorted({zlib.crc32(gram.encode("utf-8")) & _MERSENNE_PRIME for gram in grams})
+
+
+class NearDuplicateFilter:
+    """Drop reviews that are near-duplicates of a review seen before (MinHash + LSH banding).
+
+    Stateful, so reviews can be fed a page at a time: filter(texts) returns the indices of the texts
+    to keep, in order, and remembers them for later calls. The first review of a duplicate group is
+    the one kept.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=LSH_BANDS, threshold=DUPLICATE_THRESHOLD, shingle_size=SHINGLE_WORDS, seed=0):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = []
+        self.dropped = 0
+
+    def signatures(self, texts):
+        """(len(texts), num_perm) MinHash signatures; texts without words get all-max rows"""
+        shingle_lists = [shingles(text, self.shingle_size) for text in texts]
+        signatures = np.full((len(texts), len(self._a)), _MERSENNE_PRIME, dtype=np.uint64)
+        rows = [i for i, values in enumerate(shingle_lists) if values]
+        if not rows:
+            return signatures
+        values = np.array([value for i in rows for value in shingle_lists[i]], dtype=np.uint64)
+        starts = np.cumsum([0] + [len(shingle_lists[i]) for i in rows[:-1]])
+        for start in range(0, len(self._a), _PERM_BLOCK):
+            a = self._a[start:start + _PERM_BLOCK, None]
+            b = self._b[start:start + _PERM_BLOCK, None]
+            hashed = (a * values[None, :] + b) % _MERSENNE_PRIME
+            signatures[rows, start:start + _PERM_BLOCK] = np.minimum.reduceat(hashed, starts, axis=1).T
+        return signatures
+
+    def _band_keys(self, signature):
+        return [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+
+    def filter(self, texts):
+        keep = []
+        for i, signature in enumerate(self.signatures(texts)):
+            keys = self._band_keys(signature)
+            candidates = {self._buckets[band][key] for band, key in enumerate(keys) if key in self._buckets[band]}
+            if any(np.mean(self._signatures[c] == signature) >= self.threshold for c in candidates):
+                self.dropped += 1
+                continue
+            index = len(self._signatures)
+            self._signatures.append(signature)
+            for band, key in enumerate(keys):
+                self._buckets[band].setdefault(key, index)
+            keep.append(i)
+        return keep
+
+
+def centroid_scores(texts):
+    """Cosine similarity of every review's TF-IDF vector (sublinear tf, stopwords removed) to the
+    mean vector of all reviews; higher means more representative"""
+    docs = [Counter(word for word in _words(text) if word not in ENGLISH_STOPWORDS) for text in texts]
+    vocab = {}
+    rows, cols, tf = [], [], []
+    for row, counts in enumerate(docs):
+        for word, count in counts.items():
+            rows.append(row)
+            cols.append(vocab.setdefault(word, len(vocab)))
+            tf.append(1.0 + math.log(count))
+    if not vocab:
+        return np.zeros(len(texts))
+    rows, cols = np.array(rows), np.array(cols)
+    df = np.bincount(cols, minlength=len(vocab))
+    weights = np.array(tf) * (np.log((1 + len(texts)) / (1 + df)) + 1.0)[cols]
+    norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(texts)))
+    weights /= np.where(norms > 0, norms, 1.0)[rows]
+    centroid = np.bincount(cols, weights=weights, minlength=len(vocab)) / len(texts)
+    centroid /= np.linalg.norm(centroid) or 1.0
+    return np.bincount(rows, weights=weights * centroid[cols], minlength=len(texts))
+
+
+def _stratified_pick(ranked, strata, token_counts, max_tokens):
+    """Indices to keep out of ranked (most representative first): every stratum first gets a share
+    of max_tokens proportional to its number of reviews, what is left goes to the best of the rest"""
+    sizes = Counter(strata[i] for i in ranked)
+    budgets = {stratum: max_tokens * size / len(ranked) for stratum, size in sizes.items()}
+    spent = Counter()
+    selected, used = set(), 0
+    for index in ranked:
+        stratum = strata[index]
+        if spent[stratum] + token_counts[index] <= budgets[stratum]:
+            selected.add(index)
+            spent[stratum] += token_counts[index]
+            used += token_counts[index]
+    for index in ranked:
+        if index not in selected and used + token_counts[index] <= max_tokens:
+            selected.add(index)
+            used += token_counts[index]
+    return selected
+
+
+def select_reviews(reviews, tokenizer, max_tokens=None, dedupe=True, duplicate_filter=None, strata=None):
+    """Pre-selection between cleaning and chunking: drop near-duplicates, then, with max_tokens, keep
+    the reviews closest to the TF-IDF centroid until max_tokens is used (default: no budget, every
+    review left after the near-duplicates goes on).
+
+    strata (one label per review, e.g. review_insights.ReviewInsights.strata()) makes the ranking
+    stratified: each stratum gets a share of the budget matching its share of the reviews, so the
+    selection keeps the rating distribution instead of only the majority's most typical reviews.
+
+    Returns (selected reviews in their original order, info) where info counts the reviews and
+    tokens going in, removed as duplicates, removed by the budget ("ranked_out") and coming out.
+    """
+    token_counts = [len(ids) for ids in tokenize_reviews(reviews, tokenizer)] if reviews else []
+
+    kept = list(range(len(reviews)))
+    if dedupe and reviews:
+        kept = (duplicate_filter or NearDuplicateFilter()).filter(reviews)
+    after_dedupe = kept
+
+    if max_tokens is not None and sum(token_counts[i] for i in kept) > max_tokens:
+        scores = centroid_scores([reviews[i] for i in kept])
+        ranked = [kept[position] for position in np.argsort(-scores, kind="stable")]
+        if strata is not None:
+            selected = _stratified_pick(ranked, strata, token_counts, max_tokens)
+        else:
+            selected, used = [], 0
+            for index in ranked:
+                if used + token_counts[index] <= max_tokens:
+                    selected.append(index)
+                    used += token_counts[index]
+        kept = sorted(selected)
+
+    tokens_in = sum(token_counts)
+    tokens_after_dedupe = sum(token_counts[i] for i in after_dedupe)
+    tokens_out = sum(token_counts[i] for i in kept)
+    info = {
+        "reviews_in": len(reviews),
+        "duplicates_removed": len(reviews) - len(after_dedupe),
+        "ranked_out": len(after_dedupe) - len(kept),
+        "reviews_out": len(kept),
+        "tokens_in": tokens_in,
+        "duplicate_tokens_removed": tokens_in - tokens_after_dedupe,
+        "ranked_out_tokens": tokens_after_dedupe - tokens_out,
+        "tokens_out": tokens_out,
+        "max_tokens": max_tokens,
+    }
+    if strata is not None:
+        info["strata_out"] = {str(stratum): count for stratum, count in sorted(Counter(str(strata[i]) for i in kept).items())}
+    return [reviews[i] for i in kept], info
@@ -0,0 +1,143 @@
+"""Reviews and chunk summaries of tracked products, kept between runs (SQLite).
+
+With a ReviewStore, a pipeline run reads the review listing newest first and stops paging at the
+first review an earlier run stored. Only the new reviews are cleaned, chunked and summarized, and
+their chunk summaries are reduced together with the stored ones. The run's reviews, chunk summaries
+and final summary are saved in one transaction once it has succeeded.
+
+Everything is recorded per summary key: model revision plus decoding profile (see store_key).
+Summaries made with other settings are never merged, so a run with a new profile summarizes
+every review once and is incremental from then on.
+"""
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from scrape_cache import normalize_query
+from scrapping_http import review_hash
+from summary_cache import summary_key
+
+DEFAULT_STORE_PATH = Path(__file__).resolve().parent / ".cache" / "review_store.sqlite3"
+
+
+def store_key(revision, generate_kwargs):
+    """Summary key of a run: model revision + the map and reduce generate kwargs of its profile"""
+    return summary_key("review_store", revision, generate_kwargs)[:32]
+
+
+class ReviewStore:
+    """Per product and summary key: the reviews already summarized (by review_hash), their chunk
+    summaries in the order they were made, and the last final summary"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS reviews ("
+                " product_key TEXT NOT NULL,"
+                " summary_key TEXT NOT NULL,"
+                " review_hash TEXT NOT NULL,"
+                " review TEXT NOT NULL,"
+                " first_seen REAL NOT NULL,"
+                " PRIMARY KEY (product_key, summary_key, review_hash))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunk_summaries ("
+                " product_key TEXT NOT NULL,"
+                " summary_key TEXT NOT NULL,"
+                " position INTEGER NOT NULL,"
+                " summary TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " PRIMARY KEY (product_key, summary_key, position))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS products ("
+                " product_key TEXT NOT NULL,"
+                " summary_key TEXT NOT NULL,"
+                " product TEXT NOT NULL,"
+                " summary TEXT,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (product_key, summary_key))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def known_reviews(self, query, key):
+        """review_hash of every review already summarized for query under key"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT review_hash FROM reviews WHERE product_key = ? AND summary_key = ?",
+                (normalize_query(query), key),
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def chunk_summaries(self, query, key):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT summary FROM chunk_summaries WHERE product_key = ? AND summary_key = ? ORDER BY position",
+                (normalize_query(query), key),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def final_summary(self, query, key):
+        """(summary, product info, updated_at) of the last run, or None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT summary, product, updated_at FROM products WHERE product_key = ? AND summary_key = ?",
+                (normalize_query(query), key),
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def save_run(self, query, key, reviews, chunk_summaries, final_summary, product, replace=False):
+        """Record a finished run: its new raw reviews, the chunk summaries made from them and the
+        final summary over everything stored. replace drops what was stored under key first (a run
+        that summarized every review again)."""
+        product_key = normalize_query(query)
+        now = time.time()
+        with self._connect() as conn:
+            if replace:
+                for table in ("reviews", "chunk_summaries", "products"):
+                    conn.execute(f"DELETE FROM {table} WHERE product_key = ? AND summary_key = ?", (product_key, key))
+            conn.executemany(
+                "INSERT OR IGNORE INTO reviews VALUES (?, ?, ?, ?, ?)",
+                [(product_key, key, review_hash(review), json.dumps(review, ensure_ascii=False), now) for review in reviews],
+            )
+            start = conn.execute(
+                "SELECT COALESCE(MAX(position) + 1, 0) FROM chunk_summaries WHERE product_key = ? AND summary_key = ?",
+                (product_key, key),
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO chunk_summaries VALUES (?, ?, ?, ?, ?)",
+                [(product_key, key, start + i, summary, now) for i, summary in enumerate(chunk_summaries)],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO products VALUES (?, ?, ?, ?, ?)",
+                (product_key, key, json.dumps(product, ensure_ascii=False), final_summary, now),
+            )
+
+    def forget(self, query):
+        """Drop everything stored for query, so its next run starts from scratch"""
+        product_key = normalize_query(query)
+        with self._connect() as conn:
+            for table in ("reviews", "chunk_summaries", "products"):
+                conn.execute(f"DELETE FROM {table} WHERE product_key = ?", (product_key,))
+
+    def stats(self):
+        with self._connect() as conn:
+            products, reviews, summaries = (
+                conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ("products", "reviews", "chunk_summaries")
+            )
+        return {"products": products, "reviews": reviews, "chunk_summaries": summaries}
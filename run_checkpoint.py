@@ -0,0 +1,259 @@
+"""Checkpoints of pipeline runs in progress, so a failed or interrupted run resumes where it stopped (SQLite).
+
+A run is identified by its run ID (checkpoint_run_id: the query plus the settings that change its result), so
+retrying the same analysis finds the checkpoint of the attempt that failed. While a run goes on,
+its review pages are saved as they are scraped, the cleaned reviews once they are cleaned, and
+every summary as soon as its micro-batch is generated. A retry then
+
+- replays the saved pages and scrapes on from the page after the last one (checkpointed_pages),
+  skipping the search, the product page and every page already read;
+- takes the saved summaries instead of generating them again (summary_cache).
+
+A run holds a claim on its checkpoint while it goes: a second run with the same ID started
+meanwhile runs without a checkpoint instead of writing into the first one's. A run that fails
+releases its claim so the retry can take over; a claim nothing has written to for
+CLAIM_SECONDS (the process died) lapses. A run that succeeds deletes its checkpoint, and
+checkpoints older than max_age are dropped, so a much later run of the same query starts afresh.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import tracing
+from scrape_cache import normalize_query
+from scrapping_http import drop_page_overlap
+
+DEFAULT_CHECKPOINT_PATH = Path(__file__).resolve().parent / ".cache" / "run_checkpoints.sqlite3"
+DEFAULT_MAX_AGE_SECONDS = 6 * 60 * 60
+CLAIM_SECONDS = 10 * 60
+
+
+def checkpoint_run_id(query, **settings):
+    """Run ID of a query run with settings (max_reviews, profile, ...); the same inputs always give
+    the same ID"""
+    payload = json.dumps([normalize_query(query), settings], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class RunCheckpoints:
+    """Pages, artifacts (e.g. the cleaned reviews) and summaries of unfinished runs, per run ID"""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH, max_age_seconds=DEFAULT_MAX_AGE_SECONDS):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_seconds
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " run_id TEXT PRIMARY KEY,"
+                " query TEXT NOT NULL,"
+                " scrape_done INTEGER NOT NULL DEFAULT 0,"
+                " attempts INTEGER NOT NULL DEFAULT 1,"
+                " claimed INTEGER NOT NULL DEFAULT 0,"
+                " created_at REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            if "claimed" not in [column[1] for column in conn.execute("PRAGMA table_info(runs)")]:
+                conn.execute("ALTER TABLE runs ADD COLUMN claimed INTEGER NOT NULL DEFAULT 0")  # files of older versions
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " run_id TEXT NOT NULL,"
+                " position INTEGER NOT NULL,"
+                " page TEXT NOT NULL,"
+                " PRIMARY KEY (run_id, position))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                " run_id TEXT NOT NULL,"
+                " name TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " PRIMARY KEY (run_id, name))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " run_id TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " summary TEXT NOT NULL,"
+                " PRIMARY KEY (run_id, key))"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _delete(self, conn, run_ids):
+        for table in ("runs", "pages", "artifacts", "summaries"):
+            conn.executemany(f"DELETE FROM {table} WHERE run_id = ?", [(rid,) for rid in run_ids])
+
+    def open(self, run_id, query, restart=False):
+        """Claim and start or resume run_id. Returns {"run_id", "resumed", "attempts", "pages",
+        "scrape_done", "summaries"} with the saved pages in order, or None while another run holds
+        the claim; restart drops what an earlier attempt saved"""
+        now = time.time()
+        with self._connect() as conn:
+            stale = [row[0] for row in conn.execute(
+                "SELECT run_id FROM runs WHERE updated_at < ?", (now - self.max_age_seconds,)
+            )]
+            self._delete(conn, stale)
+            # Rows left behind by writes to a run that was deleted meanwhile
+            for table in ("pages", "artifacts", "summaries"):
+                conn.execute(f"DELETE FROM {table} WHERE run_id NOT IN (SELECT run_id FROM runs)")
+            row = conn.execute("SELECT scrape_done, attempts, claimed, updated_at FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+            if row is not None and row[2] and row[3] >= now - CLAIM_SECONDS:
+                tracing.count("checkpoint_claim_conflicts_total")
+                return None
+            if row is not None and restart:
+                self._delete(conn, [run_id])
+                row = None
+            if row is None:
+                conn.execute(
+                    "INSERT INTO runs (run_id, query, scrape_done, attempts, claimed, created_at, updated_at)"
+                    " VALUES (?, ?, 0, 1, 1, ?, ?)", (run_id, query, now, now)
+                )
+                return {"run_id": run_id, "resumed": False, "attempts": 1, "pages": [], "scrape_done": False, "summaries": 0}
+            conn.execute("UPDATE runs SET attempts = attempts + 1, claimed = 1, updated_at = ? WHERE run_id = ?", (now, run_id))
+            pages = [json.loads(page) for (page,) in conn.execute(
+                "SELECT page FROM pages WHERE run_id = ? ORDER BY position", (run_id,)
+            )]
+            summaries = conn.execute("SELECT COUNT(*) FROM summaries WHERE run_id = ?", (run_id,)).fetchone()[0]
+        tracing.count("runs_resumed_total")
+        return {
+            "run_id": run_id, "resumed": True, "attempts": row[1] + 1, "pages": pages,
+            "scrape_done": bool(row[0]), "summaries": summaries,
+        }
+
+    def save_page(self, run_id, position, page):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO pages VALUES (?, ?, ?)", (run_id, position, json.dumps(page, ensure_ascii=False)))
+            conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def finish_scrape(self, run_id):
+        """Mark the scrape of run_id complete: a resumed attempt replays the saved pages only"""
+        with self._connect() as conn:
+            conn.execute("UPDATE runs SET scrape_done = 1, updated_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def save_artifact(self, run_id, name, value):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?)", (run_id, name, json.dumps(value, ensure_ascii=False)))
+            conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def artifact(self, run_id, name):
+        """A value saved with save_artifact, or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM artifacts WHERE run_id = ? AND name = ?", (run_id, name)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_summaries(self, run_id, keys):
+        keys = list(keys)
+        found = {}
+        with self._connect() as conn:
+            for start in range(0, len(keys), 500):  # stay under SQLite's bound parameter limit
+                batch = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, summary FROM summaries WHERE run_id = ? AND key IN ({','.join('?' * len(batch))})",
+                    (run_id, *batch),
+                ).fetchall()
+                found.update(rows)
+        return found
+
+    def put_summaries(self, run_id, items):
+        with self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?)", [(run_id, key, summary) for key, summary in items.items()])
+            conn.execute("UPDATE runs SET updated_at = ? WHERE run_id = ?", (time.time(), run_id))
+
+    def summary_cache(self, run_id, cache=None):
+        """A SummaryCache stand-in for the pipeline: summaries saved by run_id come first, then cache
+        (a shared summary_cache.SummaryCache, optional); new summaries go to both"""
+        return CheckpointSummaryCache(self, run_id, cache)
+
+    def release(self, run_id):
+        """Give up the claim of a run that failed, keeping its checkpoint for a retry"""
+        with self._connect() as conn:
+            conn.execute("UPDATE runs SET claimed = 0 WHERE run_id = ?", (run_id,))
+
+    def finish(self, run_id):
+        """Drop the checkpoint of a run that succeeded"""
+        with self._connect() as conn:
+            self._delete(conn, [run_id])
+
+    def stats(self):
+        with self._connect() as conn:
+            runs, pages, summaries = (
+                conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("runs", "pages", "summaries")
+            )
+        return {"unfinished_runs": runs, "pages": pages, "summaries": summaries}
+
+
+class CheckpointSummaryCache:
+    """get_many / put_many of summary_cache.SummaryCache over one run's checkpoint and a shared cache"""
+
+    def __init__(self, checkpoints, run_id, cache=None):
+        self.checkpoints = checkpoints
+        self.run_id = run_id
+        self.cache = cache
+        self.resumed = 0  # summaries served from the checkpoint
+
+    def get_many(self, keys):
+        keys = list(keys)
+        found = self.checkpoints.get_summaries(self.run_id, keys)
+        self.resumed += len(found)
+        if self.cache is not None:
+            missing = [key for key in keys if key not in found]
+            if missing:
+                found.update(self.cache.get_many(missing))
+        return found
+
+    def put_many(self, items):
+        self.checkpoints.put_summaries(self.run_id, items)
+        if self.cache is not None:
+            self.cache.put_many(items)
+
+
+def checkpointed_pages(checkpoints, state, stream_fn, query, max_reviews, **stream_kwargs):
+    """Review pages of a checkpointed run (state from RunCheckpoints.open): the saved pages first,
+    then stream_fn(query, max_reviews=..., **stream_kwargs) resumed after the last of them, each new
+    page saved before it is yielded. Reviews of the first new page that repeat the end of the last
+    saved one (the listing moved in between, see drop_page_overlap) are dropped."""
+    collected = 0
+    last = None
+    for page in state["pages"]:
+        collected += len(page["reviews"])
+        last = page
+        yield page
+    if state["scrape_done"]:
+        return
+
+    if last is None:
+        pages = stream_fn(query, max_reviews=max_reviews, **stream_kwargs)
+    elif last.get("reviews_url") and last.get("page") and collected < max_reviews:
+        tracing.count("scrape_resumed_total")
+        print(f"♻️ Resuming the scrape of {query!r} at page {last['page'] + 1}")
+        pages = stream_fn(
+            query, max_reviews=max_reviews - collected, resume={"reviews_url": last["reviews_url"], "page": last["page"] + 1},
+            **stream_kwargs
+        )
+    else:
+        pages = iter(())
+    position = len(state["pages"])
+    previous = last["reviews"] if last is not None else []
+    try:
+        for page in pages:
+            # A copy: the scraper may still read the page it yielded
+            page = {**page, "reviews": drop_page_overlap(previous, page["reviews"])}
+            previous = []  # pages after the first are already trimmed by the scraper
+            checkpoints.save_page(state["run_id"], position, page)
+            position += 1
+            yield page
+    finally:
+        close = getattr(pages, "close", None)
+        if close is not None:
+            close()
+    checkpoints.finish_scrape(state["run_id"])
@@ -0,0 +1,171 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / ".cache" / "scrape_cache.sqlite3"
+DEFAULT_TTL_SECONDS = 6 * 60 * 60
+
+
+def normalize_query(query):
+    """Cache key for a search query: case and whitespace insensitive"""
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def _cache_key(query, variant=""):
+    # variant tells apart scrapes of the same query with different settings (e.g. the review cap)
+    key = normalize_query(query)
+    return f"{key}|{variant}" if variant else key
+
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ScrapeCache:
+    """Disk-backed TTL cache of scrape_review results.
+
+    Concurrent lookups of the same (normalized) query while a scrape is running wait for that scrape
+    instead of starting their own.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scrapes ("
+                " query_key TEXT PRIMARY KEY,"
+                " data TEXT NOT NULL,"
+                " scraped_at REAL NOT NULL)"
+            )
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _load(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT data, scraped_at FROM scrapes WHERE query_key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl_seconds:
+            return None
+        return json.loads(row[0]), row[1]
+
+    def _store(self, key, data, scraped_at):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO scrapes VALUES (?, ?, ?)",
+                (key, json.dumps(data, ensure_ascii=False), scraped_at),
+            )
+            conn.execute("DELETE FROM scrapes WHERE scraped_at < ?", (time.time() - self.ttl_seconds,))
+
+    def get_or_scrape(self, query, scrape_fn, force_refresh=False, variant=""):
+        """Return (data, info) for query, calling scrape_fn(query) only on a miss.
+
+        info holds "cached" (served from the cache), "coalesced" (waited on another caller's scrape),
+        "scraped_at" (epoch seconds) and "age_seconds". Empty results are returned but not cached.
+        variant is added to the cache key for scrapes made with non-default settings.
+        """
+        key = _cache_key(query, variant)
+
+        if not force_refresh:
+            cached = self._load(key)
+            if cached is not None:
+                with self._lock:
+                    self.hits += 1
+                return cached[0], self._info(cached[1], cached=True)
+
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _InFlight()
+                self._in_flight[key] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            data, scraped_at = flight.result
+            return data, self._info(scraped_at, coalesced=True)
+
+        try:
+            data = scrape_fn(query)
+            scraped_at = time.time()
+            if data:
+                self._store(key, data, scraped_at)
+            flight.result = (data, scraped_at)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            flight.done.set()
+
+        return data, self._info(scraped_at)
+
+    def get(self, query, variant=""):
+        """(data, info) for a fresh cached scrape of query, or None (counted as a miss).
+        For callers that scrape themselves, e.g. streaming runs, and put() the result."""
+        cached = self._load(_cache_key(query, variant))
+        with self._lock:
+            if cached is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return cached[0], self._info(cached[1], cached=True)
+
+    def put(self, query, data, variant=""):
+        """Store a scrape result (empty results are not cached); returns its info dict"""
+        scraped_at = time.time()
+        if data:
+            self._store(_cache_key(query, variant), data, scraped_at)
+        return self._info(scraped_at)
+
+    def _info(self, scraped_at, cached=False, coalesced=False):
+        return {
+            "cached": cached,
+            "coalesced": coalesced,
+            "scraped_at": scraped_at,
+            "age_seconds": max(0.0, time.time() - scraped_at),
+        }
+
+    def invalidate(self, query, variant=""):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM scrapes WHERE query_key = ?", (_cache_key(query, variant),))
+
+    def stats(self):
+        with self._connect() as conn:
+            entries = conn.execute(
+                "SELECT COUNT(*) FROM scrapes WHERE scraped_at >= ?", (time.time() - self.ttl_seconds,)
+            ).fetchone()[0]
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "ttl_seconds": self.ttl_seconds,
+        }
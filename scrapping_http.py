@@ -0,0 +1,426 @@
+import contextvars
+import hashlib
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode, urljoin, urlparse, urlunparse
+
+import requests
+from lxml import html
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import tracing
+
+BASE_URL = "https://www.flipkart.com"
+MAX_REVIEWS = 150
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/139.0.0.0 Safari/537.36"
+)
+
+# Same targets as the Selenium scraper
+OVERALL_BLOCK_XPATH = "//div[@class='col-4-12 F2+K4v']"
+REVIEW_BLOCK_XPATH = "//div[@class='col EPCmJX Ma1fCG']"
+PRODUCT_LINK_XPATH = "//a[contains(@href, '/p/') and @rel='noopener noreferrer']/@href"
+REVIEWS_LINK_XPATH = "//a[contains(@href, '/product-reviews/')]/@href"
+NEXT_LINK_XPATH = "//a[.//span[text()='Next']]/@href"
+PAGE_COUNT_XPATH = "//span[starts-with(normalize-space(text()), 'Page ')]/text()"
+PAGE_COUNT_RE = re.compile(r"Page\s+[\d,]+\s+of\s+([\d,]+)")
+
+
+def _has_classes(*names):
+    return " and ".join(f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in names)
+
+
+OVERALL_RATING_XPATH = f".//*[{_has_classes('ipqd2A')}]"
+TOTAL_RATINGS_XPATH = ".//span[contains(text(), 'Ratings')]"
+USER_RATING_XPATH = f".//*[{_has_classes('XQDdHH', 'Ga3i8K')}]"
+TITLE_XPATH = f".//*[{_has_classes('z9E0IG')}]"
+COMMENT_XPATH = f".//*[{_has_classes('ZmyHeo')}]"
+
+
+def make_session(pool_size=10, retries=2, timeout=20):
+    """requests.Session with pooled keep-alive connections, retries and the desktop Chrome UA"""
+    session = requests.Session()
+    retry = Retry(total=retries, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-IN,en;q=0.9",
+    })
+    session.request_timeout = timeout
+    return session
+
+
+def fetch_page(session, url, **params):
+    with tracing.span("scrape.fetch", backend="http", url=url) as span:
+        response = session.get(url, params=params or None, timeout=getattr(session, "request_timeout", 20))
+        span.set(http_status=response.status_code, bytes=len(response.content))
+        tracing.count("http_responses_total", status=response.status_code)
+        response.raise_for_status()
+        return response.text
+
+
+def _element_text(element):
+    """Visible text of an element, with <br> as a newline (what Selenium's .text gives)"""
+    if element is None:
+        return None
+    for br in element.iter("br"):
+        br.tail = "\n" + (br.tail or "")
+    return element.text_content().strip()
+
+
+def _first(elements):
+    return elements[0] if elements else None
+
+
+def find_product_url(search_html, base_url=BASE_URL):
+    """URL of the first product on a search results page, or None"""
+    href = _first(html.fromstring(search_html).xpath(PRODUCT_LINK_XPATH))
+    return urljoin(base_url, href) if href else None
+
+
+def find_reviews_url(product_html, product_url):
+    """The 'All reviews' listing for a product page (falls back to the /product-reviews/ URL pattern)"""
+    href = _first(html.fromstring(product_html).xpath(REVIEWS_LINK_XPATH))
+    if href:
+        return urljoin(product_url, href)
+    return product_url.replace("/p/", "/product-reviews/", 1)
+
+
+def parse_review_page(page_html, page_url=BASE_URL):
+    """Parse one review listing page.
+
+    Returns a dict with "overall_rating", "total_ratings", "reviews" (User_Rating/Title/Comment dicts,
+    as scrape_review builds them), "next_url" (None on the last page) and "page_count" (from the
+    "Page X of N" pager, None if absent).
+    """
+    tree = html.fromstring(page_html)
+
+    overall_rating, total_ratings = "", ""
+    for block in tree.xpath(OVERALL_BLOCK_XPATH):
+        overall_rating = _element_text(_first(block.xpath(OVERALL_RATING_XPATH))) or ""
+        total_ratings = _element_text(_first(block.xpath(TOTAL_RATINGS_XPATH))) or ""
+
+    reviews = []
+    for block in tree.xpath(REVIEW_BLOCK_XPATH):
+        reviews.append({
+            "User_Rating": _element_text(_first(block.xpath(USER_RATING_XPATH))) or "",
+            "Title": _element_text(_first(block.xpath(TITLE_XPATH))) or "",
+            "Comment": _element_text(_first(block.xpath(COMMENT_XPATH))),
+        })
+
+    next_href = _first(tree.xpath(NEXT_LINK_XPATH))
+    page_count = None
+    for text in tree.xpath(PAGE_COUNT_XPATH):
+        match = PAGE_COUNT_RE.search(text)
+        if match:
+            page_count = int(match.group(1).replace(",", ""))
+            break
+    return {
+        "overall_rating": overall_rating,
+        "total_ratings": total_ratings,
+        "reviews": reviews,
+        "next_url": urljoin(page_url, next_href) if next_href else None,
+        "page_count": page_count,
+    }
+
+
+def review_page_url(reviews_url, page):
+    """URL of page N of a review listing (Flipkart pages it with a page= query parameter)"""
+    parts = urlparse(reviews_url)
+    query = parse_qs(parts.query)
+    query["page"] = [str(page)]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+class HostThrottle:
+    """Per-host politeness: at most max_in_flight concurrent requests and min_interval seconds
+    between request starts to the same host"""
+
+    def __init__(self, max_in_flight=4, min_interval=0.25):
+        self.max_in_flight = max_in_flight
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._slots = {}
+        self._next_start = {}
+
+    def __call__(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            slots = self._slots.setdefault(host, threading.BoundedSemaphore(self.max_in_flight))
+        return _ThrottledRequest(self, host, slots)
+
+    def _wait_turn(self, host):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class _ThrottledRequest:
+    def __init__(self, throttle, host, slots):
+        self.throttle, self.host, self.slots = throttle, host, slots
+
+    def __enter__(self):
+        self.slots.acquire()
+        self.throttle._wait_turn(self.host)
+
+    def __exit__(self, *exc):
+        self.slots.release()
+
+
+def review_key(review):
+    """Content of a review (rating, title, comment), whitespace-normalized"""
+    return tuple(" ".join((review.get(field) or "").split()) for field in ("User_Rating", "Title", "Comment"))
+
+
+def review_hash(review):
+    """Stable content hash of a review (of its review_key), as stored by review_store"""
+    return hashlib.sha256("\x1f".join(review_key(review)).encode("utf-8")).hexdigest()[:32]
+
+
+def scrape_fingerprint(data):
+    """Stable hash of scrape_review output: its reviews (in any order) and product ratings"""
+    parts = sorted(review_hash(review) for review in data.get("reviews", []))
+    parts += [str(data.get("Overall_rating", "")), str(data.get("Total_ratings", ""))]
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def newest_first_url(reviews_url):
+    """The review listing sorted newest first, so reviews stored by an earlier run come last"""
+    parts = urlparse(reviews_url)
+    query = parse_qs(parts.query)
+    query["sortOrder"] = ["MOST_RECENT"]
+    return urlunparse(parts._replace(query=urlencode(query, doseq=True)))
+
+
+def until_known(pages, known_reviews):
+    """Yield review pages until the first one with a review whose review_hash is in known_reviews.
+    That page is yielded with its known reviews removed, then pages is closed so no further page
+    is fetched."""
+    try:
+        for page in pages:
+            reviews = [review for review in page["reviews"] if review_hash(review) not in known_reviews]
+            reached = len(reviews) < len(page["reviews"])
+            page["reviews"] = reviews
+            yield page
+            if reached:
+                tracing.count("scrape_stopped_at_known_total")
+                return
+    finally:
+        close = getattr(pages, "close", None)
+        if close is not None:
+            close()
+
+
+def drop_page_overlap(previous, reviews):
+    """reviews of a listing page without the leading ones that repeat the end of the page before it
+    (previous, as fetched): the listing moved between the two fetches, e.g. a new review pushed
+    the last one of a page onto the next. Equal reviews anywhere else are kept, they are different
+    buyers writing the same thing ("5 / Wonderful / Nice product")."""
+    keys_before = [review_key(review) for review in previous]
+    keys = [review_key(review) for review in reviews]
+    for overlap in range(min(len(keys_before), len(keys)), 0, -1):
+        if keys_before[-overlap:] == keys[:overlap]:
+            return reviews[overlap:]
+    return reviews
+
+
+def fetch_review_pages(session, reviews_url, pages, max_concurrency=4, throttle=None):
+    """Fetch and parse the given review listing pages concurrently.
+
+    Returns parsed pages (see parse_review_page) in page order, stopping before the first page that
+    failed or had no reviews, since later pages are past the end of the listing.
+    """
+    throttle = throttle or HostThrottle()
+
+    def fetch(page):
+        url = review_page_url(reviews_url, page)
+        try:
+            with throttle(url):
+                page_html = fetch_page(session, url)
+        except requests.RequestException as e:
+            print(f"❌ Review page {page} failed: {e}")
+            return None
+        return parse_review_page(page_html, url)
+
+    pages = list(pages)
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+        # each fetch runs in a copy of this context, so its spans join the caller's trace
+        futures = [executor.submit(contextvars.copy_context().run, fetch, page) for page in pages]
+        parsed = [future.result() for future in futures]
+
+    ordered = []
+    for page in parsed:
+        if page is None or not page["reviews"]:
+            break
+        ordered.append(page)
+    return ordered
+
+
+def tag_page(page, reviews_url, number):
+    """Record where a parsed page came from ("reviews_url" of its listing and its "page" number), so
+    an interrupted scrape can be resumed after it (see run_checkpoint)"""
+    page["reviews_url"] = reviews_url
+    page["page"] = number
+    return page
+
+
+def iter_review_pages(session, reviews_url, max_reviews=MAX_REVIEWS, concurrency=4, throttle=None, start_page=1):
+    """Yield parsed review listing pages (see parse_review_page) in page order as they arrive.
+
+    Page start_page is fetched first to learn the page size; the remaining pages needed for
+    max_reviews are then fetched concurrently, and each is yielded as soon as it and every page
+    before it are in. Reviews repeated from the end of the page before (the listing moved between
+    the fetches, see drop_page_overlap) are removed from "reviews".
+    """
+    throttle = throttle or HostThrottle(max_in_flight=concurrency)
+    previous = []
+
+    def unseen(page, number):
+        nonlocal previous
+        previous, page["reviews"] = page["reviews"], drop_page_overlap(previous, page["reviews"])
+        tracing.count("pages_scraped_total", backend="http")
+        tracing.count("reviews_scraped_total", len(page["reviews"]), backend="http")
+        return tag_page(page, reviews_url, number)
+
+    first = fetch_review_pages(session, reviews_url, [start_page], max_concurrency=1, throttle=throttle)
+    if not first or not first[0]["reviews"]:
+        return
+    # Before the page is yielded: a consumer may filter its reviews
+    per_page = len(first[0]["reviews"])
+    yield unseen(first[0], start_page)
+    last_page = start_page - 1 + math.ceil(max_reviews / per_page)
+    if first[0]["page_count"]:
+        last_page = min(last_page, first[0]["page_count"])
+    if last_page <= start_page:
+        return
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        numbers = range(start_page + 1, last_page + 1)
+        futures = [
+            executor.submit(contextvars.copy_context().run, fetch_review_pages, session, reviews_url, [page], 1, throttle)
+            for page in numbers
+        ]
+        try:
+            for number, future in zip(numbers, futures):
+                parsed = future.result()
+                if not parsed:  # failed or past the end of the listing
+                    break
+                yield unseen(parsed[0], number)
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def iter_review_pages_http(SEARCH_QUERY, max_reviews=MAX_REVIEWS, base_url=BASE_URL, session=None,
+                           concurrency=1, throttle=None, newest_first=False, resume=None):
+    """Streaming scrape_review_http: yields each parsed review page (new reviews only) as soon as it
+    is fetched, instead of returning once every page is in. newest_first reads the listing sorted
+    by date (see newest_first_url). resume={"reviews_url", "page"} skips the search and product
+    pages and starts on that page of the listing (pages are tagged with both, see tag_page)."""
+    own_session = session is None
+    session = session or make_session(pool_size=max(concurrency, 10))
+    try:
+        if resume is not None:
+            reviews_url, start_page = resume["reviews_url"], resume["page"]
+        else:
+            search_html = fetch_page(session, urljoin(base_url, "/search"), q=SEARCH_QUERY)
+            product_url = find_product_url(search_html, base_url)
+            if product_url is None:
+                print("❌ Could not find product link.")
+                return
+
+            reviews_url = find_reviews_url(fetch_page(session, product_url), product_url)
+            if newest_first:
+                reviews_url = newest_first_url(reviews_url)
+            start_page = 1
+
+        if concurrency > 1:
+            yield from iter_review_pages(
+                session, reviews_url, max_reviews=max_reviews, concurrency=concurrency, throttle=throttle,
+                start_page=start_page
+            )
+            return
+
+        previous = []
+        collected = 0
+        number = start_page
+        page_url = review_page_url(reviews_url, start_page) if start_page > 1 else reviews_url
+        while page_url and collected < max_reviews:
+            page = parse_review_page(fetch_page(session, page_url), page_url)
+            if not page["reviews"]:
+                break
+            previous, page["reviews"] = page["reviews"], drop_page_overlap(previous, page["reviews"])
+            collected += len(page["reviews"])
+            tracing.count("pages_scraped_total", backend="http")
+            tracing.count("reviews_scraped_total", len(page["reviews"]), backend="http")
+            page_url = page["next_url"]
+            if page_url and newest_first:
+                page_url = newest_first_url(page_url)  # the Next link does not keep the sort order
+            yield tag_page(page, reviews_url, number)
+            number += 1
+    finally:
+        if own_session:
+            session.close()
+
+
+def collect_review_pages(SEARCH_QUERY, pages):
+    """scrape_review output_data from parsed review pages (None if there were none)"""
+    pages = list(pages)
+    if not pages:
+        return None
+    reviews = [review for page in pages for review in page["reviews"]]
+    overall_rating = next((page["overall_rating"] for page in pages if page["overall_rating"]), "")
+    total_ratings = next((page["total_ratings"] for page in pages if page["total_ratings"]), "")
+    return {
+        "search_query": SEARCH_QUERY,
+        "total_reviews": len(reviews),
+        "Overall_rating": overall_rating,
+        "Total_ratings": total_ratings,
+        "reviews": reviews,
+    }
+
+
+def scrape_review_http(SEARCH_QUERY, max_reviews=MAX_REVIEWS, base_url=BASE_URL, session=None,
+                       concurrency=1, throttle=None):
+    """HTTP + lxml counterpart of scrapping_new.scrape_review; returns the same output_data shape.
+
+    With concurrency > 1, page 1 of the review listing is fetched first to learn the page size and
+    the remaining pages needed for max_reviews are fetched in parallel (bounded by concurrency and
+    the per-host throttle) and merged in page order.
+    """
+    return collect_review_pages(SEARCH_QUERY, iter_review_pages_http(
+        SEARCH_QUERY, max_reviews=max_reviews, base_url=base_url, session=session,
+        concurrency=concurrency, throttle=throttle
+    ))
+
+
+def scrape_review_pages(SEARCH_QUERY, reviews_url, max_reviews=MAX_REVIEWS, session=None, concurrency=4, throttle=None):
+    """Paged fetch mode: collect reviews from a known review listing URL with concurrent page fetches.
+
+    Returns the scrape_review output_data shape (None if page 1 has no reviews).
+    """
+    own_session = session is None
+    session = session or make_session(pool_size=max(concurrency, 1))
+    try:
+        data = collect_review_pages(SEARCH_QUERY, iter_review_pages(
+            session, reviews_url, max_reviews=max_reviews, concurrency=concurrency, throttle=throttle
+        ))
+    finally:
+        if own_session:
+            session.close()
+    if data is None:
+        print("❌ No reviews found on the first review page.")
+    return data
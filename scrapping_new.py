@@ -4,15 +4,92 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
+import atexit
+import threading
 import time
+import tracing
+from driver_pool import DriverPool
+from scrapping_http import (
+    MAX_REVIEWS, collect_review_pages, drop_page_overlap, iter_review_pages, iter_review_pages_http, make_session,
+    newest_first_url, review_page_url, tag_page, until_known
+)
 # import json
 # from pathlib import Path
 # import pandas as pd
 
 
 
-def scrape_review(SEARCH_QUERY):
+SCRAPE_BACKENDS = ("selenium", "http")
 
+
+def _pause(seconds):
+    # The fixed waits of the Selenium flow, counted so traces show how much of a scrape they take
+    tracing.count("scrape_sleep_seconds_total", seconds)
+    time.sleep(seconds)
+
+
+def scrape_review(SEARCH_QUERY, backend="selenium", concurrency=1, max_reviews=MAX_REVIEWS, known_reviews=None, **http_options):
+    # backend="http" fetches pages over pooled HTTP connections and parses them with lxml
+    # (see scrapping_http.scrape_review_http for http_options, e.g. base_url)
+    # concurrency > 1: once the review listing URL is known, its pages are fetched in parallel over HTTP
+    # max_reviews: stop paging once this many reviews are collected
+    # known_reviews: review_hash values stored by an earlier run (see review_store); the listing is then
+    # read newest first and paging stops at the first page with a stored review, so only new reviews come back
+    return collect_review_pages(SEARCH_QUERY, scrape_review_stream(
+        SEARCH_QUERY, backend=backend, concurrency=concurrency, max_reviews=max_reviews,
+        known_reviews=known_reviews, **http_options
+    ))
+
+
+def scrape_review_stream(SEARCH_QUERY, backend="selenium", concurrency=1, max_reviews=MAX_REVIEWS, known_reviews=None, resume=None, **http_options):
+    # Same as scrape_review, but yields the review pages one by one as they are scraped:
+    # {"overall_rating", "total_ratings", "reviews", "reviews_url", "page", ...}; reviews repeated from the end of the
+    # page before (the listing moved while paging, see drop_page_overlap) are left out
+    # resume={"reviews_url", "page"} (taken from a page of an interrupted scrape, see run_checkpoint) goes
+    # straight to that page of the review listing instead of searching from the homepage
+    if backend not in SCRAPE_BACKENDS:
+        raise ValueError(f"Unknown scrape backend: {backend!r} (expected one of {SCRAPE_BACKENDS})")
+    pages = _stream_pages(SEARCH_QUERY, backend, concurrency, max_reviews, known_reviews is not None, resume, http_options)
+    yield from pages if known_reviews is None else until_known(pages, known_reviews)
+
+
+def _stream_pages(SEARCH_QUERY, backend, concurrency, max_reviews, newest_first, resume, http_options):
+    if backend == "http":
+        yield from iter_review_pages_http(
+            SEARCH_QUERY, max_reviews=max_reviews, concurrency=concurrency, newest_first=newest_first,
+            resume=resume, **http_options
+        )
+        return
+
+    start_page = resume["page"] if resume is not None else 1
+    if resume is not None and concurrency > 1:
+        reviews_url = resume["reviews_url"]  # paged fetch mode needs no browser to resume
+    else:
+        with get_driver_pool().lease() as driver:
+            if resume is not None:
+                reviews_url = resume["reviews_url"]
+                with tracing.span("scrape.resume", backend="selenium", page=start_page):
+                    driver.get(review_page_url(reviews_url, start_page))
+            else:
+                if not _open_review_listing(driver, SEARCH_QUERY):
+                    return
+                if newest_first:
+                    driver.get(newest_first_url(driver.current_url))
+                reviews_url = driver.current_url
+            if concurrency <= 1:
+                yield from _iter_pages_with_driver(driver, max_reviews, reviews_url, start_page)
+                return
+    # -------- Paged fetch mode: the browser only had to find the review listing -------- #
+    session = make_session(pool_size=max(concurrency, 1))
+    try:
+        yield from iter_review_pages(
+            session, reviews_url, max_reviews=max_reviews, concurrency=concurrency, start_page=start_page
+        )
+    finally:
+        session.close()
+
+
+def create_driver():
     # -------- SETUP DRIVER -------- #
     options = webdriver.ChromeOptions()
     options.add_argument("--headless=new")  # newer headless mode
@@ -43,15 +120,15 @@ def scrape_review(SEARCH_QUERY):
         })
     """
         })  
+    return driver
 
 
+def open_homepage(driver):
     # -------- STEP 1: Go to Flipkart -------- #
+    # Runs when a pooled driver is warmed up, so scrapes start at STEP 2 on a ready homepage
     print("🚀 Opening Flipkart homepage...") #
-    # search_box=WebDriverWait(driver, 5).until(driver.get("https://www.flipkart.com/"))
-    driver.get("https://www.flipkart.com/")
-    print("🚀 AFTER Opening Flipkart homepage...") ###
-
-    time.sleep(7)
+    with tracing.span("scrape.homepage"):
+        driver.get("https://www.flipkart.com/")
 
 #--------------------------------
          # Close login popup
@@ -61,153 +138,185 @@ def scrape_review(SEARCH_QUERY):
         )
         close_button.click()
         print("🚀 Closed popup...")
-        time.sleep(2)
     except:
         print("🚀 No popup to close...")
 
-    # -------- STEP 2: Search Product -------- #
-    search_box=WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.NAME, "q")))
-    print(f"XXXXXXXXXXXXXXXX 0 ")
-    # search_box = driver.find_element(By.NAME, "q")
-    search_box.send_keys(SEARCH_QUERY)
-    search_box.send_keys(Keys.RETURN)
+    WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.NAME, "q")))
 
-    
-    print(f"XXXXXXXXXXXXXXXX 1 ")
-    time.sleep(2)
 
-    # -------- STEP 3: Click on First Product -------- #
+def driver_is_healthy(driver):
     try:
-        time.sleep(1)
+        driver.current_url
+        return True
+    except Exception:
+        return False
 
-        product_link = WebDriverWait(driver, 15).until(
-            EC.element_to_be_clickable((By.XPATH, "//a[contains(@href, '/p/') and @rel='noopener noreferrer']"))
-        )
-        product_url = product_link.get_attribute('href')
-        driver.get(product_url)
-        print(f"XXXXXXXXXXXXXXXX 2 ")
-    except:
-        print("❌ Could not find product link. Trying next product..")
-        # continue
-        driver.quit()
 
-    
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(2)
-    driver.execute_script("window.scrollTo(0, 0);")
+# Warm Chrome sessions shared by all selenium scrapes of this process
+DRIVER_POOL_SIZE = 2
+DRIVER_MAX_USES = 20
 
-    # -------- STEP 4: Click on 'See All Reviews' -------- #
-    try:
-        all_reviews_button = WebDriverWait(driver, 20).until(
-            EC.element_to_be_clickable((By.XPATH, "//span[contains(text(), 'reviews')]"))
-        )
-        time.sleep(1)
-        all_reviews_button.click()
-        print(f"XXXXXXXXXXXXXXXX 3 ")
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
 
-    except:
-        print("❌ Could not find 'View all reviews' button. Trying next product..")
-        # continue
-        driver.quit()
 
-    time.sleep(1)
-    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-    time.sleep(2)
-    driver.execute_script("window.scrollTo(0, 0);")
+def get_driver_pool(size=DRIVER_POOL_SIZE, max_uses=DRIVER_MAX_USES):
+    """The process-wide DriverPool (created, and pre-warmed in the background, on first call)"""
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            _driver_pool = DriverPool(
+                create_driver, warm=open_homepage, healthy=driver_is_healthy, size=size, max_uses=max_uses
+            )
+            atexit.register(_driver_pool.shutdown)
+        return _driver_pool
 
 
-    # -------- STEP 5: Scrape Reviews -------- #
-    reviews = []
+def _open_review_listing(driver, SEARCH_QUERY):
+    # STEP 2-4 on a warm driver; True once the driver is on the product's review listing
+    # -------- STEP 2: Search Product -------- #
+    with tracing.span("scrape.search", backend="selenium"):
+        search_box=WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.NAME, "q")))
+        # search_box = driver.find_element(By.NAME, "q")
+        search_box.send_keys(SEARCH_QUERY)
+        search_box.send_keys(Keys.RETURN)
+        _pause(2)
 
-    while len(reviews)<150:
+    # -------- STEP 3: Click on First Product -------- #
+    with tracing.span("scrape.product_page", backend="selenium") as span:
+        try:
+            _pause(1)
 
-        time.sleep(2)
-        # review_block1 = driver.find_elements(By.XPATH, "//div[@class='col-4-12 F2+K4v']")
+            product_link = WebDriverWait(driver, 15).until(
+                EC.element_to_be_clickable((By.XPATH, "//a[contains(@href, '/p/') and @rel='noopener noreferrer']"))
+            )
+            product_url = product_link.get_attribute('href')
+            driver.get(product_url)
+        except:
+            span.set(found=False)
+            print("❌ Could not find product link. Trying next product..")
+            # continue
+            return False
 
-        ####"//div[contains(@class, 'col-4-12')]"
-        
-        review_block1 = []  # default empty list
+    with tracing.span("scrape.reviews_link", backend="selenium") as span:
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        _pause(2)
+        driver.execute_script("window.scrollTo(0, 0);")
+
+        # -------- STEP 4: Click on 'See All Reviews' -------- #
         try:
-            review_block1 = WebDriverWait(driver, 20).until(
-                EC.presence_of_all_elements_located((By.XPATH,"//div[@class='col-4-12 F2+K4v']"))
+            all_reviews_button = WebDriverWait(driver, 20).until(
+                EC.element_to_be_clickable((By.XPATH, "//span[contains(text(), 'reviews')]"))
             )
-            print("Found review blocks")
-        except Exception as e:
-                print("❌ No review_block1 found.")
-                break
+            _pause(1)
+            all_reviews_button.click()
 
+        except:
+            span.set(found=False)
+            print("❌ Could not find 'View all reviews' button. Trying next product..")
+            # continue
+            return False
 
+    return True
 
-        for block in review_block1:
-            try:
-                print(f"xxx 0")
-                overall_rating =  block.find_element(By.CLASS_NAME, "ipqd2A").text
-                print(f"XXx 1")
 
-            except:
-                overall_rating = ""
-                print("in the except of overall rating ")
+def _iter_pages_with_driver(driver, max_reviews=MAX_REVIEWS, reviews_url=None, start_page=1):
+    # STEP 5, one review page at a time, starting on page start_page of the listing at reviews_url
+    _pause(1)
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    _pause(2)
+    driver.execute_script("window.scrollTo(0, 0);")
 
-            try:
-                total_ratings= block.find_element(By.XPATH, ".//span[contains(text(), 'Ratings')]").text
-                # total_ratings_value = total_ratings_txt.split()[0] //  i can use this to clean at sourse
-            except:
-                total_ratings = ""
-#---------------------------------------------------------------------------------
 
-        review_block2 = driver.find_elements(By.XPATH, "//div[@class='col EPCmJX Ma1fCG']")
-    
-        print(f"XXXXXXXXXXXXXXXX 4 ")
+    # -------- STEP 5: Scrape Reviews -------- #
+    reviews = []
+    overall_rating, total_ratings = "", ""
 
+    page = start_page - 1
+    previous = []  # the page before, as scraped
+    while len(reviews)<max_reviews:
+        page += 1
+        # The span ends before the page is yielded, so it times this page only
+        with tracing.span("scrape.page", backend="selenium", page=page) as span:
+            _pause(2)
+            # review_block1 = driver.find_elements(By.XPATH, "//div[@class='col-4-12 F2+K4v']")
 
-        time.sleep(4)
-        for block in review_block2:
-            try:
-                User_rating = block.find_element(By.CSS_SELECTOR, ".XQDdHH.Ga3i8K").text
-                print("INSIDE user rating try")
-            except:
-                User_rating = ""
-                print("INSIDE user rating except")
-            try:
-                title = block.find_element(By.CLASS_NAME, "z9E0IG").text
-            except:
-                title = ""
-                print("INSIDE user title ")
+            ####"//div[contains(@class, 'col-4-12')]"
 
+            review_block1 = []  # default empty list
             try:
-                comment = block.find_element(By.CLASS_NAME, "ZmyHeo").text
-            except:
-                comment = None
-            
-            reviews.append({
-                "User_Rating": User_rating,
-                "Title": title,
-                "Comment": comment
-
-            })
-            print(f"XXXXXXXXXXXXXXXX 5")
+                review_block1 = WebDriverWait(driver, 20).until(
+                    EC.presence_of_all_elements_located((By.XPATH,"//div[@class='col-4-12 F2+K4v']"))
+                )
+            except Exception as e:
+                    span.set(found=False)
+                    print("❌ No review_block1 found.")
+                    break
+
+
+
+            for block in review_block1:
+                try:
+                    overall_rating =  block.find_element(By.CLASS_NAME, "ipqd2A").text
+
+                except:
+                    overall_rating = ""
+                    tracing.count("scrape_missing_fields_total", field="overall_rating")
+
+                try:
+                    total_ratings= block.find_element(By.XPATH, ".//span[contains(text(), 'Ratings')]").text
+                    # total_ratings_value = total_ratings_txt.split()[0] //  i can use this to clean at sourse
+                except:
+                    total_ratings = ""
+                    tracing.count("scrape_missing_fields_total", field="total_ratings")
+#---------------------------------------------------------------------------------
+
+            review_block2 = driver.find_elements(By.XPATH, "//div[@class='col EPCmJX Ma1fCG']")
+            page_reviews = []
+
+            _pause(4)
+            for block in review_block2:
+                try:
+                    User_rating = block.find_element(By.CSS_SELECTOR, ".XQDdHH.Ga3i8K").text
+                except:
+                    User_rating = ""
+                    tracing.count("scrape_missing_fields_total", field="user_rating")
+                try:
+                    title = block.find_element(By.CLASS_NAME, "z9E0IG").text
+                except:
+                    title = ""
+                    tracing.count("scrape_missing_fields_total", field="title")
+
+                try:
+                    comment = block.find_element(By.CLASS_NAME, "ZmyHeo").text
+                except:
+                    comment = None
+                    tracing.count("scrape_missing_fields_total", field="comment")
+
+                page_reviews.append({
+                    "User_Rating": User_rating,
+                    "Title": title,
+                    "Comment": comment
+
+                })
+            previous, page_reviews = page_reviews, drop_page_overlap(previous, page_reviews)
+            span.set(reviews=len(page_reviews))
+
+        tracing.count("pages_scraped_total", backend="selenium")
+        tracing.count("reviews_scraped_total", len(page_reviews), backend="selenium")
+        reviews.extend(page_reviews)
+        yield tag_page(
+            {"overall_rating": overall_rating, "total_ratings": total_ratings, "reviews": page_reviews}, reviews_url, page
+        )
+        if len(reviews) >= max_reviews:
+            break
 
     #------- Click next page --------#
         try:
             wait = WebDriverWait(driver, 10)  # Wait up to 10 seconds
             next_btn = wait.until(EC.element_to_be_clickable((By.XPATH, "//span[text()='Next']")))
-            time.sleep(1)  # Optional: wait 1 seconds to mimic human behavior
+            _pause(1)  # Optional: wait 1 seconds to mimic human behavior
             next_btn.click()
-            print("xxxxxxxxxxxxx 6")
         except:
             print("No more pages.")
             break
-
-    time.sleep(1)        
-    #------------------STEP 6: Save -------------#
-    output_data = {
-        "search_query": SEARCH_QUERY,
-        # "Product_name": SEARCH_QUERY,
-        "total_reviews": len(reviews),
-        "Overall_rating": overall_rating,
-        "Total_ratings": total_ratings,
-        "reviews": reviews
-    }
-    return output_data
-    
-
@@ -1,13 +1,23 @@
 import streamlit as st
-from transformers import BartForConditionalGeneration, BartTokenizer
-import torch
-import random
 from pathlib import Path
 import time
+from functools import partial
 
 # Import your existing modules
-from prediction_reviews_cleaning import clean_text, preprocess_reviews
-from scrapping_new import scrape_review
+from scrapping_new import scrape_review_stream, get_driver_pool, SCRAPE_BACKENDS
+from scrapping_http import MAX_REVIEWS
+from summary_cache import SummaryCache
+from scrape_cache import ScrapeCache, normalize_query
+from review_store import ReviewStore
+from run_checkpoint import RunCheckpoints, checkpoint_run_id
+from jobs import JobManager, DONE, FAILED
+from pipeline import provider_pipeline_job
+from summarization import MODEL_DIR, DECODING_PROFILES, DEFAULT_PROFILE
+from model_provider import get_provider
+from decoding_stats import DecodingStats
+from inference_backends import BACKENDS as INFERENCE_BACKENDS
+import os
+import tracing
 
 # Set page configuration
 st.set_page_config(
@@ -64,113 +74,60 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Initialize session state
-if 'model_loaded' not in st.session_state:
-    st.session_state.model_loaded = False
-if 'model' not in st.session_state:
-    st.session_state.model = None
-if 'tokenizer' not in st.session_state:
-    st.session_state.tokenizer = None
+if 'inference_backend' not in st.session_state:
+    st.session_state.inference_backend = "torch"
+
+def model_provider():
+    """The process-wide model for the selected backend; starts loading in the background on first use,
+    so the page renders (and jobs can be queued) while it loads"""
+    return get_provider(st.session_state.inference_backend, MODEL_DIR)
 
 @st.cache_resource
-def load_model():
-    """Load the fine-tuned BART model and tokenizer"""
-    try:
-        model_dir = "./tuned_model_files"
-        tokenizer = BartTokenizer.from_pretrained(model_dir)
-        model = BartForConditionalGeneration.from_pretrained(model_dir)
-        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
-        model.to(device)
-        return model, tokenizer, device
-    except Exception as e:
-        st.error(f"Error loading model: {str(e)}")
-        return None, None, None
-
-def block_reviews(reviews, tokenizer, max_words=900):
-    """Chunk reviews into manageable blocks"""
-    chunks = []
-    current_chunk = []
-    current_word_count = 0
-
-    for review in reviews:
-        review_word_count = len(tokenizer.encode(review.split(), add_special_tokens=False))
-
-        if current_word_count + review_word_count > max_words:
-            chunks.append(" ".join(current_chunk))
-            current_chunk = [review]
-            current_word_count = review_word_count
-        else:
-            current_chunk.append(review)
-            current_word_count += review_word_count
+def get_summary_cache():
+    """Summary cache shared by every session of this process"""
+    return SummaryCache()
 
-    if current_chunk:
-        chunks.append(" ".join(current_chunk))
+@st.cache_resource
+def get_decoding_stats():
+    """Per-profile generation latency / output length, shared by every session"""
+    return DecodingStats()
 
-    return chunks
+@st.cache_resource
+def get_scrape_cache():
+    """Scrape results shared by every session; identical in-flight queries run one scrape"""
+    return ScrapeCache()
 
-def chunk_and_summarize(combined_reviews, model, tokenizer, device):
-    """Generate summaries from chunked reviews"""
-    summaries = []   
-    random.shuffle(combined_reviews)
-    
-    progress_bar = st.progress(0)
-    status_text = st.empty()
-    
-    for i, batch in enumerate(combined_reviews):
-        status_text.text(f"Processing chunk {i+1} of {len(combined_reviews)}...")
-        progress_bar.progress((i + 1) / len(combined_reviews))
-        
-        inputs = tokenizer(batch, return_tensors="pt", max_length=1024, truncation=True, padding=True)
-        inputs = {key: val.to(device) for key, val in inputs.items()}
-        
-        with torch.no_grad():
-            summary_ids = model.generate(
-                input_ids=inputs['input_ids'],
-                attention_mask=inputs['attention_mask'], 
-                max_new_tokens=150, 
-                min_length=70, 
-                length_penalty=1.0, 
-                num_beams=6,
-                eos_token_id=tokenizer.eos_token_id,
-                early_stopping=True
-            )
-        
-        summary = tokenizer.decode(summary_ids[0], skip_special_tokens=True)
-        summaries.append(summary)
-    
-    # Combine and summarize again if needed
-    combined_summary = " ".join(summaries)
-    
-    if len(combined_summary.split()) > 250:
-        status_text.text("Generating final summary...")
-        final_inputs = tokenizer(combined_summary, return_tensors="pt", max_length=1024, truncation=True, padding=True)
-        final_inputs = {key: val.to(device) for key, val in final_inputs.items()}
-
-        with torch.no_grad():
-            final_summary = model.generate(
-                input_ids=final_inputs['input_ids'],
-                attention_mask=final_inputs['attention_mask'], 
-                max_new_tokens=250, 
-                min_length=100,
-                length_penalty=1.5, 
-                num_beams=7,
-                eos_token_id=tokenizer.eos_token_id,
-                early_stopping=True
-            )
-        
-        final_result = tokenizer.decode(final_summary[0], skip_special_tokens=True)
-    else:
-        final_result = combined_summary
-    
-    if torch.cuda.is_available():
-        torch.cuda.empty_cache()
-    
-    progress_bar.empty()
-    status_text.empty()
-    
-    return final_result
+@st.cache_resource
+def get_review_store():
+    """Reviews and chunk summaries of earlier runs, for incremental runs"""
+    return ReviewStore()
+
+@st.cache_resource
+def get_run_checkpoints():
+    """Pages and chunk summaries of runs that did not finish, so analyzing again resumes them"""
+    return RunCheckpoints()
+
+# Background pipeline runs shared by all sessions
+JOB_WORKERS = 2
+JOB_POLL_SECONDS = 1.0
+
+@st.cache_resource
+def get_job_manager():
+    """Bounded worker pool for scrape -> clean -> chunk -> summarize runs"""
+    return JobManager(max_workers=JOB_WORKERS)
+
+# Prometheus metrics of this process when REVIEW_METRICS_PORT is set (this also turns tracing on)
+@st.cache_resource
+def start_metrics_server():
+    port = os.environ.get("REVIEW_METRICS_PORT")
+    if not port:
+        return None
+    tracing.enable(log_file=os.environ.get("REVIEW_TRACING_LOG"))
+    return tracing.serve_metrics(int(port), host=os.environ.get("REVIEW_METRICS_HOST", "127.0.0.1"))
 
 # Main app
 def main():
+    start_metrics_server()
     # Header
     st.markdown('<h1 class="main-header">🛍️ Product Review Summarizer</h1>', unsafe_allow_html=True)
     
@@ -180,21 +137,121 @@ def main():
         st.info("Get real-time, AI generated reviews' summary for any product on Flikart🛒 powered fine-tuned BART model on primary data scrapped using selenium from the same Flipkart.")
         
         st.header("⚙️ Model Status")
-        if not st.session_state.model_loaded:
-            if st.button("🔄 Load Model"):
-                with st.spinner("Loading model..."):
-                    model, tokenizer, device = load_model()
-                    if model is not None:
-                        st.session_state.model = model
-                        st.session_state.tokenizer = tokenizer
-                        st.session_state.device = device
-                        st.session_state.model_loaded = True
-                        st.success("✅ Model loaded successfully!")
-                        st.rerun()
-                    else:
-                        st.error("❌ Failed to load model")
-        else:
+        st.selectbox(
+            "Inference backend",
+            INFERENCE_BACKENDS,
+            key="inference_backend",
+            help="torch: fp32 model · int8: dynamically quantized, faster on CPU · onnx: ONNX Runtime export "
+                 "(convert once with inference_backends.py; falls back to torch when unavailable)"
+        )
+        status = model_provider().status()
+        if status["state"] == "ready":
             st.success("✅ Model is loaded and ready!")
+            st.caption(
+                f"Inference backend: {status['backend']} on {status['device']} · weights {status['weights'] or 'n/a'} · "
+                f"loaded in {status['load_seconds']}s ({status['cold_start_seconds']}s after start) · "
+                f"RSS {status['rss_mb']} MB ({status['shared_mb']} MB shared)"
+            )
+            batching = status["batching"]
+            if batching:
+                waits = batching["queue_wait_ms"] or {}
+                st.caption(
+                    f"Dynamic batching (all sessions): {batching['queue_depth']} chunks queued · "
+                    f"{batching['batches']} batches, mean size {batching['mean_batch_size'] or 'n/a'} · "
+                    f"queue wait p50 {waits.get('p50', 'n/a')} ms, p95 {waits.get('p95', 'n/a')} ms"
+                )
+        elif status["state"] == "failed":
+            st.error(f"❌ Failed to load model: {status['error']}")
+        else:
+            st.info("⏳ Loading the model in the background, analyses started now will wait for it")
+            if st.button("🔄 Refresh status"):
+                st.rerun()
+
+        st.header("🧮 Generation")
+        st.slider(
+            "Chunks per generate batch",
+            min_value=1, max_value=8, value=4,
+            key="generate_batch_size",
+            disabled=model_provider().batching is not None,
+            help="Number of review chunks summarized together in one model.generate call. With dynamic "
+                 "batching (the default, REVIEW_DYNAMIC_BATCHING=0 turns it off) chunks of every session are "
+                 "batched together instead, up to REVIEW_MAX_BATCH_SIZE per call"
+        )
+        profiles = list(DECODING_PROFILES)
+        st.selectbox(
+            "Decoding profile",
+            profiles,
+            index=profiles.index(DEFAULT_PROFILE),
+            key="decoding_profile",
+            help="Beam width and length limits for the chunk (map) and final (reduce) passes: "
+                 "fast < balanced < quality in both latency and summary detail"
+        )
+        st.checkbox(
+            "Drop duplicate reviews",
+            value=True,
+            key="preselect",
+            help="Remove near-duplicate reviews before summarizing (and, for very large products, keep the most representative ones)"
+        )
+        decoding_stats = get_decoding_stats().stats()
+        if decoding_stats:
+            with st.expander("Profile stats"):
+                st.json(decoding_stats)
+
+        st.header("🌐 Scraping")
+        st.selectbox(
+            "Scraping backend",
+            SCRAPE_BACKENDS,
+            key="scrape_backend",
+            help="selenium drives headless Chrome; http fetches pages directly and parses the HTML (much faster, no browser)"
+        )
+        st.slider(
+            "Parallel review pages",
+            min_value=1, max_value=8, value=4,
+            key="scrape_concurrency",
+            help="Review pages fetched concurrently once the review listing URL is known (1 = page by page)"
+        )
+        st.slider(
+            "Max reviews",
+            min_value=50, max_value=1000, value=MAX_REVIEWS, step=50,
+            key="max_reviews",
+            help="Reviews scraped per product; chunk summaries are reduced in rounds, so large products keep every chunk"
+        )
+        if st.session_state.scrape_backend == "selenium":
+            # First call starts pre-warming the Chrome pool in the background
+            pool_stats = get_driver_pool().stats()
+            st.caption(
+                f"Chrome pool: {pool_stats['leased']} busy · {pool_stats['idle']} idle · "
+                f"{pool_stats['starting']} starting (size {pool_stats['size']}) · "
+                f"avg lease wait {pool_stats['lease_wait_avg_s']}s · "
+                f"recycled {sum(pool_stats['recycles'].values())}"
+            )
+
+        st.header("🗂️ Review Cache")
+        st.checkbox(
+            "Force refresh (re-scrape)",
+            key="force_refresh",
+            help="Ignore cached reviews for this product and scrape Flipkart again"
+        )
+        scrape_stats = get_scrape_cache().stats()
+        st.caption(
+            f"Hit rate {scrape_stats['hit_rate']:.0%} · {scrape_stats['entries']} cached products · "
+            f"TTL {scrape_stats['ttl_seconds'] // 3600:.0f} h"
+        )
+        st.checkbox(
+            "Only summarize new reviews",
+            key="incremental",
+            help="Read the reviews newest first, stop at the ones summarized by an earlier run and merge only the new "
+                 "chunk summaries into the stored ones (Force refresh starts over)"
+        )
+        store_stats = get_review_store().stats()
+        st.caption(f"Review store: {store_stats['products']} products · {store_stats['reviews']} reviews")
+
+        st.header("⏳ Jobs")
+        job_stats = get_job_manager().stats()
+        st.caption(
+            f"{job_stats['running']} running · {job_stats['queued']} queued on {job_stats['workers']} workers · "
+            f"{job_stats['deduplicated']} duplicate requests joined"
+        )
     
     # Main content
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -207,147 +264,222 @@ def main():
             help="Enter product name you want to analyze reviews for"
         )
         
-        analyze_button = st.button("🔍 Analyze Reviews", disabled=not st.session_state.model_loaded)
+        analyze_button = st.button("🔍 Analyze Reviews", disabled=model_provider().state == "failed")
     
     if analyze_button and product_query:
-        if not st.session_state.model_loaded:
-            st.error("Please load the model first from the sidebar!")
-            return
-            
-        try:
-            # Step 1: Scrape reviews
-            with st.spinner("🔍 Scraping reviews..."):
-                scrapped_data = scrape_review(product_query)
-            
-            # if not scrapped_data or not scrapped_data.get("reviews"):
-            #     st.error("No reviews found for this product. Please try a different product name.")
-            #     return
-            if not scrapped_data:
-                st.error("Scraping failed. Check logs or try again.")
-                return
-            
-            # Step 2: Clean and preprocess
-            with st.spinner("🧹 Cleaning and preprocessing reviews..."):
-                cleaned_data = preprocess_reviews(scrapped_data)
-            
-            # Extract cleaned reviews
-            cleaned_reviews = [
-                review.get("cleaned_comment", "")
-                for review in cleaned_data["cleaned_reviews"]
-                if review.get("cleaned_comment", "").strip()  # Only non-empty reviews
-            ]
-            
-            if not cleaned_data.get("cleaned_reviews"):
-                st.error("No valid reviews found after cleaning. Please try a different product.")
-                return
-            
-            # Display product information
-            st.markdown("---")
-            st.markdown("## 📱 Product Information")
-            
-            # Product details card
-            st.markdown(f'''
-            <div class="product-card" style="background-color: black; color: white; padding: 10px; border-radius: 8px; text-align: center;">
-                <h3>🎯 {cleaned_data.get("product", "Unknown Product")}</h3>
-            </div>
-            ''', unsafe_allow_html=True)
-            
-            # Metrics
-            col1, col2, col3, col4 = st.columns(4)
-            
-            with col1:
-                st.markdown("<div style='text-align: center;'>", unsafe_allow_html=True)
-                st.metric(
-                    "⭐ Overall Rating",
-                    f"{cleaned_data.get('overall_rating', 'N/A')}",
-                    help="Average rating of the product"
-                )
-                st.markdown("</div>", unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown("<div style='text-align: center;'>", unsafe_allow_html=True)
-                st.metric(
-                    "📊 Total Ratings",
-                    f"{cleaned_data.get('total_ratings_count', 'N/A'):,}",
-                    help="Total number of ratings"
-                )
-                st.markdown("</div>", unsafe_allow_html=True)
-            
-            with col3:
-                st.markdown("<div style='text-align: center;'>", unsafe_allow_html=True)
-                st.metric(
-                    "📝 Initial Reviews",
-                    f"{cleaned_data.get('total_initial_review_count', 'N/A')}",
-                    help="Number of reviews scraped"
-                )
-                st.markdown("</div>", unsafe_allow_html=True)
-            
-            # with col4:
-            #     st.metric(
-            #         "✅ Final Reviews",
-            #         f"{cleaned_data.get('total_final_review_count', len(cleaned_reviews))}",
-            #         help="Number of reviews after cleaning"
-                
-            
-            # Step 3: Generate summary
-            with st.spinner("🤖 Generating AI summary..."):
-                list_of_combined_reviews_by_block = block_reviews(
-                    cleaned_reviews, 
-                    st.session_state.tokenizer
-                )
-                
-                final_summary = chunk_and_summarize(
-                    list_of_combined_reviews_by_block,
-                    st.session_state.model,
-                    st.session_state.tokenizer,
-                    st.session_state.device
-                )
-            
-            # Display summary
-            # st.markdown("---")
-            # st.markdown("## 📋 AI-Generated Summary")
-            
-            # st.markdown(f'''
-            # <div class="summary-card">
-            #     <h4>🎯 Review Summary</h4>
-            #     <p style="font-size: 1.1rem;background-color: black; color: white; line-height: 1.6; margin-top: 1rem;">
-            #         {final_summary}
-            #     </p>
-            # </div>
-            # ''', unsafe_allow_html=True)
-            st.markdown("---")
-            st.markdown(
-                f"""
-                <div class="summary-card" style="background-color: black; color: white; padding: 15px; border-radius: 8px;">
-                    <h2>📋 AI-Generated Summary</h2>
-                    <h4>🎯 Review Summary</h4>
-                    <p style="font-size: 1.1rem; line-height: 1.6; margin-top: 1rem;">
-                        {final_summary}
-                    </p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
 
-            
-            
-            # Additional information
-            with st.expander("📊 View Additional Details"):
-                st.json({
-                    "product": cleaned_data.get("product", "Unknown"),
-                    "total_initial_review_count": cleaned_data.get("total_initial_review_count", 0),
-                    # "total_final_review_count": cleaned_data.get("total_final_review_count", len(cleaned_reviews)),
-                    "overall_rating": cleaned_data.get("overall_rating", 0),
-                    "total_ratings_count": cleaned_data.get("total_ratings_count", 0),
-                    "summary_length": len(final_summary.split()),
-                    "chunks_processed": len(list_of_combined_reviews_by_block)
-                })
-                
-            st.success("✅ Analysis completed successfully!")
-            
-        except Exception as e:
-            st.error(f"An error occurred: {str(e)}")
+        # Runs in the background; an identical query already in flight is joined instead of re-run
+        job_key = (
+            f"{normalize_query(product_query)}|{st.session_state.scrape_backend}|{st.session_state.decoding_profile}"
+            f"|{st.session_state.max_reviews}|{st.session_state.preselect}|{st.session_state.inference_backend}"
+            f"|{st.session_state.incremental}"
+        )
+        job_id = get_job_manager().submit(
+            job_key,
+            provider_pipeline_job,
+            product_query,
+            model_provider(),
+            description=product_query,
+            streaming=True,  # chunks are summarized while later review pages are still loading
+            stream_fn=partial(
+                scrape_review_stream,
+                backend=st.session_state.scrape_backend,
+                concurrency=st.session_state.scrape_concurrency
+            ),
+            max_reviews=st.session_state.max_reviews,
+            preselect=st.session_state.preselect,
+            scrape_cache=get_scrape_cache(),
+            summary_cache=get_summary_cache(),
+            force_refresh=st.session_state.force_refresh,
+            review_store=get_review_store() if st.session_state.incremental else None,
+            checkpoints=get_run_checkpoints(),
+            run_id=checkpoint_run_id(product_query, job=job_key),  # one checkpoint per distinct job
+            batch_size=st.session_state.generate_batch_size,
+            profile=st.session_state.decoding_profile,
+            decoding_stats=get_decoding_stats(),
+        )
+        st.session_state.job_id = job_id
+        st.query_params["job"] = job_id  # lets a refreshed or reconnected page pick the job up again
+
+    job_id = st.session_state.get("job_id") or st.query_params.get("job")
+    if job_id:
+        render_job(job_id)
+
+
+def render_job(job_id):
+    """Show progress, partial results and finally the summary of a background job"""
+    job = get_job_manager().get(job_id)
+    if job is None:
+        st.warning("This analysis is no longer available. Please run it again.")
+        st.session_state.pop("job_id", None)
+        st.query_params.pop("job", None)
+        return
+
+    partial_results = job["partial"]
+    scrape_info = partial_results.get("scrape_info")
+    if scrape_info and (scrape_info["cached"] or scrape_info["coalesced"]):
+        st.info(f"🗂️ Using reviews cached {scrape_info['age_seconds'] // 60:.0f} minutes ago. "
+                "Tick 'Force refresh' in the sidebar to scrape again.")
+
+    if job["status"] == FAILED:
+        st.error(f"An error occurred: {job['error']}")
+        if job["error_type"] != "PipelineError":
             st.error("Please check your internet connection and try again.")
+            st.info("♻️ The reviews and chunk summaries collected so far are saved: "
+                    "analyzing this product again resumes where it stopped.")
+        return
+
+    if "product" in partial_results:
+        render_product_info(partial_results["product"])
+    if partial_results.get("insights"):
+        render_insights(partial_results["insights"])
+
+    if job["status"] != DONE:
+        st.markdown("---")
+        st.progress(job["progress"], text=f"{job['description']}: {job['message']}")
+        if partial_results.get("chunk_summaries"):
+            with st.expander(f"🧩 Chunk summaries so far ({len(partial_results['chunk_summaries'])})"):
+                for chunk_summary in partial_results["chunk_summaries"]:
+                    st.markdown(f"- {chunk_summary}")
+        time.sleep(JOB_POLL_SECONDS)
+        st.rerun()
+
+    result = job["result"]
+    final_summary = result["summary"]
+
+    # Display summary
+    # st.markdown("---")
+    # st.markdown("## 📋 AI-Generated Summary")
+
+    # st.markdown(f'''
+    # <div class="summary-card">
+    #     <h4>🎯 Review Summary</h4>
+    #     <p style="font-size: 1.1rem;background-color: black; color: white; line-height: 1.6; margin-top: 1rem;">
+    #         {final_summary}
+    #     </p>
+    # </div>
+    # ''', unsafe_allow_html=True)
+    st.markdown("---")
+    st.markdown(
+        f"""
+        <div class="summary-card" style="background-color: black; color: white; padding: 15px; border-radius: 8px;">
+            <h2>📋 AI-Generated Summary</h2>
+            <h4>🎯 Review Summary</h4>
+            <p style="font-size: 1.1rem; line-height: 1.6; margin-top: 1rem;">
+                {final_summary}
+            </p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+
+
+
+    # Additional information
+    with st.expander("📊 View Additional Details"):
+        st.json({
+            "product": result.get("product", "Unknown"),
+            "total_initial_review_count": result.get("total_initial_review_count", 0),
+            # "total_final_review_count": result.get("total_final_review_count", 0),
+            "overall_rating": result.get("overall_rating", 0),
+            "total_ratings_count": result.get("total_ratings_count", 0),
+            "summary_length": result["summary_length"],
+            "chunks_processed": result["chunks_processed"],
+            "chunk_fill_ratios": result["chunk_fill_ratios"],
+            "first_summary_seconds": result.get("first_summary_seconds"),
+            "decoding_profile": result.get("decoding_profile"),
+            "selection": result.get("selection"),
+            "reduce_depth": result.get("reduce_depth"),
+            "reduce_levels": result.get("reduce_levels"),
+            "checkpoint": result.get("checkpoint"),
+            "stage_seconds": job["stage_seconds"],
+            "summary_cache": get_summary_cache().stats()
+        })
+
+    st.success("✅ Analysis completed successfully!")
+
+
+def render_insights(insights):
+    """Rating histogram, sentiment, aspects and telling terms (review_insights, shown before the summary)"""
+    import pandas as pd
+
+    st.markdown("### 🔎 Review Insights")
+    st.caption(f"Straight from {insights['scraped_reviews']} scraped / {insights['cleaned_reviews']} cleaned reviews, "
+               "no AI model involved")
+    col1, col2 = st.columns(2)
+    with col1:
+        histogram = insights["rating_histogram"]
+        st.bar_chart(pd.DataFrame({"Reviews": list(histogram.values())}, index=[f"{stars}★" for stars in histogram]))
+        if insights["mean_rating"] is not None:
+            st.caption(f"Mean rating of the scraped reviews: {insights['mean_rating']}★")
+    with col2:
+        sentiment = insights["sentiment"]
+        if sentiment:
+            st.metric("👍 Positive reviews", f"{sentiment['positive']:.0%}")
+            st.metric("👎 Negative reviews", f"{sentiment['negative']:.0%}")
+        praised = ", ".join(term["term"] for term in insights["praised_terms"])
+        criticized = ", ".join(term["term"] for term in insights["criticized_terms"])
+        if praised:
+            st.markdown(f"**In high-rated reviews:** {praised}")
+        if criticized:
+            st.markdown(f"**In low-rated reviews:** {criticized}")
+    if insights["aspects"]:
+        st.dataframe(
+            pd.DataFrame(insights["aspects"]).rename(columns={
+                "aspect": "Aspect", "mentions": "Mentions", "share": "Share of reviews", "mean_rating": "Mean rating",
+                "sentiment": "Sentiment", "negative_share": "Negative share",
+            }),
+            hide_index=True, use_container_width=True
+        )
+
+
+def render_product_info(cleaned_data):
+    # Display product information
+    st.markdown("---")
+    st.markdown("## 📱 Product Information")
+
+    # Product details card
+    st.markdown(f'''
+    <div class="product-card" style="background-color: black; color: white; padding: 10px; border-radius: 8px; text-align: center;">
+        <h3>🎯 {cleaned_data.get("product", "Unknown Product")}</h3>
+    </div>
+    ''', unsafe_allow_html=True)
+
+    # Metrics
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.markdown("<div style='text-align: center;'>", unsafe_allow_html=True)
+        st.metric(
+            "⭐ Overall Rating",
+            f"{cleaned_data.get('overall_rating', 'N/A')}",
+            help="Average rating of the product"
+        )
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col2:
+        st.markdown("<div style='text-align: center;'>", unsafe_allow_html=True)
+        st.metric(
+            "📊 Total Ratings",
+            f"{cleaned_data.get('total_ratings_count', 'N/A'):,}",
+            help="Total number of ratings"
+        )
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    with col3:
+        st.markdown("<div style='text-align: center;'>", unsafe_allow_html=True)
+        st.metric(
+            "📝 Initial Reviews",
+            f"{cleaned_data.get('total_initial_review_count', 'N/A')}",
+            help="Number of reviews scraped"
+        )
+        st.markdown("</div>", unsafe_allow_html=True)
+
+    # with col4:
+    #     st.metric(
+    #         "✅ Final Reviews",
+    #         f"{cleaned_data.get('total_final_review_count', len(cleaned_reviews))}",
+    #         help="Number of reviews after cleaning"
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
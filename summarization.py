@@ -0,0 +1,418 @@
+import os
+import random
+import re
+import time
+
+import tracing
+from summary_cache import model_revision, summary_key
+
+# Generation settings for the per-chunk (map) pass and the final (reduce) pass
+MAP_GENERATE_KWARGS = {
+    "max_new_tokens": 150,
+    "min_length": 70,
+    "length_penalty": 1.0,
+    "num_beams": 6,
+    "early_stopping": True,
+}
+
+REDUCE_GENERATE_KWARGS = {
+    "max_new_tokens": 250,
+    "min_length": 100,
+    "length_penalty": 1.5,
+    "num_beams": 7,
+    "early_stopping": True,
+}
+
+# Named decoding profiles: generate kwargs for the map pass (chunk summaries, never shown on their
+# own) and the reduce pass (the summary users read). "quality" is the original configuration.
+DECODING_PROFILES = {
+    "fast": {
+        "map": {"max_new_tokens": 100, "min_length": 40, "length_penalty": 1.0, "num_beams": 2, "early_stopping": True},
+        "reduce": {"max_new_tokens": 250, "min_length": 100, "length_penalty": 1.5, "num_beams": 4, "early_stopping": True},
+    },
+    "balanced": {
+        "map": {"max_new_tokens": 120, "min_length": 50, "length_penalty": 1.0, "num_beams": 4, "early_stopping": True},
+        "reduce": {"max_new_tokens": 250, "min_length": 100, "length_penalty": 1.5, "num_beams": 6, "early_stopping": True},
+    },
+    "quality": {
+        "map": MAP_GENERATE_KWARGS,
+        "reduce": REDUCE_GENERATE_KWARGS,
+    },
+}
+DEFAULT_PROFILE = "quality"
+
+# Relative to the working directory or the repo, see model_provider.resolve_model_dir
+MODEL_DIR = os.environ.get("REVIEW_MODEL_DIR") or "Tuned_model_files"
+
+MAX_INPUT_TOKENS = 1024
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+
+# Fixed seed so the same product always yields the same chunk order (and cache keys)
+SHUFFLE_SEED = 42
+
+# Chunk summaries longer than this (in words) are summarized again
+REDUCE_THRESHOLD_WORDS = 250
+
+
+def load_model(model_dir=MODEL_DIR, backend="torch"):
+    """Load the fine-tuned BART model and fast tokenizer onto the GPU if there is one, else CPU.
+
+    backend="int8" or "onnx" loads a CPU-optimized variant (see inference_backends), falling back to
+    this fp32 model if it cannot be loaded; model.inference_backend says which one is in use. On CPU
+    the safetensors weights are memory-mapped (model.weights_source == "mmap"), see model_provider.
+    Use model_provider.get_provider to share one model across the process.
+    """
+    import torch
+    from transformers import BartForConditionalGeneration, BartTokenizerFast
+
+    from model_provider import WEIGHTS_FILE, load_model_mmap, resolve_model_dir
+
+    model_dir = resolve_model_dir(model_dir)
+    with tracing.span("model.load", model_dir=str(model_dir), backend=backend) as span:
+        if backend != "torch":
+            from inference_backends import load_backend_model
+            try:
+                return load_backend_model(model_dir, backend)
+            except Exception as e:
+                span.set(fallback="torch")
+                print(f"⚠️ Could not load the {backend} backend ({e}), falling back to the fp32 model")
+
+        tokenizer = BartTokenizerFast.from_pretrained(model_dir)
+        device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        model = None
+        if device.type == "cpu" and (model_dir / WEIGHTS_FILE).exists():
+            try:
+                model = load_model_mmap(model_dir)
+                model.weights_source = "mmap"
+            except Exception as e:
+                print(f"⚠️ Could not memory-map the weights ({e}), loading them normally")
+        if model is None:
+            model = BartForConditionalGeneration.from_pretrained(model_dir)
+            model.weights_source = "loaded"
+        model.to(device)
+        model.eval()
+        span.set(weights=model.weights_source)
+        return model, tokenizer, device
+
+
+def decoding_profile(name):
+    """The {"map": ..., "reduce": ...} generate kwargs of a named profile"""
+    if name not in DECODING_PROFILES:
+        raise ValueError(f"Unknown decoding profile: {name!r} (expected one of {tuple(DECODING_PROFILES)})")
+    return DECODING_PROFILES[name]
+
+
+def cache_revision(model):
+    """SummaryCache revision of a loaded model: its weights plus the inference backend, since int8 and
+    ONNX summaries are not identical to fp32 ones"""
+    revision = model_revision(getattr(model, "source_model_dir", None) or model.name_or_path)
+    backend = getattr(model, "inference_backend", "torch")
+    return revision if backend == "torch" else f"{revision}:{backend}"
+
+
+def _no_grad():
+    import torch
+    return torch.no_grad()
+
+
+def _empty_cuda_cache():
+    import torch
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+def generate_from_ids(input_ids_list, model, tokenizer, device, batch_size=4, progress_callback=None, on_batch=None, **generate_kwargs):
+    """Run model.generate over token-id lists in micro-batches, returning summaries in input order.
+
+    on_batch(indices, summaries) is called as each micro-batch finishes, with the input positions
+    it covered. If a batching_server.BatchingServer runs for model, the inputs are queued there
+    instead and batched with those of every other caller (batch_size is then the server's).
+    """
+    server = getattr(model, "batching_server", None)
+    if server is not None and input_ids_list:
+        return server.generate(input_ids_list, progress_callback=progress_callback, on_batch=on_batch, **generate_kwargs)
+    return generate_batches(
+        input_ids_list, model, tokenizer, device,
+        batch_size=batch_size, progress_callback=progress_callback, on_batch=on_batch, **generate_kwargs
+    )
+
+
+def generate_batches(input_ids_list, model, tokenizer, device, batch_size=4, progress_callback=None, on_batch=None, **generate_kwargs):
+    """generate_from_ids on the calling thread, never through a batching server"""
+    summaries = [None] * len(input_ids_list)
+    if not input_ids_list:
+        return summaries
+
+    batch_size = max(1, int(batch_size))
+
+    # Longest first so that every micro-batch holds inputs of similar length (less padding)
+    order = sorted(range(len(input_ids_list)), key=lambda i: len(input_ids_list[i]), reverse=True)
+
+    done = 0
+    for start in range(0, len(order), batch_size):
+        batch_idx = order[start:start + batch_size]
+        batch = tokenizer.pad(
+            {"input_ids": [list(input_ids_list[i]) for i in batch_idx]},
+            padding=True,
+            return_tensors="pt",
+        )
+        batch = {key: val.to(device) for key, val in batch.items()}
+
+        with tracing.span(
+            "generate.batch", chunks=len(batch_idx), input_tokens=sum(len(input_ids_list[i]) for i in batch_idx),
+            num_beams=generate_kwargs.get("num_beams"),
+        ) as span:
+            with _no_grad():
+                summary_ids = model.generate(
+                    input_ids=batch["input_ids"],
+                    attention_mask=batch["attention_mask"],
+                    eos_token_id=tokenizer.eos_token_id,
+                    **generate_kwargs
+                )
+            span.set(output_tokens=int(summary_ids.shape[0] * summary_ids.shape[1]))
+        if span.seconds is not None:
+            tracing.observe("generate_seconds_per_chunk", span.seconds / len(batch_idx))
+
+        decoded = tokenizer.batch_decode(summary_ids, skip_special_tokens=True)
+        for i, summary in zip(batch_idx, decoded):
+            summaries[i] = summary
+        if on_batch is not None:
+            on_batch(batch_idx, decoded)
+
+        done += len(batch_idx)
+        if progress_callback is not None:
+            progress_callback(done, len(input_ids_list))
+
+    return summaries
+
+
+def generate_summaries(texts, model, tokenizer, device, batch_size=4, progress_callback=None, **generate_kwargs):
+    """Tokenize texts and summarize them with batched generation (see generate_from_ids)"""
+    input_ids_list = tokenizer(list(texts), max_length=MAX_INPUT_TOKENS, truncation=True)["input_ids"]
+    return generate_from_ids(
+        input_ids_list, model, tokenizer, device,
+        batch_size=batch_size, progress_callback=progress_callback, **generate_kwargs
+    )
+
+
+def cached_generate_summaries(texts, model, tokenizer, device, cache=None, revision="", batch_size=4, progress_callback=None, input_ids_list=None, on_generated=None, **generate_kwargs):
+    """Like generate_summaries, but serve texts already summarized with the same model revision and
+    generation parameters from a SummaryCache and only generate the misses.
+
+    If input_ids_list is given (one token-id list per text, e.g. from block_reviews), the misses are
+    generated from those ids instead of re-tokenizing the texts. on_generated(summaries, seconds) is
+    called with whatever had to be generated (not with cache hits). Misses are put in the cache as
+    each micro-batch finishes, so a call that fails half way keeps what it already generated.
+    """
+    texts = list(texts)
+    if input_ids_list is None:
+        input_ids_list = tokenizer(texts, max_length=MAX_INPUT_TOKENS, truncation=True)["input_ids"]
+
+    def generate(ids_list, on_batch=None):
+        started = time.perf_counter()
+        summaries = generate_from_ids(
+            ids_list, model, tokenizer, device,
+            batch_size=batch_size, progress_callback=progress_callback, on_batch=on_batch, **generate_kwargs
+        )
+        if on_generated is not None and summaries:
+            on_generated(summaries, time.perf_counter() - started)
+        return summaries
+
+    if cache is None:
+        return generate(input_ids_list)
+
+    keys = [summary_key(text, revision, generate_kwargs) for text in texts]
+    cached = cache.get_many(keys)
+
+    # Identical chunks within one request are generated once
+    missing = {}
+    for index, key in enumerate(keys):
+        if key not in cached and key not in missing:
+            missing[key] = index
+
+    if missing:
+        missing_keys = list(missing)
+
+        def put_batch(indices, summaries):
+            cache.put_many({missing_keys[i]: summary for i, summary in zip(indices, summaries)})
+
+        generated = generate([input_ids_list[i] for i in missing.values()], on_batch=put_batch)
+        cached.update(zip(missing_keys, generated))
+    elif progress_callback is not None:
+        progress_callback(len(texts), len(texts))
+
+    return [cached[key] for key in keys]
+
+
+def tokenize_reviews(reviews, tokenizer):
+    """Token ids of every review in one batched call, encoded as they appear inside a chunk
+    (space-separated, no special tokens) so they can be concatenated directly"""
+    if not reviews:
+        return []
+    with tracing.span("tokenize", reviews=len(reviews)):
+        return tokenizer([" " + review for review in reviews], add_special_tokens=False)["input_ids"]
+
+
+def split_oversized(text, text_ids, tokenizer, budget):
+    """Split a review (or summary) longer than the budget at sentence boundaries into
+    (text, ids) pieces that fit.
+
+    Only a single sentence longer than the whole budget is cut at a token boundary.
+    """
+    sentences = SENTENCE_SPLIT_RE.split(text)
+    sentence_ids = tokenize_reviews(sentences, tokenizer)
+    pieces = []
+    text_parts, ids = [], []
+    for sentence, ids_part in zip(sentences, sentence_ids):
+        if ids and len(ids) + len(ids_part) > budget:
+            pieces.append((" ".join(text_parts), ids))
+            text_parts, ids = [], []
+        while len(ids_part) > budget:
+            head, ids_part = ids_part[:budget], ids_part[budget:]
+            pieces.append((tokenizer.decode(head).strip(), head))
+            sentence = tokenizer.decode(ids_part).strip()
+        text_parts.append(sentence)
+        ids = ids + ids_part
+    if ids:
+        pieces.append((" ".join(text_parts), ids))
+    return pieces
+
+
+def chunk_input_ids(review_token_ids, tokenizer, max_length=MAX_INPUT_TOKENS):
+    """Model input for one chunk: <s> + concatenated review ids + </s>"""
+    ids = [tokenizer.bos_token_id]
+    for review_ids in review_token_ids:
+        ids.extend(review_ids)
+    ids = ids[:max_length - 1]
+    ids.append(tokenizer.eos_token_id)
+    return ids
+
+
+def chunk_and_summarize(combined_reviews, model, tokenizer, device, batch_size=4, cache=None, seed=SHUFFLE_SEED, progress_callback=None, profile=DEFAULT_PROFILE, stats=None, reduce_info=None):
+    """Generate summaries from chunked reviews (block_reviews output).
+
+    profile names the DECODING_PROFILES entry used for the map and reduce passes; stats (a
+    decoding_stats.DecodingStats) records the latency and length of what gets generated.
+    progress_callback(message, fraction, partial=None) is called as chunks finish; partial is
+    {"chunk_summaries": [...]} once the map step is done. Pass a dict as reduce_info to get the
+    shape of the reduce tree (see reduce_summaries).
+    """
+    report = progress_callback or (lambda message, fraction, partial=None: None)
+    summaries = map_chunks(
+        combined_reviews, model, tokenizer, device, batch_size=batch_size, cache=cache, seed=seed,
+        progress_callback=report, profile=profile, stats=stats
+    )
+    final_result = reduce_summaries(
+        summaries, model, tokenizer, device, cache=cache, revision=cache_revision(model) if cache is not None else "",
+        progress_callback=report, profile=profile, stats=stats, batch_size=batch_size, reduce_info=reduce_info
+    )
+
+    _empty_cuda_cache()
+
+    return final_result
+
+
+def map_chunks(combined_reviews, model, tokenizer, device, batch_size=4, cache=None, seed=SHUFFLE_SEED, progress_callback=None, profile=DEFAULT_PROFILE, stats=None):
+    """Map step of chunk_and_summarize: one summary per chunk, in the order the chunks are shuffled into"""
+    report = progress_callback or (lambda message, fraction, partial=None: None)
+    generate_kwargs = decoding_profile(profile)
+    random.Random(seed).shuffle(combined_reviews)
+    revision = cache_revision(model) if cache is not None else ""
+
+    def on_batch(done, total):
+        report(f"Processed {done} of {total} chunks...", done / total)
+
+    # Map step: chunks go through generate together in length-sorted micro-batches
+    report(f"Processing {len(combined_reviews)} chunks...", 0.0)
+    summaries = cached_generate_summaries(
+        [chunk["text"] for chunk in combined_reviews], model, tokenizer, device,
+        cache=cache, revision=revision, batch_size=batch_size, progress_callback=on_batch,
+        input_ids_list=[chunk["input_ids"] for chunk in combined_reviews],
+        on_generated=stats.recorder(profile, "map") if stats is not None else None,
+        **generate_kwargs["map"]
+    ) if combined_reviews else []
+    report(f"Summarized {len(summaries)} chunks", 1.0, {"chunk_summaries": summaries})
+    return summaries
+
+
+def _pack_groups(token_ids_list, budget):
+    """Split consecutive items into groups whose token counts add up to at most budget"""
+    groups, current, used = [], [], 0
+    for index, ids in enumerate(token_ids_list):
+        if current and used + len(ids) > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += len(ids)
+    if current:
+        groups.append(current)
+    return groups
+
+
+def reduce_summaries(summaries, model, tokenizer, device, cache=None, revision="", progress_callback=None, profile=DEFAULT_PROFILE, stats=None, batch_size=4, reduce_info=None):
+    """Reduce step: join chunk summaries and summarize them again if the result is too long.
+
+    When the joined summaries do not fit in one model input, they are reduced as a tree instead of
+    being truncated: summaries are packed into groups that fit the context, every group of a level
+    is summarized in one batched generate call, and this repeats on the results until a single
+    group is left. A summary longer than one model input is split at sentence boundaries first
+    (see split_oversized), so no tokens are dropped. reduce_info (a dict, if given) receives "depth" (generate levels, 0 when no
+    reduce was needed) and "levels" ([{"inputs", "groups", "max_fan_in"}, ...]).
+    """
+    report = progress_callback or (lambda message, fraction, partial=None: None)
+    info = reduce_info if reduce_info is not None else {}
+    info.update(depth=0, levels=[])
+    generate_kwargs = decoding_profile(profile)["reduce"]
+    on_generated = stats.recorder(profile, "reduce") if stats is not None else None
+
+    # Combine and summarize again if needed
+    combined_summary = " ".join(summaries)
+    if len(combined_summary.split()) <= REDUCE_THRESHOLD_WORDS:
+        return combined_summary
+
+    if len(tokenizer(combined_summary)["input_ids"]) <= MAX_INPUT_TOKENS:
+        report("Generating final summary...", 1.0)
+        info.update(depth=1, levels=[{"inputs": len(summaries), "groups": 1, "max_fan_in": len(summaries)}])
+        return cached_generate_summaries(
+            [combined_summary], model, tokenizer, device, cache=cache, revision=revision, batch_size=1,
+            on_generated=on_generated, **generate_kwargs
+        )[0]
+
+    budget = MAX_INPUT_TOKENS - len(chunk_input_ids([], tokenizer))
+    level = list(summaries)
+    while True:
+        level_ids = tokenize_reviews(level, tokenizer)
+        if any(len(ids) > budget for ids in level_ids):
+            pieces = [
+                piece for text, ids in zip(level, level_ids)
+                for piece in (split_oversized(text, ids, tokenizer, budget) if len(ids) > budget else [(text, ids)])
+            ]
+            level, level_ids = [text for text, _ in pieces], [ids for _, ids in pieces]
+        groups = _pack_groups(level_ids, budget)
+        # Generated summaries are shorter than their inputs, so only later levels can stop shrinking
+        if info["depth"] and len(groups) == len(level) > 1:
+            raise RuntimeError("Reduce inputs are too long to be combined without truncation")
+        info["depth"] += 1
+        info["levels"].append({
+            "inputs": len(level),
+            "groups": len(groups),
+            "max_fan_in": max(len(group) for group in groups),
+        })
+        report(f"Reducing level {info['depth']}: {len(level)} summaries in {len(groups)} groups...", 1.0)
+        level = cached_generate_summaries(
+            [" ".join(level[i] for i in group) for group in groups], model, tokenizer, device,
+            cache=cache, revision=revision, batch_size=batch_size, on_generated=on_generated,
+            input_ids_list=[chunk_input_ids([level_ids[i] for i in group], tokenizer) for group in groups],
+            **generate_kwargs
+        )
+        if len(level) == 1:
+            return level[0]
+
+
+def shuffle_like_chunks(items, seed=SHUFFLE_SEED):
+    """Put per-chunk items (e.g. summaries in arrival order) in the order chunk_and_summarize
+    shuffles its chunks into, so streamed runs reduce the same way"""
+    items = list(items)
+    random.Random(seed).shuffle(items)
+    return items
@@ -0,0 +1,201 @@
+"""Bulk, headless product review summarization.
+
+    # product names, one per line (lines starting with # are ignored)
+    python summarize_cli.py --queries products.txt --output summaries.jsonl --workers 4
+
+    # pre-scraped scrape_review output: a .json file (one dict or a list), a .jsonl file or a directory of .json files
+    python summarize_cli.py --scraped archive/ --output summaries.jsonl
+
+Products already summarized in the output file are skipped, so an interrupted run can simply be
+started again with the same arguments; a product that failed half way resumes from its checkpoint
+(the pages and chunk summaries it got to, see run_checkpoint.py) unless --no-checkpoints is given. The workers' generate calls are batched together (see
+batching_server.py). A throughput report is printed at the end.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from pathlib import Path
+
+import tracing
+from batching_server import DEFAULT_MAX_WAIT_MS
+from decoding_stats import DecodingStats
+from inference_backends import BACKENDS
+from model_provider import get_provider
+from pipeline import PipelineError, run_pipeline, run_streaming_pipeline
+from review_store import ReviewStore
+from run_checkpoint import RunCheckpoints
+from scrape_cache import ScrapeCache, normalize_query
+from scrapping_http import MAX_REVIEWS
+from scrapping_new import SCRAPE_BACKENDS, scrape_review, scrape_review_stream
+from summarization import DECODING_PROFILES, DEFAULT_PROFILE, MODEL_DIR
+from summary_cache import SummaryCache
+
+
+def read_queries(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield {"query": line}
+
+
+def _scraped_items(data):
+    for entry in data if isinstance(data, list) else [data]:
+        yield {"query": entry["search_query"], "scrapped_data": entry}
+
+
+def read_scraped(path):
+    path = Path(path)
+    files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+    for file in files:
+        if file.suffix == ".jsonl":
+            with open(file, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield from _scraped_items(json.loads(line))
+        else:
+            with open(file, encoding="utf-8") as f:
+                yield from _scraped_items(json.load(f))
+
+
+def completed_keys(output_path):
+    """Keys of products already summarized successfully in an existing output file"""
+    done = set()
+    if not Path(output_path).exists():
+        return done
+    with open(output_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut short by an interrupted run
+            if record.get("status") == "ok":
+                done.add(normalize_query(record["query"]))
+    return done
+
+
+def summarize_item(item, model, tokenizer, device, model_lock, scrape_fn=scrape_review, stream_fn=None, **pipeline_options):
+    """Run one product through the pipeline (streaming when it has to be scraped and stream_fn is
+    given) and return its output record"""
+    started = time.perf_counter()
+    record = {"query": item["query"]}
+    try:
+        if item.get("scrapped_data") is None and stream_fn is not None:
+            result = run_streaming_pipeline(
+                item["query"], model, tokenizer, device, stream_fn=stream_fn, model_lock=model_lock, **pipeline_options
+            )
+        else:
+            result = run_pipeline(
+                item["query"], model, tokenizer, device, scrape_fn=scrape_fn,
+                scrapped_data=item.get("scrapped_data"), model_lock=model_lock, **pipeline_options
+            )
+        record.update(status="ok", **result)
+    except PipelineError as e:
+        record.update(status="skipped", error=str(e))
+    except Exception as e:
+        record.update(status="error", error=f"{e.__class__.__name__}: {e}")
+    record["seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--queries", help="text file with one product query per line")
+    source.add_argument("--scraped", help="scrape_review output: .json, .jsonl or a directory of .json files")
+    parser.add_argument("--output", required=True, help="JSONL file summaries are appended to")
+    parser.add_argument("--workers", type=int, default=2, help="products processed in parallel (their chunks share generate batches)")
+    parser.add_argument("--model-dir", default=MODEL_DIR)
+    parser.add_argument("--batch-size", type=int, default=4, help="chunks per generate call")
+    parser.add_argument("--batch-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="how long a queued chunk waits for chunks of other workers to batch with")
+    parser.add_argument("--no-dynamic-batching", action="store_true",
+                        help="generate each product's chunks on its own, one product at a time")
+    parser.add_argument("--profile", choices=DECODING_PROFILES, default=DEFAULT_PROFILE, help="decoding profile")
+    parser.add_argument("--inference-backend", choices=BACKENDS, default="torch", help="see inference_backends.py")
+    parser.add_argument("--backend", choices=SCRAPE_BACKENDS, default="http")
+    parser.add_argument("--concurrency", type=int, default=4, help="review pages fetched in parallel per product")
+    parser.add_argument("--max-reviews", type=int, default=MAX_REVIEWS, help="reviews scraped per product")
+    parser.add_argument("--no-cache", action="store_true", help="do not use the scrape and summary caches")
+    parser.add_argument("--no-stream", action="store_true", help="scrape every page before cleaning and summarizing")
+    parser.add_argument("--incremental", action="store_true",
+                        help="only summarize reviews newer than the ones stored by earlier runs (see review_store.py)")
+    parser.add_argument("--no-checkpoints", action="store_true",
+                        help="do not save the pages and chunk summaries of a product as it goes, nor resume failed ones")
+    parser.add_argument("--no-preselect", action="store_true", help="keep near-duplicate reviews")
+    parser.add_argument("--select-max-chunks", type=int,
+                        help="only summarize the most representative reviews that fill this many model inputs (default: all)")
+    parser.add_argument("--trace", action="store_true", help="log timed spans of every stage (see tracing.py)")
+    parser.add_argument("--trace-log", help="file for the span log (default: stderr)")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port while running")
+    args = parser.parse_args(argv)
+    if args.trace or args.metrics_port:
+        tracing.enable(log_file=args.trace_log)
+    if args.metrics_port:
+        tracing.serve_metrics(args.metrics_port)
+    # The model loads in the background while the inputs are read and the caches opened
+    batching = False if args.no_dynamic_batching else {"max_batch_size": args.batch_size, "max_wait_ms": args.batch_wait_ms}
+    provider = get_provider(args.inference_backend, args.model_dir, batching=batching)
+
+    items = list(read_queries(args.queries) if args.queries else read_scraped(args.scraped))
+    done = completed_keys(args.output)
+    pending = [item for item in items if normalize_query(item["query"]) not in done]
+    print(f"{len(items)} products, {len(items) - len(pending)} already summarized, {len(pending)} to go", file=sys.stderr)
+    if not pending:
+        return 0
+
+    pipeline_options = {
+        "scrape_fn": partial(scrape_review, backend=args.backend, concurrency=args.concurrency),
+        "stream_fn": None if args.no_stream else partial(
+            scrape_review_stream, backend=args.backend, concurrency=args.concurrency
+        ),
+        "scrape_cache": None if args.no_cache else ScrapeCache(),
+        "summary_cache": None if args.no_cache else SummaryCache(),
+        "batch_size": args.batch_size,
+        "profile": args.profile,
+        "decoding_stats": DecodingStats(),
+        "max_reviews": args.max_reviews,
+        "preselect": not args.no_preselect,
+        "select_max_chunks": args.select_max_chunks,
+        "review_store": ReviewStore() if args.incremental else None,
+        "checkpoints": None if args.no_checkpoints else RunCheckpoints(),
+    }
+    model, tokenizer, device = provider.get()
+    # Without the batching server, workers take turns on the model
+    model_lock = threading.Lock() if provider.batching_server is None else None
+
+    counts = {"ok": 0, "skipped": 0, "error": 0}
+    chunks = 0
+    started = time.perf_counter()
+    with open(args.output, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(summarize_item, item, model, tokenizer, device, model_lock, **pipeline_options)
+            for item in pending
+        ]
+        for n, future in enumerate(as_completed(futures), 1):
+            record = future.result()
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            counts[record["status"]] += 1
+            chunks += record.get("chunks_processed", 0)
+            print(f"[{n}/{len(pending)}] {record['status']:7} {record['query']} ({record['seconds']}s)", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    report = {
+        **counts,
+        "seconds": round(elapsed, 1),
+        "products_per_min": round(len(pending) / elapsed * 60, 2),
+        "chunks": chunks,
+        "chunks_per_sec": round(chunks / elapsed, 3),
+        "model": {key: value for key, value in provider.status().items() if key not in ("state", "error")},
+    }
+    print(json.dumps(report), file=sys.stderr)
+    return 0 if counts["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent / ".cache" / "summary_cache.sqlite3"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Files that identify a model revision; weights are fingerprinted by size + sampled content
+_CONFIG_FILES = ("config.json", "generation_config.json")
+_WEIGHT_FILES = ("model.safetensors", "pytorch_model.bin")
+_SAMPLE_BYTES = 1024 * 1024
+
+_revision_memo = {}
+
+
+def _weights_fingerprint(path, digest):
+    size = path.stat().st_size
+    digest.update(f"{path.name}:{size}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(_SAMPLE_BYTES))
+        if size > 2 * _SAMPLE_BYTES:
+            f.seek(size // 2)
+            digest.update(f.read(_SAMPLE_BYTES))
+            f.seek(-_SAMPLE_BYTES, 2)
+            digest.update(f.read(_SAMPLE_BYTES))
+
+
+def model_revision(model_dir):
+    """Short hash of the model config and weights in model_dir (memoised per process)"""
+    model_dir = Path(model_dir).resolve()
+    if model_dir in _revision_memo:
+        return _revision_memo[model_dir]
+
+    digest = hashlib.sha256()
+    for name in _CONFIG_FILES + _WEIGHT_FILES:
+        path = model_dir / name
+        if not path.exists():
+            continue
+        if name in _WEIGHT_FILES:
+            _weights_fingerprint(path, digest)
+        else:
+            digest.update(name.encode())
+            digest.update(path.read_bytes())
+
+    revision = digest.hexdigest()[:16]
+    _revision_memo[model_dir] = revision
+    return revision
+
+
+def summary_key(text, revision, generate_kwargs):
+    """Content address of one summary: input text + model revision + generation parameters"""
+    digest = hashlib.sha256()
+    digest.update(revision.encode())
+    digest.update(json.dumps(generate_kwargs, sort_keys=True).encode())
+    digest.update(b"\0")
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class SummaryCache:
+    """Persistent, size-bounded LRU cache of generated summaries (SQLite)"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " key TEXT PRIMARY KEY,"
+                " summary TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON summaries(last_access)")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get_many(self, keys):
+        """Return {key: summary} for the keys that are cached, refreshing their LRU position"""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        found = {}
+        with self._lock, self._connect() as conn:
+            for start in range(0, len(keys), 500):
+                part = keys[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT key, summary FROM summaries WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                conn.executemany("UPDATE summaries SET last_access = ? WHERE key = ?", [(now, k) for k in found])
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Store {key: summary} and evict least recently used entries above max_bytes"""
+        if not items:
+            return
+        now = time.time()
+        rows = [(k, v, len(v.encode("utf-8")), now) for k, v in items.items()]
+        with self._lock, self._connect() as conn:
+            conn.executemany("INSERT OR REPLACE INTO summaries VALUES (?, ?, ?, ?)", rows)
+            self._evict(conn)
+
+    def put(self, key, summary):
+        self.put_many({key: summary})
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM summaries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        doomed = []
+        for key, size in conn.execute("SELECT key, size FROM summaries ORDER BY last_access"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM summaries WHERE key = ?", doomed)
+
+    def stats(self):
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM summaries").fetchone()
+        return {"entries": entries, "bytes": size, "hits": self.hits, "misses": self.misses}
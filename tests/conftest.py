@@ -0,0 +1,16 @@
+import sys
+from pathlib import Path
+
+# The modules live at the repository root
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def tokenizer():
+    """The tuned model's tokenizer (checked in without the weights)"""
+    from transformers import BartTokenizerFast
+
+    return BartTokenizerFast.from_pretrained(REPO_ROOT / "Tuned_model_files")
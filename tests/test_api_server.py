@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from api_server import SummarizationAPI
+from jobs import JobManager
+from run_checkpoint import RunCheckpoints
+
+
+class _WaitingProvider:
+    """Never finishes loading while the test runs, so submitted jobs stay active"""
+
+    def __init__(self):
+        self.loaded = threading.Event()
+
+    def ready(self):
+        return False
+
+    def get(self):
+        self.loaded.wait()
+        raise RuntimeError("no model in tests")
+
+
+@pytest.fixture
+def api(tmp_path):
+    api = SummarizationAPI.__new__(SummarizationAPI)  # without loading a model
+    api.provider = _WaitingProvider()
+    api.jobs = JobManager(max_workers=2)
+    api.model_lock = None
+    api.stream_fn = None
+    api.backend = "http"
+    api.batch_size = 4
+    api.scrape_cache = None
+    api.summary_cache = None
+    api.decoding_stats = None
+    api.review_store = None
+    api.checkpoints = RunCheckpoints(path=tmp_path / "checkpoints.sqlite3")
+    yield api
+    api.provider.loaded.set()
+    api.jobs.shutdown(wait=True)
+
+
+def _scraped(*comments):
+    return {
+        "search_query": "acme phone",
+        "total_reviews": len(comments),
+        "Overall_rating": "4.2",
+        "Total_ratings": "1,024 Ratings &",
+        "reviews": [{"User_Rating": "5", "Title": "Wonderful", "Comment": comment} for comment in comments],
+    }
+
+
+def test_different_scraped_payloads_for_one_query_are_different_jobs(api):
+    first = api.submit({"scraped": _scraped("Great battery life, lasts two days")})
+    second = api.submit({"scraped": _scraped("Camera is blurry in low light")})
+    assert first != second
+
+
+def test_same_scraped_payload_joins_the_running_job(api):
+    payload = _scraped("Great battery life, lasts two days", "Camera is blurry in low light")
+    first = api.submit({"scraped": payload})
+    reordered = {**payload, "reviews": payload["reviews"][::-1]}
+    assert api.submit({"scraped": reordered}) == first
@@ -0,0 +1,18 @@
+from benchmarks.common import synthetic_reviews
+from review_selection import select_reviews
+
+
+def test_no_budget_keeps_every_distinct_review(tokenizer):
+    reviews = synthetic_reviews(300, seed=1)
+    kept, info = select_reviews(reviews, tokenizer, dedupe=False)
+    assert kept == reviews
+    assert info["ranked_out"] == 0
+    assert info["max_tokens"] is None
+
+
+def test_budget_counts_the_reviews_it_drops(tokenizer):
+    reviews = synthetic_reviews(300, seed=1)
+    kept, info = select_reviews(reviews, tokenizer, max_tokens=2000, dedupe=False)
+    assert info["tokens_out"] <= 2000
+    assert info["ranked_out"] == len(reviews) - len(kept) > 0
+    assert info["reviews_out"] == len(kept)
@@ -0,0 +1,27 @@
+import time
+
+import run_checkpoint
+from run_checkpoint import CLAIM_SECONDS, RunCheckpoints
+
+
+def test_saving_an_artifact_keeps_the_claim(tmp_path, monkeypatch):
+    checkpoints = RunCheckpoints(tmp_path / "checkpoints.sqlite3")
+    now = time.time()
+    monkeypatch.setattr(run_checkpoint.time, "time", lambda: now)
+    assert checkpoints.open("run", "query") is not None
+
+    # A long stage: the claim would lapse by now without the save in between
+    now += CLAIM_SECONDS - 60
+    checkpoints.save_artifact("run", "cleaned", {"cleaned_reviews": []})
+    now += 120
+    assert checkpoints.open("run", "query") is None
+
+
+def test_claim_lapses_without_writes(tmp_path, monkeypatch):
+    checkpoints = RunCheckpoints(tmp_path / "checkpoints.sqlite3")
+    now = time.time()
+    monkeypatch.setattr(run_checkpoint.time, "time", lambda: now)
+    assert checkpoints.open("run", "query") is not None
+
+    now += CLAIM_SECONDS + 60
+    assert checkpoints.open("run", "query")["resumed"]
@@ -0,0 +1,22 @@
+import summarization
+from benchmarks.common import synthetic_reviews
+from summarization import MAX_INPUT_TOKENS, reduce_summaries, tokenize_reviews
+
+
+def test_reduce_splits_a_summary_longer_than_one_input(tokenizer, monkeypatch):
+    inputs = []
+
+    def fake_generate(texts, model, tokenizer, device, input_ids_list=None, **kwargs):
+        inputs.extend(input_ids_list)
+        return [f"summary {len(inputs)}." for _ in texts]
+
+    monkeypatch.setattr(summarization, "cached_generate_summaries", fake_generate)
+    long_summary = " ".join(synthetic_reviews(150, seed=2))
+    (long_ids,) = tokenize_reviews([long_summary], tokenizer)
+    assert len(long_ids) > MAX_INPUT_TOKENS
+
+    reduce_summaries([long_summary], None, tokenizer, "cpu")
+
+    assert all(len(ids) <= MAX_INPUT_TOKENS for ids in inputs)
+    first_level = [token for ids in inputs[:-1] for token in ids[1:-1]]  # without <s> and </s>
+    assert first_level == long_ids
@@ -0,0 +1,252 @@
+"""Timed spans, counters and histograms for the scrape -> clean -> summarize pipeline.
+
+Spans are written as JSON log lines (logger "review_summarizer.trace") and every metric can be
+scraped in the Prometheus text format (metrics_text(), GET /metrics on the API server, or
+serve_metrics(port) for the Streamlit process).
+
+Off by default: span() returns a shared no-op and count() / observe() return straight away, so
+instrumented code pays one flag check. Turn it on with REVIEW_TRACING=1 (REVIEW_TRACING_LOG=<file>
+sends the span log to a file instead of stderr) or enable().
+
+    with tracing.span("scrape.page", backend="http") as span:
+        ...
+        span.set(reviews=len(reviews))
+    tracing.count("reviews_dropped_total", reason="language")
+    tracing.observe("chunk_tokens", 812, buckets=tracing.TOKEN_BUCKETS)
+"""
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LOGGER = logging.getLogger("review_summarizer.trace")
+METRIC_PREFIX = "review_summarizer_"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+TOKEN_BUCKETS = (32, 64, 128, 256, 512, 768, 896, 1024)
+
+_enabled = os.environ.get("REVIEW_TRACING", "").lower() in ("1", "true", "yes", "on")
+_current_span = contextvars.ContextVar("review_summarizer_span", default=None)
+_span_ids = itertools.count(1)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    """Counters and histograms keyed by name and label set, rendered in the Prometheus text format"""
+
+    def __init__(self, prefix=METRIC_PREFIX):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._buckets = {}
+
+    def inc(self, name, value=1, labels=()):
+        key = (name, tuple(sorted(labels)))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, labels=(), buckets=SECONDS_BUCKETS):
+        key = (name, tuple(sorted(labels)))
+        with self._lock:
+            buckets = self._buckets.setdefault(name, tuple(buckets))
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._buckets.clear()
+
+    def render(self):
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((key, dict(value, buckets=list(value["buckets"]))) for key, value in self._histograms.items())
+            buckets = dict(self._buckets)
+
+        lines = []
+        typed = set()
+        for (name, labels), value in counters:
+            metric = self.prefix + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), histogram in histograms:
+            metric = self.prefix + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            for bound, bucket_count in zip(buckets[name], histogram["buckets"]):
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {bucket_count}")
+            lines.append(f"{metric}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {_format_value(round(histogram['sum'], 6))}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class _NullSpan:
+    __slots__ = ()
+    seconds = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed step. Nested spans share the trace_id of the outermost one in the same thread"""
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.span_id = next(_span_ids)
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex[:16]
+        self.seconds = None
+        self._token = None
+        self._started = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.seconds = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        status = "ok" if exc_type is None else "error"
+        REGISTRY.observe("span_seconds", self.seconds, (("span", self.name), ("status", status)))
+        LOGGER.info(json.dumps({
+            "ts": round(time.time(), 3),
+            "span": self.name,
+            "seconds": round(self.seconds, 6),
+            "status": status,
+            "error": repr(exc) if exc is not None else None,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            **self.attrs,
+        }, default=str, ensure_ascii=False))
+        return False
+
+
+def enabled():
+    return _enabled
+
+
+def enable(on=True, log_file=None):
+    """Switch instrumentation on (or off). Span lines go to log_file, or stderr, unless the trace
+    logger already has handlers"""
+    global _enabled
+    _enabled = on
+    if on and not LOGGER.handlers:
+        handler = logging.FileHandler(log_file, encoding="utf-8") if log_file else logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        LOGGER.addHandler(handler)
+        LOGGER.setLevel(logging.INFO)
+        LOGGER.propagate = False
+
+
+def span(name, **attrs):
+    """Context manager timing a step; attributes (and ones added with .set()) go into its log line"""
+    if not _enabled:
+        return NULL_SPAN
+    return Span(name, attrs)
+
+
+def traced(name):
+    """Decorator: run the function inside span(name)"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with Span(name, {}):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, value=1, **labels):
+    if _enabled:
+        REGISTRY.inc(name, value, tuple(labels.items()))
+
+
+def observe(name, value, buckets=SECONDS_BUCKETS, **labels):
+    if _enabled:
+        REGISTRY.observe(name, value, tuple(labels.items()), buckets)
+
+
+def metrics_text():
+    return REGISTRY.render()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0].rstrip("/") != "/metrics":
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = metrics_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Serve GET /metrics on a daemon thread; returns the server"""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+if _enabled:
+    enable(log_file=os.environ.get("REVIEW_TRACING_LOG"))